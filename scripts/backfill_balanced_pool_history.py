@@ -0,0 +1,53 @@
+import argparse
+import asyncio
+from datetime import datetime, timedelta
+
+from beanie import init_beanie
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from tracker_rhizome_dev import BALANCED_POOL_BACKFILL_CONCURRENCY, ENV
+from tracker_rhizome_dev.app.balanced_pool_history import BalancedPoolHistory
+from tracker_rhizome_dev.app.http_request import HttpReq
+from tracker_rhizome_dev.app.models.balanced import Db_BalancedPoolHistory
+from tracker_rhizome_dev.app.models.icx import Db_IcxBlock, Db_IcxCallResult
+
+
+async def backfill(args: argparse.Namespace):
+    db_client = AsyncIOMotorClient(ENV["DB_URL"])
+    await init_beanie(
+        db_client[ENV["DB_NAME"]],
+        document_models=[Db_BalancedPoolHistory, Db_IcxBlock, Db_IcxCallResult],
+    )
+    await HttpReq.open()
+    try:
+        result = await BalancedPoolHistory.backfill(
+            datetime.fromisoformat(args.start),
+            datetime.fromisoformat(args.end) if args.end else datetime.utcnow(),
+            timedelta(minutes=args.interval),
+            args.concurrency,
+        )
+    finally:
+        await HttpReq.close()
+    print(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Backfill Balanced pool snapshots. Safe to re-run after a crash."
+    )
+    parser.add_argument("start", help="First snapshot time in UTC (ISO 8601)")
+    parser.add_argument("end", nargs="?", help="Last snapshot time in UTC (ISO 8601)")
+    parser.add_argument(
+        "--interval", type=int, default=60, help="Minutes between snapshots"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=BALANCED_POOL_BACKFILL_CONCURRENCY,
+        help="Snapshots fetched at once",
+    )
+    asyncio.run(backfill(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+import argparse
+import asyncio
+
+from beanie import init_beanie
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from tracker_rhizome_dev import ENV, VALIDATOR_METRICS_BACKFILL_CONCURRENCY
+from tracker_rhizome_dev.app.http_request import HttpReq
+from tracker_rhizome_dev.app.models.icx import Db_IcxCallResult, Db_ValidatorMetrics
+from tracker_rhizome_dev.app.models.lease import Db_Lease
+from tracker_rhizome_dev.app.validator_metrics import ValidatorMetrics
+
+
+async def backfill(args: argparse.Namespace):
+    db_client = AsyncIOMotorClient(ENV["DB_URL"])
+    await init_beanie(
+        db_client[ENV["DB_NAME"]],
+        document_models=[Db_IcxCallResult, Db_Lease, Db_ValidatorMetrics],
+    )
+    await HttpReq.open()
+    try:
+        result = await ValidatorMetrics.backfill(args.terms, args.concurrency)
+    finally:
+        await HttpReq.close()
+    if result is None:
+        print("Another validator metrics backfill is running.")
+    else:
+        print(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Backfill per-term validator metrics. Safe to re-run."
+    )
+    parser.add_argument(
+        "terms", type=int, help="Number of terms to walk back from the current term"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=VALIDATOR_METRICS_BACKFILL_CONCURRENCY,
+        help="Terms fetched at once",
+    )
+    asyncio.run(backfill(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
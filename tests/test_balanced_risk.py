@@ -0,0 +1,70 @@
+import math
+
+import numpy
+import pytest
+from bson.decimal128 import Decimal128
+
+from tracker_rhizome_dev.app.balanced_risk import BalancedRisk
+
+
+@pytest.fixture
+def positions(monkeypatch):
+    # Positions: healthy, locked, liquidatable, no debt, no collateral.
+    monkeypatch.setattr(BalancedRisk, "IDS", numpy.array([1, 2, 3, 4, 5]))
+    monkeypatch.setattr(
+        BalancedRisk,
+        "ADDRESSES",
+        numpy.array(["hx1", "hx2", "hx3", "hx4", "hx5"], dtype=object),
+    )
+    monkeypatch.setattr(
+        BalancedRisk, "COLLATERAL", numpy.array([1000.0, 100.0, 60.0, 50.0, 0.0])
+    )
+    monkeypatch.setattr(
+        BalancedRisk, "DEBT", numpy.array([100.0, 50.0, 50.0, 0.0, 10.0])
+    )
+    monkeypatch.setattr(BalancedRisk, "_price", None)
+    monkeypatch.setattr(BalancedRisk, "_risk", None)
+
+
+def test_compute_ratios_and_standings(positions):
+    risk = BalancedRisk.compute(0.5)
+
+    assert risk["ratio"][:3].tolist() == [5.0, 1.0, 0.6]
+    assert math.isinf(risk["ratio"][3])
+    assert risk["ratio"][4] == 0.0
+    assert risk["standing"].tolist() == [
+        "Healthy",
+        "Liquidate",
+        "Liquidate",
+        "No Debt",
+        "Liquidate",
+    ]
+
+    risk = BalancedRisk.compute(2.0)
+    assert risk["ratio"][:3].tolist() == [20.0, 4.0, 2.4]
+    assert risk["standing"][:3].tolist() == ["Healthy", "Healthy", "Locked"]
+
+
+def test_compute_liquidation_price_and_distance(positions):
+    risk = BalancedRisk.compute(2.0)
+
+    # Liquidated once collateral * price / debt falls to LIQUIDATION_RATIO.
+    assert risk["liquidation_price"][:3] == pytest.approx([0.15, 0.75, 1.25])
+    assert risk["liquidation_price"][3] == 0.0
+    assert math.isinf(risk["liquidation_price"][4])
+    assert risk["distance_to_liquidation"][:4] == pytest.approx(
+        [0.925, 0.625, 0.375, 1.0]
+    )
+
+
+def test_compute_reuses_result_for_same_price(positions):
+    risk = BalancedRisk.compute(2.0)
+    assert BalancedRisk.compute(2.0) is risk
+    assert BalancedRisk.compute(1.0) is not risk
+
+
+def test_to_float_accepts_stored_amount_formats():
+    assert BalancedRisk._to_float(None) == 0.0
+    assert BalancedRisk._to_float(Decimal128("1.5")) == 1.5
+    assert BalancedRisk._to_float(hex(25 * 10**17)) == 2.5
+    assert BalancedRisk._to_float("3.25") == 3.25
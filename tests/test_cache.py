@@ -0,0 +1,252 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse
+from fastapi.testclient import TestClient
+
+from tracker_rhizome_dev.app.cache import (
+    MemoryBackend,
+    SharedCache,
+    fragment_cache,
+    shared_cached,
+    single_flight,
+)
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    backend = MemoryBackend()
+    monkeypatch.setattr(SharedCache, "BACKEND", backend)
+    return backend
+
+
+def make_counted(delay: float = 0):
+    calls = []
+
+    async def func(x):
+        calls.append(x)
+        await asyncio.sleep(delay)
+        return {"x": x}
+
+    return func, calls
+
+
+#################
+# MemoryBackend #
+#################
+
+
+def test_memory_backend_add_is_exclusive():
+    async def run():
+        backend = MemoryBackend()
+        assert await backend.add("lock", b"1", 10) is True
+        assert await backend.add("lock", b"2", 10) is False
+        assert await backend.get("lock") == b"1"
+        await backend.delete("lock")
+        assert await backend.add("lock", b"3", 10) is True
+
+    asyncio.run(run())
+
+
+def test_memory_backend_expires_values():
+    async def run():
+        backend = MemoryBackend()
+        await backend.set("key", b"value", 0.05)
+        assert await backend.get("key") == b"value"
+        await asyncio.sleep(0.1)
+        assert await backend.get("key") is None
+        # An expired lock can be taken again.
+        assert await backend.add("key", b"value", 10) is True
+
+    asyncio.run(run())
+
+
+#################
+# shared_cached #
+#################
+
+
+def test_shared_cached_l1_hit(backend):
+    func, calls = make_counted()
+    cached = shared_cached("test-l1", ttl=10)(func)
+
+    async def run():
+        assert await cached(1) == {"x": 1}
+        # Clear L2 so a second result can only come from L1.
+        backend.values = {}
+        assert await cached(1) == {"x": 1}
+
+    asyncio.run(run())
+    assert calls == [1]
+
+
+def test_shared_cached_l2_hit_across_workers(backend):
+    # Two decorations of the same namespace stand in for two worker processes,
+    # each with its own L1 cache.
+    func_a, calls_a = make_counted()
+    func_b, calls_b = make_counted()
+    worker_a = shared_cached("test-l2", ttl=10)(func_a)
+    worker_b = shared_cached("test-l2", ttl=10)(func_b)
+
+    async def run():
+        assert await worker_a(1) == {"x": 1}
+        assert await worker_b(1) == {"x": 1}
+        assert await worker_b(2) == {"x": 2}
+
+    asyncio.run(run())
+    assert calls_a == [1]
+    assert calls_b == [2]
+
+
+def test_shared_cached_polls_while_another_worker_holds_the_lock(backend):
+    func_a, calls_a = make_counted(delay=0.2)
+    func_b, calls_b = make_counted()
+    worker_a = shared_cached("test-lock", ttl=10)(func_a)
+    worker_b = shared_cached("test-lock", ttl=10)(func_b)
+
+    async def run():
+        task_a = asyncio.ensure_future(worker_a(1))
+        await asyncio.sleep(0.05)  # Let worker A take the lock.
+        result_b = await worker_b(1)
+        return await task_a, result_b
+
+    result_a, result_b = asyncio.run(run())
+    assert result_a == result_b == {"x": 1}
+    assert calls_a == [1]
+    assert calls_b == []
+    # The lock is released once the value is stored.
+    assert [key for key in backend.values if key.endswith(":lock")] == []
+
+
+def test_shared_cached_coalesces_concurrent_calls_in_a_worker(backend):
+    func, calls = make_counted(delay=0.05)
+    cached = shared_cached("test-coalesce", ttl=10)(func)
+
+    async def run():
+        return await asyncio.gather(*[cached(1) for _ in range(10)])
+
+    results = asyncio.run(run())
+    assert results == [{"x": 1}] * 10
+    assert calls == [1]
+
+
+def test_shared_cached_expires_in_both_tiers(backend):
+    func, calls = make_counted()
+    cached = shared_cached("test-ttl", ttl=0.05)(func)
+
+    async def run():
+        await cached(1)
+        await asyncio.sleep(0.1)
+        await cached(1)
+
+    asyncio.run(run())
+    assert calls == [1, 1]
+
+
+#################
+# single_flight #
+#################
+
+
+def test_single_flight_coalesces_and_caches():
+    func, calls = make_counted(delay=0.05)
+    flight = single_flight(ttl=10)(func)
+
+    async def run():
+        results = await asyncio.gather(*[flight(1) for _ in range(10)])
+        results.append(await flight(1))
+        results.append(await flight(2))
+        return results
+
+    results = asyncio.run(run())
+    assert results == [{"x": 1}] * 11 + [{"x": 2}]
+    assert calls == [1, 2]
+
+
+def test_single_flight_shares_but_does_not_cache_exceptions():
+    calls = []
+
+    async def func(x):
+        calls.append(x)
+        await asyncio.sleep(0.05)
+        raise ValueError(x)
+
+    flight = single_flight(ttl=10)(func)
+
+    async def run():
+        results = await asyncio.gather(
+            *[flight(1) for _ in range(5)], return_exceptions=True
+        )
+        assert all(isinstance(result, ValueError) for result in results)
+        with pytest.raises(ValueError):
+            await flight(1)
+
+    asyncio.run(run())
+    assert calls == [1, 1]
+
+
+##################
+# fragment_cache #
+##################
+
+
+def make_fragment_app(version: dict):
+    renders = []
+    app = FastAPI()
+
+    @app.get("/fragment/")
+    @fragment_cache(ttl=10, version=lambda: version["value"])
+    async def fragment(request: Request, page: int = 1):
+        renders.append(page)
+        return HTMLResponse(f"<p>{page}:{version['value']}</p>")
+
+    return TestClient(app), renders
+
+
+def test_fragment_cache_serves_etag_and_304():
+    version = {"value": 1}
+    client, renders = make_fragment_app(version)
+
+    r = client.get("/fragment/")
+    assert r.status_code == 200
+    assert r.text == "<p>1:1</p>"
+    etag = r.headers["etag"]
+
+    r = client.get("/fragment/", headers={"If-None-Match": etag})
+    assert r.status_code == 304
+    assert r.headers["etag"] == etag
+    assert r.content == b""
+
+    r = client.get("/fragment/")
+    assert r.status_code == 200
+    assert r.headers["etag"] == etag
+    assert renders == [1]
+
+
+def test_fragment_cache_keys_on_query_and_version():
+    version = {"value": 1}
+    client, renders = make_fragment_app(version)
+
+    etag = client.get("/fragment/").headers["etag"]
+    assert client.get("/fragment/?page=2").text == "<p>2:1</p>"
+
+    version["value"] = 2
+    r = client.get("/fragment/", headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.text == "<p>1:2</p>"
+    assert r.headers["etag"] != etag
+    assert renders == [1, 2, 1]
+
+
+def test_fragment_cache_renders_directly_outside_of_a_request():
+    calls = []
+
+    @fragment_cache(ttl=10)
+    async def fragment(request=None):
+        calls.append(request)
+        return HTMLResponse("<p></p>")
+
+    asyncio.run(fragment())
+    asyncio.run(fragment())
+    assert calls == [None, None]
@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+
+from tracker_rhizome_dev.app.icon_rpc import IconRpc, JsonRpcError
+
+
+@pytest.fixture
+def posted(monkeypatch):
+    """
+    Replaces IconRpc._post with a fake node that answers batch items in reverse
+    order. Items whose params hold "fail" get an error, items holding "drop" get
+    no response, and chunks with a "reject" item are rejected as a whole.
+    """
+    posted = []
+
+    async def _post(cls, payload):
+        posted.append(payload)
+        if isinstance(payload, list) and any(
+            item["params"].get("reject") for item in payload
+        ):
+            return {"jsonrpc": "2.0", "id": None, "error": {"code": -32600}}
+        response = []
+        for item in reversed(payload):
+            if item["params"].get("fail"):
+                response.append(
+                    {
+                        "jsonrpc": "2.0",
+                        "id": item["id"],
+                        "error": {"code": -30006, "message": "Not found"},
+                    }
+                )
+            elif item["params"].get("drop"):
+                continue
+            else:
+                response.append(
+                    {
+                        "jsonrpc": "2.0",
+                        "id": item["id"],
+                        "result": item["params"].get("n"),
+                    }
+                )
+        return response
+
+    monkeypatch.setattr(IconRpc, "_post", classmethod(_post))
+    return posted
+
+
+def test_batch_maps_responses_to_requests_by_id(posted):
+    requests = [("icx_call", {"n": n}) for n in range(5)]
+    results = asyncio.run(IconRpc.batch(requests, batch_size=2))
+
+    assert results == [0, 1, 2, 3, 4]
+    assert [len(chunk) for chunk in posted] == [2, 2, 1]
+    ids = [item["id"] for chunk in posted for item in chunk]
+    assert len(set(ids)) == len(ids)
+
+
+def test_batch_isolates_item_errors(posted):
+    requests = [
+        ("icx_call", {"n": 0}),
+        ("icx_call", {"n": 1, "fail": True}),
+        ("icx_call", {"n": 2}),
+        ("icx_call", {"n": 3, "drop": True}),
+    ]
+    results = asyncio.run(IconRpc.batch(requests))
+
+    assert results[0] == 0
+    assert isinstance(results[1], JsonRpcError)
+    assert results[1].code == -30006
+    assert results[2] == 2
+    assert isinstance(results[3], JsonRpcError)
+    assert results[3].code == -32603
+
+
+def test_batch_isolates_rejected_chunks(posted):
+    requests = [
+        ("icx_call", {"n": 0}),
+        ("icx_call", {"n": 1, "reject": True}),
+        ("icx_call", {"n": 2}),
+    ]
+    results = asyncio.run(IconRpc.batch(requests, batch_size=2))
+
+    assert all(isinstance(result, JsonRpcError) for result in results[:2])
+    assert results[0].code == -32600
+    assert results[2] == 2
+
+
+def test_call_many_encodes_call_params(posted):
+    results = asyncio.run(
+        IconRpc.call_many(
+            [
+                ("cx1", "getPoolStats", {"_id": 2, "n": 0}, 10),
+                ("cx2", "name", None, None),
+            ]
+        )
+    )
+
+    assert results == [None, None]
+    first, second = posted[0]
+    assert first["method"] == "icx_call"
+    assert first["params"] == {
+        "to": "cx1",
+        "dataType": "call",
+        "data": {"method": "getPoolStats", "params": {"_id": "0x2", "n": "0x0"}},
+        "height": "0xa",
+    }
+    assert second["params"] == {
+        "to": "cx2",
+        "dataType": "call",
+        "data": {"method": "name"},
+    }
@@ -28,10 +28,14 @@ def env():
         "DB_NAME": os.getenv("DB_NAME"),
         "DB_URL": os.getenv("DB_URL"),
         "DISCORD_WEBHOOK_URL": os.getenv("DISCORD_WEBHOOK_URL"),
+        "CHAIN_FOLLOWER": os.getenv("CHAIN_FOLLOWER"),
         "ENV": os.getenv("ENV"),
         "GITHUB_API_KEY": os.getenv("GITHUB_API_KEY"),
+        "HTTP2": os.getenv("HTTP2"),
+        "ICX_CALL_CACHE_PERSIST": os.getenv("ICX_CALL_CACHE_PERSIST"),
         "ICON_API_ENDPOINT": os.getenv("ICON_API_ENDPOINT"),
         "ICON_TRACKER_ENDPOINT": os.getenv("ICON_TRACKER_ENDPOINT"),
+        "REDIS_URL": os.getenv("REDIS_URL"),
     }
 
 
@@ -40,6 +44,91 @@ ENV = env()
 # Set max workers based on CPU count
 MAX_WORKERS = int(os.cpu_count() * 4)
 
+# Set connection pool limits for outbound HTTP requests
+HTTP_MAX_CONNECTIONS_PER_HOST = 20
+HTTP_MAX_KEEPALIVE_CONNECTIONS_PER_HOST = 10
+HTTP_KEEPALIVE_EXPIRY = 30
+
+# Set ICON JSON-RPC request timeout (seconds) and retry backoff
+ICX_RPC_TIMEOUT = 10
+ICX_RPC_RETRIES = 5
+ICX_RPC_BACKOFF = 0.25
+
+# Set maximum number of calls per ICON JSON-RPC batch request, and batches in flight
+ICX_RPC_BATCH_SIZE = 100
+ICX_RPC_BATCH_CONCURRENCY = 4
+
+# Set ICON contract call result cache sizes: results at a pinned height never change,
+# results at the latest block are kept for about one block
+ICX_CALL_CACHE_PINNED_SIZE = 50000
+ICX_CALL_CACHE_LATEST_SIZE = 1000
+ICX_CALL_CACHE_LATEST_TTL = 2
+
+# Set chain head polling interval (one block) and the age at which a pinned
+# height is considered stale, in seconds
+CHAIN_HEAD_POLL_INTERVAL = 2
+CHAIN_HEAD_MAX_AGE = 10
+
+# Set rolling window of recent blocks kept in the database (about one hour),
+# blocks ingested per batch, and chain follower leader lease duration (seconds)
+RECENT_BLOCKS_WINDOW = 1800
+RECENT_BLOCKS_SYNC_BATCH = 50
+CHAIN_FOLLOWER_LEASE_TTL = 15
+
+# Set live update settings: events queued per subscriber, how often (in blocks)
+# slow-moving fragments are re-rendered, and the SSE keepalive interval (seconds)
+BROADCAST_QUEUE_SIZE = 32
+LIVE_UPDATES_SLOW_INTERVAL = 15
+SSE_KEEPALIVE_INTERVAL = 15
+
+# Set how long coalesced upstream results are reused (seconds)
+MICRO_CACHE_TTL = 2
+
+# Set how often the Balanced liquidation risk engine reloads positions (seconds)
+BALANCED_RISK_RELOAD_INTERVAL = 60
+
+# Set block index settings: blocks between sampled heights, samples fetched per
+# sync, and how often each worker reloads samples written by other workers (seconds)
+BLOCK_INDEX_SAMPLE_INTERVAL = 1000
+BLOCK_INDEX_SYNC_BATCH = 500
+BLOCK_INDEX_RELOAD_INTERVAL = 600
+
+# Set Balanced pool history backfill settings: snapshots fetched concurrently, and
+# the spacing of block heights resolved exactly (heights in between are interpolated)
+BALANCED_POOL_BACKFILL_CONCURRENCY = 8
+BALANCED_POOL_BACKFILL_ANCHOR_INTERVAL = 86400
+
+# Set validator node probe settings: per-probe timeout (seconds), and probes in flight
+VALIDATOR_NODE_PROBE_TIMEOUT = 5
+VALIDATOR_NODE_PROBE_CONCURRENCY = 100
+
+# Set validator table settings: blocks between snapshots, number of snapshot versions
+# kept, snapshot builder lease duration, and how often each worker checks for a newer
+# snapshot (seconds)
+VALIDATOR_TABLE_UPDATE_INTERVAL = 30
+VALIDATOR_TABLE_RETENTION = 5
+VALIDATOR_TABLE_LEASE_TTL = 120
+VALIDATOR_TABLE_RELOAD_INTERVAL = 10
+
+# Set how often (in blocks) IISS statistics are recomputed
+IISS_STATS_UPDATE_INTERVAL = 30
+
+# Set validator metrics backfill settings: terms snapshotted concurrently, and how
+# long a run holds the backfill lease without renewing it (seconds)
+VALIDATOR_METRICS_BACKFILL_CONCURRENCY = 4
+VALIDATOR_METRICS_LEASE_TTL = 300
+
+# Set GitHub GraphQL commit history settings: repositories per query, and commits
+# per repository per page (the API maximum)
+GITHUB_GRAPHQL_REPOS_PER_QUERY = 10
+GITHUB_GRAPHQL_COMMITS_PER_PAGE = 100
+
+# Set shared (Redis) cache key prefix, and how long a worker may hold the lock
+# to compute a missing value while others poll for it (seconds)
+SHARED_CACHE_PREFIX = "tracker"
+SHARED_CACHE_LOCK_TTL = 10
+SHARED_CACHE_POLL_INTERVAL = 0.05
+
 # Set Redis caching expiration times
 if ENV["ENV"] == "PRODUCTION":
     CACHE_30S = 30
@@ -1,20 +1,23 @@
+import asyncio
 import json
-from concurrent.futures import ThreadPoolExecutor
+import os
+import re
 from decimal import Decimal
-from functools import lru_cache
 
-from cachetools import LRUCache, cached
 from fastapi import Query
-from iconsdk.exception import JSONRPCException
+from pymongo import UpdateOne
 
 from tracker_rhizome_dev import EXA, MAX_WORKERS
 from tracker_rhizome_dev.app.data.tokens import Tokens
+from tracker_rhizome_dev.app.icon_rpc import IconRpc, JsonRpcError
 from tracker_rhizome_dev.app.icx import Icx
 from tracker_rhizome_dev.app.models.balanced import (
     BalancedLoan,
+    Db_BalancedLoanPosition,
     Db_BalancedPoolDynamicData,
     Db_BalancedPoolStaticData,
 )
+from tracker_rhizome_dev.app.regex import ICX_ADDRESS_REGEX
 from tracker_rhizome_dev.app.tracker import Tracker
 from tracker_rhizome_dev.app.utils import to_int
 
@@ -27,32 +30,70 @@ class Balanced(Icx):
     SICX_CONTRACT = "cx2609b924e33ef00b648a409245c7ea394c467824"
     FEATURED_POOL_IDS = [2, 3, 4, 5, 6, 7, 8, 9, 10, 15, 17, 31]
 
+    # Position index (loan index -> owner address), loaded once per process.
+    LOAN_ADDRESSES: dict = None
+    LOAN_ADDRESSES_SEED_FILE = os.path.join(
+        os.path.dirname(__file__), "cache", "balanced-loans.json"
+    )
+    _loan_addresses_lock = asyncio.Lock()
+
     def __init__(self) -> None:
         super().__init__()
 
     @classmethod
-    def get_borrower_count(cls):
-        result = cls.call(cls.BALANCED_LOANS_CONTRACT, "borrowerCount")
+    async def get_borrower_count(cls):
+        result = await cls.call(cls.BALANCED_LOANS_CONTRACT, "borrowerCount")
         return to_int(result)
 
     @classmethod
-    def get_nonzero_positions(cls):
-        result = cls.call(cls.BALANCED_LOANS_CONTRACT, "getNonzeroPositionCount")
+    async def get_nonzero_positions(cls):
+        result = await cls.call(cls.BALANCED_LOANS_CONTRACT, "getNonzeroPositionCount")
         return to_int(result)
 
     @classmethod
-    async def get_liquidations(
-        self,
-        page: int = 1,
-        limit: int = 100,
-    ):
-        skip = int((page - 1) * limit)
-        liquidations = await Tracker.get_logs(
-            self.BALANCED_LOANS_CONTRACT, "Liquidate", limit, skip
+    async def get_liquidations(cls, start_height: int, page_size: int = 100) -> list:
+        """
+        Returns liquidations on the loans contract after the provided block height.
+
+        Args:
+            start_height (int): The last block height that was already processed.
+            page_size (int): The number of logs to request per page.
+
+        Returns:
+            A list of dictionaries with the transaction hash, log index, block
+            height and timestamp, position owner, liquidated sICX amount, and
+            the address that sent the liquidation transaction.
+        """
+        logs = await cls._get_logs_after(start_height, "Liquidate", page_size)
+        if len(logs) == 0:
+            return []
+
+        # Liquidate logs don't include the liquidator, so look up the senders of
+        # every liquidation transaction in one batch.
+        tx_hashes = sorted({log.transaction_hash for log in logs})
+        transactions = await IconRpc.batch(
+            [("icx_getTransactionByHash", {"txHash": tx_hash}) for tx_hash in tx_hashes]
         )
-        return liquidations
+        liquidators = {
+            tx_hash: transaction.get("from", "")
+            for tx_hash, transaction in zip(tx_hashes, transactions)
+            if not isinstance(transaction, JsonRpcError)
+        }
 
-    def get_pool(self, pool_id: int, height: int = None):
+        return [
+            {
+                "tx_hash": log.transaction_hash,
+                "log_index": log.log_index,
+                "block_height": log.block_number,
+                "block_timestamp": log.block_timestamp,
+                "owner": log.indexed[1],
+                "amount": Decimal(to_int(log.indexed[2])) / EXA,
+                "liquidator": liquidators.get(log.transaction_hash, ""),
+            }
+            for log in logs
+        ]
+
+    async def get_pool(self, pool_id: int, height: int = None):
         """
         Returns Balanced pool stats for the provided pool_id.
 
@@ -63,13 +104,59 @@ class Balanced(Icx):
         Returns:
             A dictionary containing stats for the pool.
         """
-        # Query for pool data at provided block height (latest block by default).
-        pool = self._get_pool(pool_id, height)
+        pools = await self.get_pools_by_id([pool_id], height)
+        return pools[0]
+
+    async def get_pools_by_id(
+        self, pool_ids: list, height: int = None, daily_change: bool = True
+    ) -> list:
+        """
+        Returns Balanced pool stats for each of the provided pool IDs.
 
-        # Continue if pool is not 'None'.
-        if pool is not None:
-            # Query for pool data 24 hours (43,200 blocks) prior to the provided 'height'.
-            pool_24h_ago = self._get_pool(pool_id, height=self.last_block - 43200)
+        Current and 24 hour old stats for every pool are fetched together
+        in JSON-RPC batch requests.
+
+        Args:
+            pool_ids (list): The ID numbers of pools on Balanced.
+            height (int): The block height to query.
+            daily_change (bool): Whether to fetch 24 hour old stats and include
+                the daily price change.
+
+        Returns:
+            A list of pool dictionaries in the same order as 'pool_ids'.
+            Pools that don't exist at 'height' are 'None'.
+        """
+        # Query for pool data at provided block height (latest block by default),
+        # and 24 hours (43,200 blocks) prior to the latest block.
+        last_block = await self.get_last_block()
+        if height is None:
+            height = last_block
+        heights = [height, last_block - 43200] if daily_change is True else [height]
+        calls = [
+            (self.BALANCED_DEX_CONTRACT, "getPoolStats", {"_id": pool_id}, h)
+            for h in heights
+            for pool_id in pool_ids
+        ]
+        results = await self.call_many(calls)
+        results_now = results[: len(pool_ids)]
+        results_24h_ago = results[len(pool_ids) :] or [None] * len(pool_ids)
+
+        pools = []
+        for pool_id, result, result_24h_ago in zip(
+            pool_ids, results_now, results_24h_ago
+        ):
+            pool = await self._parse_pool(pool_id, result)
+
+            # Append 'None' if pool is 'None'.
+            if pool is None:
+                pools.append(None)
+                continue
+
+            if daily_change is False:
+                pools.append(pool)
+                continue
+
+            pool_24h_ago = await self._parse_pool(pool_id, result_24h_ago)
             try:
                 # Set 24h change to 0 for sICX/ICX pool.
                 if pool_id == 1:
@@ -89,55 +176,40 @@ class Balanced(Icx):
                 # Set both to 0 if there's an issue (probably because the pool didn't exist 24 hours ago).
                 pool["price_daily_change_amount"] = 0
                 pool["price_daily_change_percent"] = 0
-            return pool
-        # Return 'None' if pool is 'None'.
-        else:
-            return None
+            pools.append(pool)
+        return pools
 
-    def get_pool_dynamic_metadata(
+    async def get_pool_dynamic_metadata(
         self, pool_id: int, height: int = None
     ) -> Db_BalancedPoolDynamicData:
-        result = self.get_pool(pool_id, height)
+        result = await self.get_pool(pool_id, height)
         if result is not None:
             return Db_BalancedPoolDynamicData(**result)
         else:
             return None
 
-    def get_pool_static_metadata(self, pool_id: int, height: int = None):
-        result = self.get_pool(pool_id, height)
+    async def get_pool_static_metadata(self, pool_id: int, height: int = None):
+        result = await self.get_pool(pool_id, height)
         return Db_BalancedPoolStaticData(**result)
 
-    def get_pools(self, height: int = None):
-        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-            futures = [
-                executor.submit(self.get_pool, pool_id=id, height=height)
-                for id in range(1, self.get_pool_count())
-            ]
-            pools = [future.result() for future in futures if future.result()]
+    async def get_pools(self, height: int = None):
+        pool_count = await self.get_pool_count()
+        pools = await self.get_pools_by_id(list(range(1, pool_count)), height)
+        pools = [pool for pool in pools if pool]
         return sorted(pools, key=lambda k: k["id"])
 
-    def get_pool_count(self, height: int = None):
-        result = self.call(self.BALANCED_DEX_CONTRACT, "getNonce")
+    async def get_pool_count(self, height: int = None):
+        result = await self.call(self.BALANCED_DEX_CONTRACT, "getNonce", height=height)
         return to_int(result)
 
-    @lru_cache(maxsize=10000)
-    def get_loan_address(self, index: int, height: int):
-        try:
-            with open(f"./tracker_rhizome_dev/app/cache/balanced-loans.json", "r") as f:
-                data = json.load(f)
-                result = data[str(index)]
-                return result
-        # If cache file is not found, make a request to the blockchain to get the position address.
-        except (FileNotFoundError, KeyError):
-            result = self.call(
-                self.BALANCED_LOANS_CONTRACT, "getPositionAddress", {"_index": index}
-            )
-            return result
+    async def get_loan_address(self, index: int, height: int = None):
+        loan_addresses = await self.get_loan_addresses([index], height)
+        return loan_addresses[0]
 
-    def get_loan(self, index: int, height: int = None):
-        loan_address = self.get_loan_address(index, height)
+    async def get_loan(self, index: int, height: int = None):
+        loan_address = await self.get_loan_address(index, height)
         try:
-            loan = self.call(
+            loan = await self.call(
                 self.BALANCED_LOANS_CONTRACT,
                 "getAccountPositions",
                 {"_owner": loan_address},
@@ -145,38 +217,121 @@ class Balanced(Icx):
             loan = BalancedLoan(**loan)
             print(f"Processing Balanced Loan #{index}...")
             return loan
-        except JSONRPCException:
+        except JsonRpcError:
             return None
 
-    def get_loans(self, height: int = None, dump: bool = True):
-        loan_count = self.get_borrower_count()
-        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-            futures = [
-                executor.submit(self.get_loan, index=i) for i in range(1, loan_count)
+    async def get_loan_addresses(self, indexes: list, height: int = None) -> list:
+        """
+        Returns the position addresses for the provided loan indexes.
+
+        Addresses missing from the position index are fetched in JSON-RPC batch
+        requests and appended to the index.
+        """
+        loan_addresses = await self._load_loan_addresses()
+
+        missing_indexes = [i for i in indexes if i not in loan_addresses]
+        results = await self.call_many(
+            [
+                (
+                    self.BALANCED_LOANS_CONTRACT,
+                    "getPositionAddress",
+                    {"_index": i},
+                    height,
+                )
+                for i in missing_indexes
+            ]
+        )
+        await self._save_loan_addresses(
+            {
+                index: result
+                for index, result in zip(missing_indexes, results)
+                if isinstance(result, str)
+            }
+        )
+
+        return [loan_addresses.get(i) for i in indexes]
+
+    async def get_loans(self, height: int = None):
+        loan_count = await self.get_borrower_count()
+        loan_addresses = await self.get_loan_addresses(
+            list(range(1, loan_count)), height
+        )
+        loan_addresses = [address for address in loan_addresses if address is not None]
+        loans = await self.get_loans_by_address(loan_addresses, height)
+        print(f"Processed {len(loans)} Balanced loans...")
+        return loans
+
+    async def get_loans_by_address(self, addresses: list, height: int = None) -> list:
+        """
+        Returns the loans owned by the provided addresses, fetched in JSON-RPC batches.
+        Addresses without a position are skipped.
+        """
+        results = await self.call_many(
+            [
+                (
+                    self.BALANCED_LOANS_CONTRACT,
+                    "getAccountPositions",
+                    {"_owner": address},
+                    height,
+                )
+                for address in addresses
             ]
-            loans = [future.result() for future in futures]
-            loans = [loan for loan in loans if loan is not None]
-        if dump is True:
-            loan_index_address_map = {str(loan.pos_id): loan.address for loan in loans}
-            with open(
-                f"./tracker_rhizome_dev/app/cache/balanced-loans.json", "w+"
-            ) as f:
-                f.write(json.dumps(loan_index_address_map, indent=4))
+        )
+        loans = [
+            BalancedLoan(**result) for result in results if isinstance(result, dict)
+        ]
+        # Append positions opened since the index was last updated.
+        await self._save_loan_addresses({loan.pos_id: loan.address for loan in loans})
         return loans
 
-    def get_price_by_name(self, pool_name: str):
-        quote = self.call(
+    @classmethod
+    async def get_changed_loan_addresses(
+        cls, start_height: int, page_size: int = 100
+    ) -> tuple:
+        """
+        Returns the addresses of loan owners with events on the loans contract
+        (e.g. OriginateLoan, LoanRepaid, CollateralReceived, Liquidate)
+        after the provided block height.
+
+        Args:
+            start_height (int): The last block height that was already processed.
+            page_size (int): The number of logs to request per page.
+
+        Returns:
+            A tuple of a list of ICX addresses, and the highest block height of
+            the processed events ('start_height' if there were none).
+        """
+        addresses = set()
+        block_height = start_height
+        for log in await cls._get_logs_after(start_height, page_size=page_size):
+            block_height = max(block_height, log.block_number)
+            for value in [*log.indexed, *(log.data or [])]:
+                if isinstance(value, str) and re.match(ICX_ADDRESS_REGEX, value):
+                    addresses.add(value)
+        return sorted(addresses), block_height
+
+    @classmethod
+    async def get_last_loans_event_height(cls) -> int:
+        """
+        Returns the block height of the latest loans contract event indexed by
+        the tracker, or 0 if there are none.
+        """
+        logs = await Tracker.get_logs(cls.BALANCED_LOANS_CONTRACT, limit=1)
+        return logs[0].block_number if len(logs) > 0 else 0
+
+    async def get_price_by_name(self, pool_name: str):
+        quote = await self.call(
             self.BALANCED_DEX_CONTRACT, "getPriceByName", {"_name": pool_name}
         )
         return quote
 
     @classmethod
-    def get_stability_fund(cls) -> list:
-        usds_balance = cls.get_irc2_token_balance(
+    async def get_stability_fund(cls) -> list:
+        usds_balance = await cls.get_irc2_token_balance(
             "cxbb2871f468a3008f80b08fdde5b8b951583acf06",
             "cxa09dbb60dcb62fffbd232b6eae132d730a2aafa6",
         )
-        iusdc_balance = cls.get_irc2_token_balance(
+        iusdc_balance = await cls.get_irc2_token_balance(
             "cxae3034235540b924dfcc1b45836c293dcc82bfb7",
             "cxa09dbb60dcb62fffbd232b6eae132d730a2aafa6",
         )
@@ -186,54 +341,116 @@ class Balanced(Icx):
         ]
 
     @classmethod
-    def get_loan_collateral(cls) -> Decimal:
+    async def get_loan_collateral(cls) -> Decimal:
         params = {"_owner": cls.BALANCED_LOANS_CONTRACT}
-        result = cls.call(cls.SICX_CONTRACT, "balanceOf", params)
+        result = await cls.call(cls.SICX_CONTRACT, "balanceOf", params)
         return Decimal(to_int(result)) / EXA
 
     @classmethod
-    def get_total_debt(cls) -> Decimal:
-        result = cls.call(cls.BNUSD_CONTRACT, "totalSupply")
+    async def get_total_debt(cls) -> Decimal:
+        result = await cls.call(cls.BNUSD_CONTRACT, "totalSupply")
         return Decimal(to_int(result)) / EXA
 
-    def _get_pool(self, pool_id: int, height: int = None) -> list:
-        try:
-            result = self.call(
-                self.BALANCED_DEX_CONTRACT,
-                "getPoolStats",
-                {"_id": pool_id},
-                height=height,
-            )
-            result["id"] = pool_id
-            base_dec = to_int(result["base_decimals"])
-            quote_dec = to_int(result["quote_decimals"])
-            base_name = Tokens.get_token_name(result["base_token"])
-            quote_name = Tokens.get_token_name(result["quote_token"])
-            base_symbol = Tokens.get_token_symbol(result["base_token"])
-            quote_symbol = Tokens.get_token_symbol(result["quote_token"])
-            precision = int((quote_dec - base_dec) + 18)
-            result["base_decimals"] = base_dec
-            result["quote_decimals"] = quote_dec
-            result["precision"] = precision
-            result["base"] = Decimal(to_int(result["base"])) / Decimal(10**base_dec)
-            result["quote"] = Decimal(to_int(result["quote"])) / Decimal(
-                10**quote_dec
-            )
-            result["base_name"] = base_name
-            result["quote_name"] = quote_name
-            result["base_symbol"] = base_symbol
-            result["quote_symbol"] = quote_symbol
-            result["pool_name"] = f"{base_symbol}/{quote_symbol}"
-            result["min_quote"] = Decimal(to_int(result["min_quote"])) / Decimal(
-                10**quote_dec
-            )
-            result["price"] = Decimal(to_int(result["price"])) / Decimal(
-                10**precision
+    @classmethod
+    async def _get_logs_after(
+        cls, start_height: int, method: str = None, page_size: int = 100
+    ) -> list:
+        logs = []
+        skip = 0
+        while True:
+            # Logs are returned newest first, so stop at the first processed block.
+            page = await Tracker.get_logs(
+                cls.BALANCED_LOANS_CONTRACT, method, limit=page_size, skip=skip
             )
-            result["total_supply"] = Decimal(to_int(result["total_supply"])) / Decimal(
-                10**quote_dec
+            new_logs = [log for log in page if log.block_number > start_height]
+            logs.extend(new_logs)
+            if len(new_logs) < page_size:
+                break
+            skip += page_size
+        return logs
+
+    @classmethod
+    async def _load_loan_addresses(cls) -> dict:
+        """
+        Returns the position index (loan index -> owner address), loading it from
+        the database once per process. An empty collection is seeded from the
+        bundled balanced-loans.json file.
+        """
+        if cls.LOAN_ADDRESSES is not None:
+            return cls.LOAN_ADDRESSES
+        async with cls._loan_addresses_lock:
+            if cls.LOAN_ADDRESSES is not None:
+                return cls.LOAN_ADDRESSES
+            positions = (
+                await Db_BalancedLoanPosition.get_motor_collection()
+                .find({}, projection={"address": 1})
+                .to_list(None)
             )
-            return result
-        except JSONRPCException as e:
-            if e.code == -30006:  # Pool doesn't exist at the specified block height.
-                return None
+            loan_addresses = {
+                position["_id"]: position["address"] for position in positions
+            }
+            if len(loan_addresses) == 0:
+                try:
+                    with open(cls.LOAN_ADDRESSES_SEED_FILE, "r") as f:
+                        seed = {int(k): v for k, v in json.load(f).items()}
+                except FileNotFoundError:
+                    seed = {}
+                await cls._write_loan_addresses(seed)
+                loan_addresses = seed
+            cls.LOAN_ADDRESSES = loan_addresses
+        return cls.LOAN_ADDRESSES
+
+    @classmethod
+    async def _save_loan_addresses(cls, loan_addresses: dict):
+        loan_addresses_index = await cls._load_loan_addresses()
+        new_loan_addresses = {
+            index: address
+            for index, address in loan_addresses.items()
+            if loan_addresses_index.get(index) != address
+        }
+        if len(new_loan_addresses) > 0:
+            await cls._write_loan_addresses(new_loan_addresses)
+            loan_addresses_index.update(new_loan_addresses)
+
+    @staticmethod
+    async def _write_loan_addresses(loan_addresses: dict):
+        if len(loan_addresses) == 0:
+            return
+        await Db_BalancedLoanPosition.get_motor_collection().bulk_write(
+            [
+                UpdateOne({"_id": index}, {"$set": {"address": address}}, upsert=True)
+                for index, address in loan_addresses.items()
+            ],
+            ordered=False,
+        )
+
+    async def _parse_pool(self, pool_id: int, result: dict) -> dict:
+        # Pool doesn't exist at the queried block height (-30006), or the call failed.
+        if not isinstance(result, dict):
+            return None
+        result["id"] = pool_id
+        base_dec = to_int(result["base_decimals"])
+        quote_dec = to_int(result["quote_decimals"])
+        base_name = await Tokens.get_token_name(result["base_token"])
+        quote_name = await Tokens.get_token_name(result["quote_token"])
+        base_symbol = await Tokens.get_token_symbol(result["base_token"])
+        quote_symbol = await Tokens.get_token_symbol(result["quote_token"])
+        precision = int((quote_dec - base_dec) + 18)
+        result["base_decimals"] = base_dec
+        result["quote_decimals"] = quote_dec
+        result["precision"] = precision
+        result["base"] = Decimal(to_int(result["base"])) / Decimal(10**base_dec)
+        result["quote"] = Decimal(to_int(result["quote"])) / Decimal(10**quote_dec)
+        result["base_name"] = base_name
+        result["quote_name"] = quote_name
+        result["base_symbol"] = base_symbol
+        result["quote_symbol"] = quote_symbol
+        result["pool_name"] = f"{base_symbol}/{quote_symbol}"
+        result["min_quote"] = Decimal(to_int(result["min_quote"])) / Decimal(
+            10**quote_dec
+        )
+        result["price"] = Decimal(to_int(result["price"])) / Decimal(10**precision)
+        result["total_supply"] = Decimal(to_int(result["total_supply"])) / Decimal(
+            10**quote_dec
+        )
+        return result
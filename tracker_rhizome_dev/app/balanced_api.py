@@ -1,6 +1,7 @@
 from decimal import Decimal
 
-from tracker_rhizome_dev import EXA
+from tracker_rhizome_dev import CACHE_60S, EXA
+from tracker_rhizome_dev.app.cache import single_flight
 from tracker_rhizome_dev.app.data.tokens import Tokens
 from tracker_rhizome_dev.app.http_request import HttpReq
 from tracker_rhizome_dev.app.utils import to_int
@@ -14,6 +15,7 @@ class BalancedApi:
         pass
 
     @classmethod
+    @single_flight(ttl=CACHE_60S)
     async def get_borrower_count(cls):
         r = await HttpReq.get(f"{cls.BALANCED_API_URL}/stats/num-borrowers")
         data = r.json()
@@ -21,6 +23,7 @@ class BalancedApi:
         return borrower_count
 
     @classmethod
+    @single_flight(ttl=CACHE_60S)
     async def get_daofund_balanced_sheet(cls):
         r = await HttpReq.get(
             f"{cls.BALANCED_API_URL}/stats/daofund-balance-sheet?timestamp=-1"
@@ -30,14 +33,15 @@ class BalancedApi:
         for contract, amount in data.items():
             balance_sheet.append(
                 {
-                    "symbol": Tokens.get_token_symbol(contract),
+                    "symbol": await Tokens.get_token_symbol(contract),
                     "amount": int(amount, 16)
-                    / 10 ** Tokens.get_token_decimals(contract),
+                    / 10 ** await Tokens.get_token_decimals(contract),
                 }
             )
         return balance_sheet
 
     @classmethod
+    @single_flight(ttl=CACHE_60S)
     async def get_24h_exchange_volume(cls):
         r = await HttpReq.get(f"{cls.BALANCED_API_URL}/stats/exchange-volume-24h")
         data = r.json()
@@ -47,12 +51,14 @@ class BalancedApi:
         return data
 
     @classmethod
+    @single_flight(ttl=CACHE_60S)
     async def get_total_transactions(cls):
         r = await HttpReq.get(f"{cls.BALANCED_API_URL}/stats/total-transactions")
         data = r.json()
         return data
 
     @classmethod
+    @single_flight(ttl=CACHE_60S)
     async def get_total_value_locked(cls):
         r = await HttpReq.get(f"{cls.BALANCED_API_URL}/stats/total-value-locked")
         data = r.json()
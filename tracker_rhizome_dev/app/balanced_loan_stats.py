@@ -0,0 +1,137 @@
+from datetime import datetime
+from decimal import Decimal
+
+import numpy
+
+from tracker_rhizome_dev.app.balanced import Balanced
+from tracker_rhizome_dev.app.models.balanced import (
+    BalancedLoanRatioBucket,
+    Db_BalancedLoan,
+    Db_BalancedLoanStats,
+)
+
+
+class BalancedLoanStats:
+    """
+    Aggregate statistics for Balanced loans, materialized in the
+    'balancedLoanStats' collection.
+
+    The statistics are recomputed with one aggregation pipeline whenever loans
+    are ingested, so the loans overview only reads a single document.
+    """
+
+    ID = "latest"
+
+    PERCENTILES = [10, 25, 50, 75, 90]
+
+    # Lower bounds of the collateral ratio histogram buckets. Ratios at or above
+    # the last bound are counted in an open-ended bucket.
+    RATIO_BUCKET_BOUNDARIES = [0, 1.5, 2, 2.5, 3, 4, 5, 10]
+
+    def __init__(self) -> None:
+        pass
+
+    @classmethod
+    async def get(cls) -> Db_BalancedLoanStats:
+        """
+        Returns the latest loan statistics, computing them if they don't exist yet.
+        """
+        stats = await Db_BalancedLoanStats.get(cls.ID)
+        if stats is None:
+            stats = await cls.update(await Balanced().get_last_block())
+        return stats
+
+    @classmethod
+    async def update(cls, block_height: int) -> Db_BalancedLoanStats:
+        """
+        Recomputes loan statistics from the 'balancedLoans' collection.
+
+        Args:
+            block_height (int): The block height the loans were refreshed at.
+
+        Returns:
+            The saved statistics document.
+        """
+        has_debt = {"$match": {"ratio": {"$gt": 0}}}
+        pipeline = [
+            {
+                "$facet": {
+                    "summary": [
+                        {
+                            "$group": {
+                                "_id": None,
+                                "loan_count": {"$sum": 1},
+                                "total_debt": {"$sum": "$total_debt"},
+                            }
+                        }
+                    ],
+                    "histogram": [
+                        has_debt,
+                        {
+                            "$bucket": {
+                                "groupBy": "$ratio",
+                                "boundaries": cls.RATIO_BUCKET_BOUNDARIES,
+                                "default": "other",
+                                "output": {"count": {"$sum": 1}},
+                            }
+                        },
+                    ],
+                    # Ratio statistics only cover loans with debt.
+                    "ratios": [
+                        has_debt,
+                        {
+                            "$group": {
+                                "_id": None,
+                                "ratios": {"$push": "$ratio"},
+                                "mean_ratio": {"$avg": "$ratio"},
+                                "max_ratio": {"$max": "$ratio"},
+                            }
+                        },
+                    ],
+                }
+            }
+        ]
+        collection = Db_BalancedLoan.get_motor_collection()
+        result = await collection.aggregate(pipeline).to_list(None)
+
+        summary = next(iter(result[0]["summary"]), {})
+        buckets = {bucket["_id"]: bucket["count"] for bucket in result[0]["histogram"]}
+        ratio_summary = next(iter(result[0]["ratios"]), {})
+        ratios = ratio_summary.get("ratios", [])
+
+        ratios = numpy.array([float(str(ratio)) for ratio in ratios], dtype=float)
+        if ratios.size > 0:
+            percentiles = numpy.percentile(ratios, cls.PERCENTILES)
+        else:
+            percentiles = numpy.zeros(len(cls.PERCENTILES))
+
+        # $bucket keys buckets by their lower bound, and the last bucket by 'default'.
+        lower_bounds = cls.RATIO_BUCKET_BOUNDARIES
+        upper_bounds = [*cls.RATIO_BUCKET_BOUNDARIES[1:], None]
+        ratio_histogram = [
+            BalancedLoanRatioBucket(
+                min_ratio=min_ratio,
+                max_ratio=max_ratio,
+                count=buckets.get(min_ratio if max_ratio is not None else "other", 0),
+            )
+            for min_ratio, max_ratio in zip(lower_bounds, upper_bounds)
+        ]
+
+        stats = Db_BalancedLoanStats(
+            id=cls.ID,
+            block_height=block_height,
+            updated_at=datetime.utcnow(),
+            loan_count=summary.get("loan_count", 0),
+            active_loan_count=int(ratios.size),
+            total_collateral=await Balanced.get_loan_collateral(),
+            total_debt=summary.get("total_debt") or 0,
+            mean_ratio=ratio_summary.get("mean_ratio") or 0,
+            max_ratio=ratio_summary.get("max_ratio") or 0,
+            ratio_percentiles={
+                f"p{percentile}": Decimal(str(round(value, 6)))
+                for percentile, value in zip(cls.PERCENTILES, percentiles)
+            },
+            ratio_histogram=ratio_histogram,
+        )
+        await stats.save()
+        return stats
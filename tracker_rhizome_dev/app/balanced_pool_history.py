@@ -0,0 +1,224 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import numpy
+from beanie.exceptions import CollectionWasNotInitialized
+from pymongo.errors import PyMongoError
+from rich import inspect
+
+from tracker_rhizome_dev import (
+    BALANCED_POOL_BACKFILL_ANCHOR_INTERVAL,
+    BALANCED_POOL_BACKFILL_CONCURRENCY,
+)
+from tracker_rhizome_dev.app.balanced import Balanced
+from tracker_rhizome_dev.app.block_index import BlockIndex
+from tracker_rhizome_dev.app.models.balanced import (
+    Db_BalancedPoolDynamicData,
+    Db_BalancedPoolHistory,
+)
+from tracker_rhizome_dev.app.tracker import Tracker
+
+
+class BalancedPoolHistory:
+    """
+    Writes Balanced pool snapshots to the 'balancedPoolHistory' time series
+    collection, one measurement per pool, and backfills past snapshots.
+
+    Backfills are resumable: a snapshot is only written once every pool was
+    fetched, and snapshots already in the collection are skipped.
+    """
+
+    def __init__(self) -> None:
+        pass
+
+    @classmethod
+    async def take_snapshot(cls, timestamp: datetime, height: int) -> int:
+        """
+        Fetches every pool at the provided block height and writes the snapshot.
+
+        Args:
+            timestamp (datetime): The snapshot time, truncated to the minute.
+            height (int): The block height to query.
+
+        Returns:
+            The number of measurements written.
+
+        Raises:
+            LookupError: If any pool couldn't be fetched, so that no partial
+                snapshot is written.
+        """
+        balanced = Balanced()
+        pool_count = await balanced.get_pool_count(height=height)
+        pool_ids = list(range(1, pool_count + 1))
+        pools = await balanced.get_pools_by_id(
+            pool_ids, height=height, daily_change=False
+        )
+        missing_pool_ids = [
+            pool_id for pool_id, pool in zip(pool_ids, pools) if pool is None
+        ]
+        if len(missing_pool_ids) > 0:
+            raise LookupError(
+                f"Balanced pools {missing_pool_ids} could not be fetched "
+                f"at block {height}."
+            )
+        dynamic_data = [Db_BalancedPoolDynamicData(**pool) for pool in pools]
+        history = [
+            Db_BalancedPoolHistory(
+                timestamp=timestamp,
+                pool_id=pool.id,
+                block_height=height,
+                base=pool.base,
+                price=pool.price,
+                quote=pool.quote,
+                total_supply=pool.total_supply,
+            )
+            for pool in dynamic_data
+        ]
+        if len(history) > 0:
+            await Db_BalancedPoolHistory.insert_many(history)
+        return len(history)
+
+    @classmethod
+    async def get_snapshot_times(cls, start: datetime, end: datetime) -> set:
+        """
+        Returns the times of snapshots in the collection between 'start' and 'end'.
+        """
+        results = (
+            await Db_BalancedPoolHistory.get_motor_collection()
+            .aggregate(
+                [
+                    {"$match": {"timestamp": {"$gte": start, "$lte": end}}},
+                    {"$group": {"_id": "$timestamp"}},
+                ]
+            )
+            .to_list(None)
+        )
+        return {result["_id"] for result in results}
+
+    @classmethod
+    async def backfill(
+        cls,
+        start: datetime,
+        end: datetime,
+        interval: timedelta,
+        concurrency: int = BALANCED_POOL_BACKFILL_CONCURRENCY,
+    ) -> dict:
+        """
+        Writes a snapshot every 'interval' between 'start' and 'end', skipping
+        snapshots that already exist.
+
+        Args:
+            start (datetime): The first snapshot time (UTC).
+            end (datetime): The last snapshot time (UTC), capped at the current time.
+            interval (timedelta): The time between snapshots.
+            concurrency (int): The maximum number of snapshots fetched at once.
+
+        Returns:
+            A dictionary with the number of written, skipped and failed snapshots.
+            Snapshots before the first pool existed count as skipped.
+        """
+        end = min(end, datetime.utcnow())
+        times = []
+        time = start.replace(second=0, microsecond=0)
+        while time <= end:
+            times.append(time)
+            time += interval
+        if len(times) == 0:
+            return {"written_count": 0, "skipped_count": 0, "failed_count": 0}
+
+        existing_times = await cls.get_snapshot_times(times[0], times[-1])
+        pending_times = [time for time in times if time not in existing_times]
+        heights = await cls._resolve_heights(pending_times, concurrency)
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def backfill_snapshot(time: datetime, height: int) -> int:
+            async with semaphore:
+                return await cls.take_snapshot(time, height)
+
+        # Work through snapshots in chunks to report progress. A crash loses
+        # nothing, because the next run skips the snapshots that were written.
+        snapshots = list(zip(pending_times, heights))
+        chunk_size = concurrency * 4
+        written_count = 0
+        empty_count = 0
+        failed_count = 0
+        for i in range(0, len(snapshots), chunk_size):
+            chunk = snapshots[i : i + chunk_size]
+            results = await asyncio.gather(
+                *[backfill_snapshot(time, height) for time, height in chunk],
+                return_exceptions=True,
+            )
+            for result in results:
+                if isinstance(result, Exception):
+                    # Failed snapshots are missing from the collection, so the
+                    # next run retries them.
+                    inspect(result)
+                    failed_count += 1
+                elif result == 0:
+                    # No pools existed at that height yet.
+                    empty_count += 1
+                else:
+                    written_count += 1
+            print(
+                f"Backfilled {i + len(chunk)}/{len(snapshots)} Balanced pool snapshots..."
+            )
+
+        return {
+            "written_count": written_count,
+            "skipped_count": len(times) - len(pending_times) + empty_count,
+            "failed_count": failed_count,
+        }
+
+    ###########
+    # Helpers #
+    ###########
+
+    @classmethod
+    async def _resolve_heights(cls, times: list, concurrency: int) -> list:
+        """
+        Returns the block height at each of the provided times.
+
+        Heights come from the block index when it spans the times. Otherwise,
+        or if the index can't be loaded, only anchor heights (every BALANCED_POOL_BACKFILL_ANCHOR_INTERVAL seconds)
+        are looked up on the tracker, and heights in between are interpolated.
+        Block times are steady, so interpolated heights are within a few blocks
+        of the exact ones.
+        """
+        if len(times) == 0:
+            return []
+        timestamps = numpy.array(
+            [time.replace(tzinfo=timezone.utc).timestamp() for time in times],
+            dtype=numpy.int64,
+        )
+
+        try:
+            await BlockIndex.load()
+        except (CollectionWasNotInitialized, PyMongoError) as e:
+            inspect(e)
+        else:
+            if BlockIndex.covers(timestamps[0] * 1000000, timestamps[-1] * 1000000):
+                return BlockIndex.get_heights(timestamps * 1000000).tolist()
+
+        anchor_timestamps = numpy.unique(
+            numpy.append(
+                numpy.arange(
+                    timestamps[0],
+                    timestamps[-1],
+                    BALANCED_POOL_BACKFILL_ANCHOR_INTERVAL,
+                ),
+                timestamps[-1],
+            )
+        )
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def get_block_from_timestamp(timestamp: int) -> int:
+            async with semaphore:
+                return await Tracker.get_block_from_timestamp(int(timestamp))
+
+        anchor_heights = await asyncio.gather(
+            *[get_block_from_timestamp(timestamp) for timestamp in anchor_timestamps]
+        )
+        heights = numpy.interp(timestamps, anchor_timestamps, anchor_heights)
+        return [int(height) for height in numpy.rint(heights)]
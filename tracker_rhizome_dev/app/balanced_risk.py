@@ -0,0 +1,202 @@
+import asyncio
+import time
+from decimal import Decimal
+
+import numpy
+from bson.decimal128 import Decimal128
+
+from tracker_rhizome_dev import BALANCED_RISK_RELOAD_INTERVAL, EXA
+from tracker_rhizome_dev.app.balanced import Balanced
+from tracker_rhizome_dev.app.models.balanced import Db_BalancedLoan
+from tracker_rhizome_dev.app.utils import to_int
+
+
+class BalancedRisk:
+    """
+    Liquidation risk engine for Balanced loans.
+
+    Every position's sICX collateral and bnUSD debt are held in NumPy arrays,
+    loaded from the 'balancedLoans' collection and reloaded at most every
+    BALANCED_RISK_RELOAD_INTERVAL seconds. Ratios, standings and distances to
+    liquidation are recomputed for all positions in one vectorized pass
+    whenever the sICX/bnUSD price changes.
+    """
+
+    # Collateral ratios (collateral value / debt) at which positions are
+    # liquidated or locked.
+    LIQUIDATION_RATIO = 1.5
+    LOCKING_RATIO = 3.0
+
+    STANDINGS = numpy.array(["No Debt", "Liquidate", "Locked", "Healthy"])
+
+    IDS = numpy.empty(0, dtype=numpy.int64)
+    ADDRESSES = numpy.empty(0, dtype=object)
+    COLLATERAL = numpy.empty(0, dtype=numpy.float64)
+    DEBT = numpy.empty(0, dtype=numpy.float64)
+    LOADED_AT: float = None
+
+    # Result of the last computation, keyed by price.
+    _price: float = None
+    _risk: dict = None
+
+    _lock = asyncio.Lock()
+
+    def __init__(self) -> None:
+        pass
+
+    @classmethod
+    async def load(cls, force: bool = False):
+        """
+        Loads every position from the database into the position arrays.
+        """
+        async with cls._lock:
+            if (
+                force is False
+                and cls.LOADED_AT is not None
+                and time.monotonic() - cls.LOADED_AT < BALANCED_RISK_RELOAD_INTERVAL
+            ):
+                return
+            # Project only the holdings to keep the read small for thousands of loans.
+            positions = (
+                await Db_BalancedLoan.get_motor_collection()
+                .find(
+                    {},
+                    projection={
+                        "address": 1,
+                        "holdings.sICX.sICX": 1,
+                        "holdings.sICX.bnUSD": 1,
+                    },
+                )
+                .to_list(None)
+            )
+            holdings = [
+                position.get("holdings", {}).get("sICX", {}) for position in positions
+            ]
+            cls.IDS = numpy.fromiter(
+                (position["_id"] for position in positions),
+                dtype=numpy.int64,
+                count=len(positions),
+            )
+            cls.ADDRESSES = numpy.array(
+                [position["address"] for position in positions], dtype=object
+            )
+            cls.COLLATERAL = numpy.fromiter(
+                (cls._to_float(holding.get("sICX")) for holding in holdings),
+                dtype=numpy.float64,
+                count=len(positions),
+            )
+            cls.DEBT = numpy.fromiter(
+                (cls._to_float(holding.get("bnUSD")) for holding in holdings),
+                dtype=numpy.float64,
+                count=len(positions),
+            )
+            cls.LOADED_AT = time.monotonic()
+            cls._price = None
+
+    @classmethod
+    async def get_sicx_bnusd_price(cls) -> float:
+        price = await Balanced().get_price_by_name("sICX/bnUSD")
+        return to_int(price) / EXA
+
+    @classmethod
+    def compute(cls, price: float) -> dict:
+        """
+        Recomputes risk metrics for every loaded position at the provided price.
+
+        Args:
+            price (float): The price of sICX in bnUSD.
+
+        Returns:
+            A dictionary of arrays aligned with the position arrays:
+            'ratio', 'standing', 'liquidation_price' (the sICX price at which the
+            position is liquidated), and 'distance_to_liquidation' (the fractional
+            sICX price drop that would trigger liquidation).
+        """
+        if cls._risk is not None and cls._price == price:
+            return cls._risk
+
+        has_debt = cls.DEBT > 0
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            ratio = numpy.where(has_debt, cls.COLLATERAL * price / cls.DEBT, numpy.inf)
+            liquidation_price = numpy.where(
+                has_debt, cls.LIQUIDATION_RATIO * cls.DEBT / cls.COLLATERAL, 0.0
+            )
+        distance_to_liquidation = numpy.where(
+            has_debt, 1 - liquidation_price / price, 1.0
+        )
+        standing = cls.STANDINGS[
+            numpy.select(
+                [
+                    ~has_debt,
+                    ratio < cls.LIQUIDATION_RATIO,
+                    ratio < cls.LOCKING_RATIO,
+                ],
+                [0, 1, 2],
+                default=3,
+            )
+        ]
+
+        cls._price = price
+        cls._risk = {
+            "ratio": ratio,
+            "standing": standing,
+            "liquidation_price": liquidation_price,
+            "distance_to_liquidation": distance_to_liquidation,
+        }
+        return cls._risk
+
+    @classmethod
+    async def get_positions_at_risk(
+        cls, max_ratio: float = LOCKING_RATIO, limit: int = 50
+    ) -> dict:
+        """
+        Returns positions with debt whose collateral ratio is below 'max_ratio',
+        riskiest first.
+
+        Args:
+            max_ratio (float): Only include positions below this collateral ratio.
+            limit (int): The maximum number of positions to return.
+
+        Returns:
+            A dictionary with the sICX/bnUSD price, the number of matching
+            positions and their debt, and the riskiest positions.
+        """
+        await cls.load()
+        price = await cls.get_sicx_bnusd_price()
+        risk = cls.compute(price)
+
+        at_risk = numpy.flatnonzero((cls.DEBT > 0) & (risk["ratio"] < max_ratio))
+        order = at_risk[numpy.argsort(risk["ratio"][at_risk], kind="stable")][:limit]
+
+        return {
+            "price": price,
+            "count": int(at_risk.size),
+            "total_debt": float(cls.DEBT[at_risk].sum()),
+            "total_collateral": float(cls.COLLATERAL[at_risk].sum()),
+            "positions": [
+                {
+                    "id": int(cls.IDS[i]),
+                    "address": cls.ADDRESSES[i],
+                    "collateral": float(cls.COLLATERAL[i]),
+                    "debt": float(cls.DEBT[i]),
+                    "ratio": float(risk["ratio"][i]),
+                    "standing": str(risk["standing"][i]),
+                    "liquidation_price": float(risk["liquidation_price"][i]),
+                    "distance_to_liquidation": float(
+                        risk["distance_to_liquidation"][i]
+                    ),
+                }
+                for i in order
+            ],
+        }
+
+    @staticmethod
+    def _to_float(value) -> float:
+        # Amounts are stored as Decimal128 by Beanie, but older documents hold strings.
+        if value is None:
+            return 0.0
+        if isinstance(value, Decimal128):
+            return float(value.to_decimal())
+        if isinstance(value, str) and value.startswith("0x"):
+            return to_int(value) / EXA
+        return float(Decimal(value))
@@ -0,0 +1,251 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+
+import numpy
+from pymongo import UpdateOne
+
+from tracker_rhizome_dev import (
+    BLOCK_INDEX_RELOAD_INTERVAL,
+    BLOCK_INDEX_SAMPLE_INTERVAL,
+    BLOCK_INDEX_SYNC_BATCH,
+)
+from tracker_rhizome_dev.app.chain_head import ChainHead
+from tracker_rhizome_dev.app.icon_rpc import IconRpc, JsonRpcError
+from tracker_rhizome_dev.app.models.icx import Db_IcxBlock
+
+
+class BlockIndex:
+    """
+    Converts between block heights and timestamps without the ICON tracker.
+
+    The timestamp of every BLOCK_INDEX_SAMPLE_INTERVAL-th block is stored in the
+    'icxBlocks' collection and held in memory as two sorted NumPy arrays, with
+    the pinned chain head as the last sample. Conversions binary search the
+    samples and interpolate between the two around the target. Exact lookups
+    then probe blocks over RPC, narrowing the bracket in a few calls.
+
+    All timestamps are Unix timestamps in microseconds, like block timestamps.
+    """
+
+    HEIGHTS = numpy.empty(0, dtype=numpy.int64)
+    TIMESTAMPS = numpy.empty(0, dtype=numpy.int64)
+    LOADED_AT: float = None
+
+    _lock = asyncio.Lock()
+
+    def __init__(self) -> None:
+        pass
+
+    @classmethod
+    async def load(cls, force: bool = False):
+        """
+        Loads the sampled blocks from the database.
+        """
+        async with cls._lock:
+            if (
+                force is False
+                and cls.LOADED_AT is not None
+                and time.monotonic() - cls.LOADED_AT < BLOCK_INDEX_RELOAD_INTERVAL
+            ):
+                return
+            blocks = (
+                await Db_IcxBlock.get_motor_collection()
+                .find({}, sort=[("_id", 1)])
+                .to_list(None)
+            )
+            cls.HEIGHTS = numpy.fromiter(
+                (block["_id"] for block in blocks), dtype=numpy.int64, count=len(blocks)
+            )
+            cls.TIMESTAMPS = numpy.fromiter(
+                (cls._to_timestamp(block["timestamp"]) for block in blocks),
+                dtype=numpy.int64,
+                count=len(blocks),
+            )
+            cls.LOADED_AT = time.monotonic()
+
+    @classmethod
+    async def sync(cls, max_samples: int = BLOCK_INDEX_SYNC_BATCH) -> int:
+        """
+        Samples blocks from the last sampled block up to the chain head,
+        at most 'max_samples' blocks per call.
+
+        Returns:
+            The number of blocks sampled.
+        """
+        await cls.load()
+        head_height = await ChainHead.get_height()
+        if cls.HEIGHTS.size > 0:
+            start_height = int(cls.HEIGHTS[-1]) + BLOCK_INDEX_SAMPLE_INTERVAL
+        else:
+            start_height = 0
+        heights = list(
+            range(start_height, head_height + 1, BLOCK_INDEX_SAMPLE_INTERVAL)
+        )[:max_samples]
+        if len(heights) == 0:
+            return 0
+
+        results = await IconRpc.batch(
+            [("icx_getBlockByHeight", {"height": hex(h)}) for h in heights]
+        )
+        samples = []
+        for height, block in zip(heights, results):
+            # Stop at the first missing block so the samples stay evenly spaced.
+            if isinstance(block, JsonRpcError):
+                break
+            samples.append((height, block["time_stamp"]))
+        if len(samples) == 0:
+            return 0
+
+        await Db_IcxBlock.get_motor_collection().bulk_write(
+            [
+                UpdateOne(
+                    {"_id": height},
+                    {"$set": {"timestamp": cls._to_datetime(timestamp)}},
+                    upsert=True,
+                )
+                for height, timestamp in samples
+            ],
+            ordered=False,
+        )
+        async with cls._lock:
+            cls.HEIGHTS = numpy.append(cls.HEIGHTS, [h for h, _ in samples])
+            cls.TIMESTAMPS = numpy.append(cls.TIMESTAMPS, [t for _, t in samples])
+        return len(samples)
+
+    @classmethod
+    async def get_height(cls, timestamp: int, exact: bool = True) -> int:
+        """
+        Returns the height of the last block at or before the provided timestamp.
+
+        Args:
+            timestamp (int): Unix timestamp in microseconds.
+            exact (bool): Whether to probe blocks over RPC for the exact height,
+                instead of returning the interpolated estimate.
+
+        Returns:
+            A block height.
+        """
+        heights, timestamps = await cls._get_samples()
+        i = int(numpy.searchsorted(timestamps, timestamp, side="right"))
+        if i == 0:
+            return int(heights[0])
+        if i == len(timestamps):
+            return int(heights[-1])
+
+        low_height, low_timestamp = int(heights[i - 1]), int(timestamps[i - 1])
+        high_height, high_timestamp = int(heights[i]), int(timestamps[i])
+        if exact is False:
+            return cls._interpolate(
+                timestamp, low_timestamp, high_timestamp, low_height, high_height
+            )
+
+        # Interpolation search over the bracket. Fall back to bisection when a
+        # probe barely narrows the bracket (e.g. around a stalled block).
+        bisect = False
+        while high_height - low_height > 1:
+            if bisect is True:
+                height = (low_height + high_height) // 2
+            else:
+                height = cls._interpolate(
+                    timestamp, low_timestamp, high_timestamp, low_height, high_height
+                )
+            height = min(max(height, low_height + 1), high_height - 1)
+            block_timestamp = await cls._get_block_timestamp(height)
+            bracket = high_height - low_height
+            if block_timestamp <= timestamp:
+                low_height, low_timestamp = height, block_timestamp
+            else:
+                high_height, high_timestamp = height, block_timestamp
+            bisect = high_height - low_height > bracket // 2
+        return low_height
+
+    @classmethod
+    def get_heights(cls, timestamps: numpy.ndarray) -> numpy.ndarray:
+        """
+        Returns interpolated block heights for many timestamps at once, using the
+        samples already in memory. Timestamps beyond the samples are clamped.
+        """
+        heights, sample_timestamps = cls._get_loaded_samples()
+        return numpy.floor(numpy.interp(timestamps, sample_timestamps, heights)).astype(
+            numpy.int64
+        )
+
+    @classmethod
+    async def get_timestamp(cls, height: int, exact: bool = True) -> int:
+        """
+        Returns the timestamp of the provided block height.
+
+        Args:
+            height (int): A block height.
+            exact (bool): Whether to fetch the block over RPC, instead of
+                returning the interpolated estimate.
+
+        Returns:
+            Unix timestamp in microseconds.
+        """
+        if exact is True:
+            return await cls._get_block_timestamp(height)
+        heights, timestamps = await cls._get_samples()
+        return int(numpy.interp(height, heights, timestamps))
+
+    @classmethod
+    def covers(cls, start: int, end: int) -> bool:
+        """
+        Returns 'True' if the samples in memory span the provided timestamps.
+        """
+        heights, timestamps = cls._get_loaded_samples()
+        return timestamps.size > 1 and timestamps[0] <= start and end <= timestamps[-1]
+
+    ###########
+    # Helpers #
+    ###########
+
+    @classmethod
+    async def _get_samples(cls) -> tuple:
+        await cls.load()
+        heights, timestamps = cls._get_loaded_samples()
+        if heights.size == 0:
+            raise LookupError("The block index is empty.")
+        return heights, timestamps
+
+    @classmethod
+    def _get_loaded_samples(cls) -> tuple:
+        # Use the chain head as the newest sample so recent timestamps are bracketed.
+        if (
+            ChainHead.HEIGHT is not None
+            and ChainHead.TIMESTAMP is not None
+            and (cls.HEIGHTS.size == 0 or ChainHead.HEIGHT > cls.HEIGHTS[-1])
+        ):
+            return (
+                numpy.append(cls.HEIGHTS, ChainHead.HEIGHT),
+                numpy.append(cls.TIMESTAMPS, ChainHead.TIMESTAMP),
+            )
+        return cls.HEIGHTS, cls.TIMESTAMPS
+
+    @classmethod
+    async def _get_block_timestamp(cls, height: int) -> int:
+        block = await IconRpc.get_block_by_height(height)
+        return block["time_stamp"]
+
+    @staticmethod
+    def _interpolate(
+        timestamp: int,
+        low_timestamp: int,
+        high_timestamp: int,
+        low_height: int,
+        high_height: int,
+    ) -> int:
+        if high_timestamp == low_timestamp:
+            return low_height
+        return low_height + (timestamp - low_timestamp) * (
+            high_height - low_height
+        ) // (high_timestamp - low_timestamp)
+
+    @staticmethod
+    def _to_datetime(timestamp: int) -> datetime:
+        return datetime.utcfromtimestamp(timestamp / 1000000)
+
+    @staticmethod
+    def _to_timestamp(dt: datetime) -> int:
+        return int(dt.replace(tzinfo=timezone.utc).timestamp() * 1000000)
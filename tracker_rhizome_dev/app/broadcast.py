@@ -0,0 +1,43 @@
+import asyncio
+
+from tracker_rhizome_dev import BROADCAST_QUEUE_SIZE
+
+
+class Broadcaster:
+    """
+    Fans out events from one producer to any number of in-process subscribers.
+
+    Each subscriber gets its own bounded queue. A subscriber that falls behind
+    loses its oldest events instead of slowing down the producer or the other
+    subscribers. The last event of each name is replayed to new subscribers,
+    so they render a complete page without waiting for the next update.
+    """
+
+    def __init__(self) -> None:
+        self.subscribers = set()
+        self.last_events = {}
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self.subscribers)
+
+    def publish(self, event: str, data: str):
+        self.last_events[event] = data
+        for queue in self.subscribers:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait((event, data))
+
+    def subscribe(self) -> asyncio.Queue:
+        """
+        Returns a new queue that receives (event, data) tuples.
+        Callers must pass it to 'unsubscribe' when they are done.
+        """
+        queue = asyncio.Queue(maxsize=max(BROADCAST_QUEUE_SIZE, len(self.last_events)))
+        for event, data in self.last_events.items():
+            queue.put_nowait((event, data))
+        self.subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self.subscribers.discard(queue)
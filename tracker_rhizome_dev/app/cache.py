@@ -0,0 +1,331 @@
+import asyncio
+import functools
+import hashlib
+import inspect
+import pickle
+import time
+from typing import Callable, MutableMapping, NamedTuple
+
+import redis.asyncio
+from cachetools import TTLCache
+from cachetools.keys import hashkey
+from fastapi import Request, Response
+
+from tracker_rhizome_dev import (
+    ENV,
+    MICRO_CACHE_TTL,
+    SHARED_CACHE_LOCK_TTL,
+    SHARED_CACHE_POLL_INTERVAL,
+    SHARED_CACHE_PREFIX,
+)
+from tracker_rhizome_dev.app.chain_head import ChainHead
+
+
+def async_cached(cache: MutableMapping, key: Callable = hashkey):
+    """
+    Decorator that memoizes the result of a coroutine function in a cachetools cache.
+
+    cachetools' own @cached would store the coroutine object instead of its result,
+    so async methods use this decorator instead.
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            k = key(*args, **kwargs)
+            try:
+                return cache[k]
+            except KeyError:
+                pass
+            result = await func(*args, **kwargs)
+            try:
+                cache[k] = result
+            except ValueError:  # Value too large for the cache.
+                pass
+            return result
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
+
+
+def single_flight(
+    ttl: float = MICRO_CACHE_TTL, maxsize: int = 256, key: Callable = hashkey
+):
+    """
+    Decorator that coalesces concurrent identical calls of a coroutine function.
+
+    While a call is in flight, identical calls await the same future instead of
+    issuing their own upstream request, and the result is then kept in a short
+    micro-cache. This caps upstream requests at one per key per 'ttl' seconds.
+    Exceptions are shared with the waiting callers but never cached.
+
+    Results are shared between callers, so they must not be mutated.
+    """
+    cache = TTLCache(maxsize=maxsize, ttl=ttl)
+    in_flight = {}
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            k = key(*args, **kwargs)
+            try:
+                return cache[k]
+            except KeyError:
+                pass
+            future = in_flight.get(k)
+            if future is None:
+                future = asyncio.ensure_future(func(*args, **kwargs))
+                in_flight[k] = future
+
+                def _done(future):
+                    in_flight.pop(k, None)
+                    if not future.cancelled() and future.exception() is None:
+                        cache[k] = future.result()
+
+                future.add_done_callback(_done)
+            return await asyncio.shield(future)
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
+
+
+def block_version(interval: int = 1) -> Callable:
+    """
+    Returns a data-version function for fragment_cache that changes every
+    'interval' blocks, based on the height pinned by ChainHead.
+    """
+
+    def version():
+        height = ChainHead.get_pinned_height()
+        return None if height is None else height // interval
+
+    return version
+
+
+def fragment_cache(ttl: int, version: Callable = None, maxsize: int = 1024):
+    """
+    Decorator that caches the rendered HTML of a component route.
+
+    Responses are keyed by route path, query parameters and a data-version token
+    (e.g. the block height), and are served with an ETag so unchanged fragments
+    can be answered with 304 Not Modified. Concurrent requests for the same key
+    share a single render.
+
+    Args:
+        ttl (int): Seconds to keep a rendered fragment.
+        version (Callable): Returns the current data-version token. May be async.
+        maxsize (int): The maximum number of fragments to keep for this route.
+    """
+    cache = TTLCache(maxsize=maxsize, ttl=ttl)
+    renders = {}
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            request = kwargs.get("request", args[0] if len(args) > 0 else None)
+            # Render directly when called outside of a request (e.g. by LiveUpdates).
+            if not isinstance(request, Request):
+                return await func(*args, **kwargs)
+
+            version_token = version() if version is not None else None
+            if inspect.isawaitable(version_token):
+                version_token = await version_token
+            key = (
+                request.url.path,
+                tuple(sorted(request.query_params.multi_items())),
+                version_token,
+            )
+
+            fragment = cache.get(key)
+            if fragment is None:
+                render = renders.get(key)
+                if render is None:
+                    render = asyncio.ensure_future(_render(func, args, kwargs))
+                    renders[key] = render
+                    render.add_done_callback(lambda _: renders.pop(key, None))
+                    fragment = await asyncio.shield(render)
+                    if fragment.status_code == 200:
+                        cache[key] = fragment
+                else:
+                    fragment = await asyncio.shield(render)
+
+            if fragment.etag in request.headers.get("if-none-match", ""):
+                return Response(status_code=304, headers={"ETag": fragment.etag})
+            return Response(
+                content=fragment.body,
+                status_code=fragment.status_code,
+                media_type=fragment.media_type,
+                headers={"ETag": fragment.etag, "Cache-Control": "no-cache"},
+            )
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
+
+
+class _Fragment(NamedTuple):
+    body: bytes
+    status_code: int
+    media_type: str
+    etag: str
+
+
+async def _render(func, args, kwargs) -> _Fragment:
+    response = await func(*args, **kwargs)
+    etag = f'W/"{hashlib.sha1(response.body).hexdigest()[:16]}"'
+    return _Fragment(response.body, response.status_code, response.media_type, etag)
+
+
+##################
+# Shared caching #
+##################
+
+
+class MemoryBackend:
+    """
+    In-process stand-in for Redis, used when REDIS_URL isn't set and in tests.
+    """
+
+    def __init__(self) -> None:
+        self.values = {}
+
+    async def get(self, key: str) -> bytes:
+        value, expires_at = self.values.get(key, (None, 0))
+        if expires_at <= time.monotonic():
+            self.values.pop(key, None)
+            return None
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        self.values[key] = (value, time.monotonic() + ttl)
+
+    async def add(self, key: str, value: bytes, ttl: float) -> bool:
+        if await self.get(key) is not None:
+            return False
+        await self.set(key, value, ttl)
+        return True
+
+    async def delete(self, key: str):
+        self.values.pop(key, None)
+
+    async def close(self):
+        self.values = {}
+
+
+class RedisBackend:
+    def __init__(self, url: str) -> None:
+        self.redis = redis.asyncio.from_url(url)
+
+    async def get(self, key: str) -> bytes:
+        return await self.redis.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        await self.redis.set(key, value, px=int(ttl * 1000))
+
+    async def add(self, key: str, value: bytes, ttl: float) -> bool:
+        return bool(await self.redis.set(key, value, px=int(ttl * 1000), nx=True))
+
+    async def delete(self, key: str):
+        await self.redis.delete(key)
+
+    async def close(self):
+        await self.redis.close()
+
+
+class SharedCache:
+    """
+    Second cache tier shared by every worker process.
+
+    Uses Redis when REDIS_URL is set, and an in-process stand-in otherwise.
+    """
+
+    BACKEND = (
+        RedisBackend(ENV["REDIS_URL"])
+        if ENV["REDIS_URL"] is not None
+        else MemoryBackend()
+    )
+
+    def __init__(self) -> None:
+        pass
+
+    @classmethod
+    async def close(cls):
+        await cls.BACKEND.close()
+
+
+def shared_cached(
+    namespace: str, ttl: float, maxsize: int = 256, key: Callable = hashkey
+):
+    """
+    Decorator that caches the result of a coroutine function in two tiers:
+    an in-process TTLCache (L1) and the SharedCache backend (L2).
+
+    On a miss in both tiers, one worker takes a short lock in L2 and computes
+    the value, while the other workers poll L2 for it instead of also calling
+    upstream. Within a worker, concurrent misses share one in-flight call.
+
+    Args:
+        namespace (str): Prefix that keeps this function's keys apart in L2.
+        ttl (float): Seconds to keep a result in both tiers.
+        maxsize (int): The maximum number of results kept in L1.
+        key (Callable): Builds the cache key from the call arguments.
+    """
+    cache = TTLCache(maxsize=maxsize, ttl=ttl)
+    in_flight = {}
+
+    def decorator(func):
+        async def _load(k, shared_key, args, kwargs):
+            lock_key = f"{shared_key}:lock"
+            deadline = time.monotonic() + SHARED_CACHE_LOCK_TTL
+            has_lock = False
+            while True:
+                value = await SharedCache.BACKEND.get(shared_key)
+                if value is not None:
+                    return pickle.loads(value)
+                if await SharedCache.BACKEND.add(lock_key, b"1", SHARED_CACHE_LOCK_TTL):
+                    has_lock = True
+                    break
+                # Another worker is computing the value. Stop waiting once its lock
+                # would have expired, in case that worker died.
+                if time.monotonic() > deadline:
+                    break
+                await asyncio.sleep(SHARED_CACHE_POLL_INTERVAL)
+            try:
+                result = await func(*args, **kwargs)
+                await SharedCache.BACKEND.set(shared_key, pickle.dumps(result), ttl)
+                return result
+            finally:
+                if has_lock is True:
+                    await SharedCache.BACKEND.delete(lock_key)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            k = key(*args, **kwargs)
+            try:
+                return cache[k]
+            except KeyError:
+                pass
+            future = in_flight.get(k)
+            if future is None:
+                digest = hashlib.sha1(repr(k).encode()).hexdigest()
+                shared_key = f"{SHARED_CACHE_PREFIX}:{namespace}:{digest}"
+                future = asyncio.ensure_future(_load(k, shared_key, args, kwargs))
+                in_flight[k] = future
+
+                def _done(future):
+                    in_flight.pop(k, None)
+                    if not future.cancelled() and future.exception() is None:
+                        cache[k] = future.result()
+
+                future.add_done_callback(_done)
+            return await asyncio.shield(future)
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
@@ -0,0 +1,203 @@
+import asyncio
+import time
+
+from pymongo import UpdateOne
+from rich import inspect
+
+from tracker_rhizome_dev import (
+    CHAIN_FOLLOWER_LEASE_TTL,
+    CHAIN_HEAD_POLL_INTERVAL,
+    ENV,
+    RECENT_BLOCKS_SYNC_BATCH,
+    RECENT_BLOCKS_WINDOW,
+)
+from tracker_rhizome_dev.app.chain_head import ChainHead
+from tracker_rhizome_dev.app.icon_rpc import IconRpc, JsonRpcError
+from tracker_rhizome_dev.app.lease import Lease
+from tracker_rhizome_dev.app.models.icx import Db_RecentBlock, Db_RecentTransaction
+from tracker_rhizome_dev.app.utils import to_int
+
+
+class ChainFollower:
+    """
+    Background worker that follows the chain head block by block and writes
+    new blocks and transactions to the 'recentBlocks' and 'recentTransactions'
+    collections, keeping a rolling window of RECENT_BLOCKS_WINDOW blocks.
+
+    Every worker process starts a follower, but only the holder of the
+    'chain-follower' lease ingests blocks. Writes are idempotent upserts,
+    so a block ingested twice during a lease handover is harmless.
+    """
+
+    ENABLED = str(ENV["CHAIN_FOLLOWER"]).casefold() != "false"
+
+    LEASE = Lease("chain-follower", ttl=CHAIN_FOLLOWER_LEASE_TTL)
+
+    SYNCED_HEIGHT: int = None
+    SYNCED_AT: float = None  # Unix time of the last successful sync.
+
+    _task: asyncio.Task = None
+
+    def __init__(self) -> None:
+        pass
+
+    @classmethod
+    async def start(cls):
+        if cls.ENABLED is not True:
+            return
+        if cls._task is not None and not cls._task.done():
+            return
+        cls._task = asyncio.create_task(cls._follow())
+
+    @classmethod
+    async def stop(cls):
+        if cls._task is None:
+            return
+        cls._task.cancel()
+        try:
+            await cls._task
+        except asyncio.CancelledError:
+            pass
+        cls._task = None
+        await cls.LEASE.release()
+
+    @classmethod
+    async def sync(cls) -> int:
+        """
+        Ingests blocks from the last synced block up to the chain head,
+        at most RECENT_BLOCKS_SYNC_BATCH blocks per call.
+
+        Returns:
+            The number of blocks written.
+        """
+        head_height = await ChainHead.get_height()
+        synced_height = await cls._get_synced_height()
+
+        # Never backfill further than the rolling window.
+        start_height = max(synced_height + 1, head_height - RECENT_BLOCKS_WINDOW + 1)
+        end_height = min(head_height, start_height + RECENT_BLOCKS_SYNC_BATCH - 1)
+        if end_height < start_height:
+            return 0
+
+        heights = list(range(start_height, end_height + 1))
+        results = await IconRpc.batch(
+            [("icx_getBlockByHeight", {"height": hex(h)}) for h in heights]
+        )
+
+        block_writes = []
+        transaction_writes = []
+        for height, block in zip(heights, results):
+            # Stop at the first missing block so the cursor never skips one.
+            if isinstance(block, JsonRpcError):
+                break
+            block_writes.append(
+                UpdateOne(
+                    {"_id": height},
+                    {"$set": {"hash": f"0x{block['block_hash']}"}},
+                    upsert=True,
+                )
+            )
+            for transaction in block["confirmed_transaction_list"]:
+                # Skip the base transaction that issues IISS rewards in every block.
+                if transaction.get("dataType") == "base":
+                    continue
+                transaction_writes.append(
+                    UpdateOne(
+                        {"_id": transaction["txHash"]},
+                        {"$set": cls._parse_transaction(height, transaction)},
+                        upsert=True,
+                    )
+                )
+
+        if len(block_writes) == 0:
+            return 0
+
+        # Write transactions first so a block is only visible once its transactions are.
+        if len(transaction_writes) > 0:
+            await Db_RecentTransaction.get_motor_collection().bulk_write(
+                transaction_writes, ordered=False
+            )
+        await Db_RecentBlock.get_motor_collection().bulk_write(
+            block_writes, ordered=False
+        )
+
+        cls.SYNCED_HEIGHT = start_height + len(block_writes) - 1
+        cls.SYNCED_AT = time.time()
+        await cls._prune(head_height - RECENT_BLOCKS_WINDOW)
+        return len(block_writes)
+
+    @classmethod
+    async def get_status(cls) -> dict:
+        """
+        Returns ingestion lag metrics.
+
+        The synced height is read from the database, so any worker reports the
+        progress of whichever worker currently holds the lease.
+        """
+        head_height = await ChainHead.get_height()
+        synced_height = await cls._get_synced_height(use_memory=False)
+        return {
+            "enabled": cls.ENABLED,
+            "is_leader": cls.LEASE.is_held,
+            "head_height": head_height,
+            "synced_height": synced_height,
+            "lag_blocks": head_height - synced_height if synced_height else None,
+            "last_synced_at": cls.SYNCED_AT,
+        }
+
+    ###########
+    # Helpers #
+    ###########
+
+    @classmethod
+    async def _follow(cls):
+        while True:
+            try:
+                if await cls.LEASE.acquire() is True:
+                    # Catch up in batches before waiting for the next block.
+                    while await cls.sync() == RECENT_BLOCKS_SYNC_BATCH:
+                        await cls.LEASE.acquire()
+                else:
+                    cls.SYNCED_HEIGHT = None
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                inspect(e)
+            await asyncio.sleep(CHAIN_HEAD_POLL_INTERVAL)
+
+    @classmethod
+    async def _get_synced_height(cls, use_memory: bool = True) -> int:
+        if use_memory is True and cls.SYNCED_HEIGHT is not None:
+            return cls.SYNCED_HEIGHT
+        block = await Db_RecentBlock.get_motor_collection().find_one(
+            {}, projection={"_id": 1}, sort=[("_id", -1)]
+        )
+        return block["_id"] if block is not None else 0
+
+    @classmethod
+    async def _prune(cls, min_height: int):
+        await Db_RecentBlock.get_motor_collection().delete_many(
+            {"_id": {"$lt": min_height}}
+        )
+        await Db_RecentTransaction.get_motor_collection().delete_many(
+            {"block_number": {"$lt": min_height}}
+        )
+
+    @staticmethod
+    def _parse_transaction(height: int, transaction: dict) -> dict:
+        data = transaction.get("data")
+        if transaction.get("dataType") == "call" and isinstance(data, dict):
+            method = data.get("method", "")
+        else:
+            method = ""
+        timestamp = transaction["timestamp"]
+        if isinstance(timestamp, str):
+            timestamp = to_int(timestamp)
+        return {
+            "block_number": height,
+            "block_timestamp": timestamp,
+            "from_address": transaction.get("from", ""),
+            "to_address": transaction.get("to", ""),
+            "value": transaction.get("value", ""),
+            "method": method,
+        }
@@ -0,0 +1,124 @@
+import asyncio
+import time
+
+from rich import inspect
+
+from tracker_rhizome_dev import CHAIN_HEAD_MAX_AGE, CHAIN_HEAD_POLL_INTERVAL
+from tracker_rhizome_dev.app.icon_rpc import IconRpc
+from tracker_rhizome_dev.app.utils import to_int
+
+
+class ChainHead:
+    """
+    Follows the head of the ICON chain by polling the last block once per block time.
+
+    Every worker process runs one follower, started from the FastAPI startup hook.
+    Handlers resolve "latest" to the pinned height instead of calling
+    icx_getLastBlock themselves, so every RPC call in a render happens at the
+    same height and can be cached by height.
+    """
+
+    HEIGHT: int = None
+    TIMESTAMP: int = None  # Block timestamp in microseconds.
+    UPDATED_AT: float = None  # Monotonic time of the last successful poll.
+
+    _task: asyncio.Task = None
+    _new_block: asyncio.Event = None
+
+    def __init__(self) -> None:
+        pass
+
+    @classmethod
+    async def start(cls):
+        """
+        Fetches the current head and starts the follower task.
+        """
+        if cls._task is not None and not cls._task.done():
+            return
+        try:
+            await cls.update()
+        except Exception as e:
+            inspect(e)
+        cls._task = asyncio.create_task(cls._follow())
+
+    @classmethod
+    async def stop(cls):
+        if cls._task is None:
+            return
+        cls._task.cancel()
+        try:
+            await cls._task
+        except asyncio.CancelledError:
+            pass
+        cls._task = None
+
+    @classmethod
+    async def update(cls) -> int:
+        """
+        Polls the last block and pins its height.
+
+        Returns:
+            The pinned block height.
+        """
+        block = await IconRpc.get_last_block()
+        height = (
+            to_int(block["height"])
+            if isinstance(block["height"], str)
+            else block["height"]
+        )
+        # Never move backwards if a lagging node answers the poll.
+        if cls.HEIGHT is None or height >= cls.HEIGHT:
+            is_new_block = height != cls.HEIGHT
+            cls.HEIGHT = height
+            cls.TIMESTAMP = block["time_stamp"]
+            if is_new_block and cls._new_block is not None:
+                # Wake up every waiter, then arm a fresh event for the next block.
+                cls._new_block.set()
+                cls._new_block = asyncio.Event()
+        cls.UPDATED_AT = time.monotonic()
+        return cls.HEIGHT
+
+    @classmethod
+    def get_pinned_height(cls) -> int:
+        """
+        Returns the pinned block height, or 'None' if the follower isn't running
+        or hasn't been able to reach a node recently.
+        """
+        if cls.UPDATED_AT is None:
+            return None
+        if time.monotonic() - cls.UPDATED_AT > CHAIN_HEAD_MAX_AGE:
+            return None
+        return cls.HEIGHT
+
+    @classmethod
+    async def get_height(cls) -> int:
+        """
+        Returns the pinned block height, polling the last block only if
+        the pinned height is missing or stale.
+        """
+        height = cls.get_pinned_height()
+        if height is None:
+            height = await cls.update()
+        return height
+
+    @classmethod
+    async def wait_for_new_block(cls) -> int:
+        """
+        Waits until the follower pins a new block.
+
+        Returns:
+            The new block height.
+        """
+        if cls._new_block is None:
+            cls._new_block = asyncio.Event()
+        await cls._new_block.wait()
+        return cls.HEIGHT
+
+    @classmethod
+    async def _follow(cls):
+        while True:
+            await asyncio.sleep(CHAIN_HEAD_POLL_INTERVAL)
+            try:
+                await cls.update()
+            except Exception as e:
+                inspect(e)
@@ -1,4 +1,5 @@
-from cachetools import TTLCache, cached
+from tracker_rhizome_dev import CACHE_60S
+from tracker_rhizome_dev.app.cache import shared_cached
 from tracker_rhizome_dev.app.icx import Icx
 from tracker_rhizome_dev.app.utils import to_int
 
@@ -11,9 +12,9 @@ class Cps(Icx):
         super().__init__()
 
     @classmethod
-    @cached(cache=TTLCache(maxsize=1, ttl=3600))
-    def get_cps_validators(cls, format: bool = True) -> list:
-        result = cls.call(cls.CPS_CONTRACT, "get_PReps")
+    @shared_cached("cps-validators", ttl=CACHE_60S * 60)
+    async def get_cps_validators(cls, format: bool = True) -> list:
+        result = await cls.call(cls.CPS_CONTRACT, "get_PReps")
         validators = [validator["address"] for validator in result]
         return validators
 
@@ -117,7 +117,7 @@ class Tokens(Icx):
         pass
 
     @classmethod
-    def get_token_decimals(cls, contract: str) -> str:
+    async def get_token_decimals(cls, contract: str) -> str:
         if contract is None:
             return "ICX"
         else:
@@ -125,13 +125,13 @@ class Tokens(Icx):
                 return cls.TOKEN_METADATA[contract]["decimals"]
             except:
                 try:
-                    decimals = cls.call(contract, "decimals")
+                    decimals = await cls.call(contract, "decimals")
                     return decimals
                 except:
                     return "NULL"
 
     @classmethod
-    def get_token_name(cls, contract: str) -> str:
+    async def get_token_name(cls, contract: str) -> str:
         if contract is None:
             return "ICX"
         else:
@@ -139,13 +139,13 @@ class Tokens(Icx):
                 return cls.TOKEN_METADATA[contract]["name"]
             except:
                 try:
-                    token_name = cls.call(contract, "name")
+                    token_name = await cls.call(contract, "name")
                     return token_name
                 except:
                     return "NULL"
 
     @classmethod
-    def get_token_symbol(cls, contract: str) -> str:
+    async def get_token_symbol(cls, contract: str) -> str:
         if contract is None:
             return "ICX"
         else:
@@ -153,7 +153,7 @@ class Tokens(Icx):
                 return cls.TOKEN_METADATA[contract]["symbol"]
             except:
                 try:
-                    token_symbol = cls.call(contract, "symbol")
+                    token_symbol = await cls.call(contract, "symbol")
                     return token_symbol
                 except:
                     return "NULL"
@@ -1,16 +1,20 @@
 from datetime import datetime
 from tracemalloc import start
 from typing import Union
-from urllib.parse import parse_qs, urlparse
 
 from requests.exceptions import HTTPError
-from tracker_rhizome_dev import ENV
+from tracker_rhizome_dev import (
+    ENV,
+    GITHUB_GRAPHQL_COMMITS_PER_PAGE,
+    GITHUB_GRAPHQL_REPOS_PER_QUERY,
+)
 from tracker_rhizome_dev.app.http_request import HttpReq
 
 
 class Github:
     def __init__(self) -> None:
         self.github_api_url = "https://api.github.com"
+        self.github_graphql_url = "https://api.github.com/graphql"
         self.headers = {"Authorization": f"Bearer {ENV['GITHUB_API_KEY']}"}
 
     async def get_org(self, org_name: str) -> Union[dict, None]:
@@ -45,91 +49,95 @@ class Github:
             print(e)
             return None
 
-    async def get_commit_details(self, owner_name: str, repo_name: str, hash: str):
-        """
-        Returns the metadata for a GitHub commit.
-        """
-        try:
-            url = f"{self.github_api_url}/repos/{owner_name}/{repo_name}/commits/{hash}"
-            r = await HttpReq.get(url, headers=self.headers)
-            if r.status_code == 200:
-                data = r.json()
-                return data
-            else:
-                return None
-        except Exception as e:
-            print(e)
-            return None
-
-    async def get_commits(
+    async def get_commit_history(
         self,
-        owner_name: str,
-        repo_name: str,
-        start_timestamp: int = None,
-        end_timestamp: int = None,
-        page: int = 1,
-    ) -> Union[list, None]:
+        repos: list,
+        since: dict = None,
+        until: datetime = None,
+        repos_per_query: int = GITHUB_GRAPHQL_REPOS_PER_QUERY,
+    ) -> list:
         """
-        Returns a list of commits for a GitHub repository.
+        Returns the default branch commits of many repositories, with line changes
+        and author details, using GitHub's GraphQL API.
+
+        Each query fetches one page of history for up to 'repos_per_query'
+        repositories at once, so a full refresh costs a few queries per repository
+        page instead of one REST request per commit.
+
+        Args:
+            repos (list): A list of (owner_name, repo_name) tuples.
+            since (dict): Maps (owner_name, repo_name) tuples to the datetime of
+                the oldest commit to fetch. Repositories not in it are fetched in full.
+            until (datetime): The datetime of the newest commit to fetch.
+            repos_per_query (int): The maximum number of repositories per query.
+
+        Returns:
+            A list of (owner_name, repo_name, commit) tuples, where 'commit' is a
+            GraphQL Commit node. Only repositories whose history was fully paged
+            are included: history is returned newest first and later runs resume
+            from the newest stored commit, so a partial history would leave a
+            permanent gap.
         """
+        if since is None:
+            since = {}
 
-        # Create query string for start timestamp
-        if start_timestamp is not None:
-            start_dt = (
-                datetime.utcfromtimestamp(start_timestamp)
-                .replace(microsecond=0)
-                .isoformat()
+        commits = {repo: [] for repo in repos}
+        commit_count = 0
+        # Repositories with more history to fetch, and the cursor of their next page.
+        cursors = {repo: None for repo in repos}
+        while len(cursors) > 0:
+            batch = list(cursors)[:repos_per_query]
+            query, variables = self._build_commit_history_query(
+                batch, cursors, since, until
             )
-            start_timestamp_str = f"&since={start_dt}"
-        else:
-            start_timestamp_str = ""
-
-        # Create query string for end timestamp
-        if end_timestamp is not None:
-            end_dt = (
-                datetime.utcfromtimestamp(end_timestamp)
-                .replace(microsecond=0)
-                .isoformat()
+            r = await HttpReq.post(
+                self.github_graphql_url,
+                json={"query": query, "variables": variables},
+                headers=self.headers,
             )
-            end_timestamp_str = f"&until={end_dt}"
-        else:
-            end_timestamp_str = ""
+            if r is None or r.status_code != 200:
+                print(
+                    f"GitHub GraphQL query failed for {batch}, "
+                    f"skipping {len(cursors)} repositories with history left."
+                )
+                for repo in cursors:
+                    del commits[repo]
+                break
+            data = r.json().get("data") or {}
 
-        try:
-            url = f"{self.github_api_url}/repos/{owner_name}/{repo_name}/commits?page={page}&per_page=100{self._generate_timestamp_query_string(start_timestamp, end_timestamp)}"
-            r = await HttpReq.get(url, headers=self.headers)
-            data = r.json()
-            if r.status_code == 200:
-                if len(data) > 0:
-                    return data
+            for i, repo in enumerate(batch):
+                repository = data.get(f"r{i}")
+                # A repository that fails after its first page has partial history.
+                if repository is None and cursors[repo] is not None:
+                    print(f"GitHub GraphQL query failed for {repo}, skipping it.")
+                    del commits[repo]
+                    del cursors[repo]
+                    continue
+                branch = repository and repository["defaultBranchRef"]
+                # Missing or empty repositories have no history.
+                if branch is None:
+                    del cursors[repo]
+                    continue
+                history = branch["target"]["history"]
+                commits[repo] += history["nodes"]
+                commit_count += len(history["nodes"])
+                if history["pageInfo"]["hasNextPage"] is True:
+                    cursors[repo] = history["pageInfo"]["endCursor"]
                 else:
-                    return None
-            else:
-                return None
-        except:
-            return None
+                    del cursors[repo]
 
-    async def get_commits_count(
-        self,
-        owner_name: str,
-        repo_name: str,
-        start_timestamp: int = None,
-        end_timestamp: int = None,
-    ) -> int:
-        """
-        Returns the number of commits for a GitHub repository.
-        """
-        url = f"{self.github_api_url}/repos/{owner_name}/{repo_name}/commits?per_page=1{self._generate_timestamp_query_string(start_timestamp, end_timestamp)}"
-        r = await HttpReq.get(url, headers=self.headers)
-        links = r.links
-        try:
-            rel_last_link_url = urlparse(links["last"]["url"])
-            rel_last_link_url_args = parse_qs(rel_last_link_url.query)
-            rel_last_link_url_page_arg = rel_last_link_url_args["page"][0]
-            commits_count = int(rel_last_link_url_page_arg)
-            return commits_count
-        except KeyError:
-            return 0
+            rate_limit = data.get("rateLimit")
+            if rate_limit is not None:
+                print(
+                    f"Fetched {commit_count} GitHub commits "
+                    f"({rate_limit['remaining']} rate limit points left)..."
+                )
+
+        return [
+            (*repo, commit)
+            for repo, repo_commits in commits.items()
+            for commit in repo_commits
+        ]
 
     async def get_releases(
         self, owner_name: str, repo_name: str, page: int = 1
@@ -145,29 +153,69 @@ class Github:
         else:
             return None
 
-    def _generate_timestamp_query_string(
-        self, start_timestamp: int, end_timestamp: int
-    ) -> str:
-        # Create query string for start timestamp
-        if start_timestamp is not None:
-            start_dt = (
-                datetime.utcfromtimestamp(start_timestamp)
-                .replace(microsecond=0)
-                .isoformat()
-            )
-            start_timestamp_str = f"&since={start_dt}"
-        else:
-            start_timestamp_str = ""
-
-        # Create query string for end timestamp
-        if end_timestamp is not None:
-            end_dt = (
-                datetime.utcfromtimestamp(end_timestamp)
-                .replace(microsecond=0)
-                .isoformat()
+    @staticmethod
+    def _build_commit_history_query(
+        repos: list, cursors: dict, since: dict, until: datetime
+    ) -> tuple:
+        # Alias each repository as r0, r1, ..., with its own cursor and start date.
+        definitions = ["$until: GitTimestamp"]
+        fields = []
+        variables = {"until": Github._to_git_timestamp(until)}
+        for i, (owner_name, repo_name) in enumerate(repos):
+            definitions += [
+                f"$owner{i}: String!",
+                f"$name{i}: String!",
+                f"$after{i}: String",
+                f"$since{i}: GitTimestamp",
+            ]
+            variables.update(
+                {
+                    f"owner{i}": owner_name,
+                    f"name{i}": repo_name,
+                    f"after{i}": cursors[(owner_name, repo_name)],
+                    f"since{i}": Github._to_git_timestamp(
+                        since.get((owner_name, repo_name))
+                    ),
+                }
             )
-            end_timestamp_str = f"&until={end_dt}"
-        else:
-            end_timestamp_str = ""
+            fields.append(f"""
+                r{i}: repository(owner: $owner{i}, name: $name{i}) {{
+                    defaultBranchRef {{
+                        target {{
+                            ... on Commit {{
+                                history(
+                                    first: {GITHUB_GRAPHQL_COMMITS_PER_PAGE},
+                                    after: $after{i},
+                                    since: $since{i},
+                                    until: $until
+                                ) {{
+                                    pageInfo {{ hasNextPage endCursor }}
+                                    nodes {{ ...CommitFields }}
+                                }}
+                            }}
+                        }}
+                    }}
+                }}""")
+        query = f"""
+            query ({", ".join(definitions)}) {{
+                rateLimit {{ cost remaining resetAt }}
+                {"".join(fields)}
+            }}
+
+            fragment CommitFields on Commit {{
+                oid
+                committedDate
+                message
+                additions
+                deletions
+                author {{ email name user {{ login databaseId }} }}
+                committer {{ email name user {{ login databaseId }} }}
+            }}
+        """
+        return query, variables
 
-        return f"{start_timestamp_str}{end_timestamp_str}"
+    @staticmethod
+    def _to_git_timestamp(dt: datetime = None) -> Union[str, None]:
+        if dt is None:
+            return None
+        return f"{dt.replace(microsecond=0, tzinfo=None).isoformat()}Z"
@@ -1,45 +1,125 @@
+from importlib.util import find_spec
+from urllib.parse import urlsplit
+
 import httpx
 from rich import inspect
 
+from tracker_rhizome_dev import (
+    ENV,
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP_MAX_CONNECTIONS_PER_HOST,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS_PER_HOST,
+)
+
 
 class HttpReq:
+
+    # Enable HTTP/2 only if requested and the optional 'h2' package is installed.
+    HTTP2 = str(ENV["HTTP2"]).casefold() == "true" and find_spec("h2") is not None
+
+    # Pooled clients keyed by origin (scheme, host, port).
+    CLIENTS: dict = {}
+
     def __init__(self) -> None:
         pass
 
+    @classmethod
+    async def open(cls):
+        """
+        Prepares the process-wide connection pools. Called from the FastAPI startup hook.
+        """
+        await cls.close()
+        cls.CLIENTS = {}
+
+    @classmethod
+    async def close(cls):
+        """
+        Closes every pooled client. Called from the FastAPI shutdown hook.
+        """
+        clients = list(cls.CLIENTS.values())
+        cls.CLIENTS = {}
+        for client in clients:
+            await client.aclose()
+
+    @classmethod
+    def get_client(cls, url: str) -> httpx.AsyncClient:
+        """
+        Returns the pooled client for the origin of the provided URL.
+
+        Each origin gets its own client so connection limits apply per host,
+        and connections are kept alive between requests.
+        """
+        parts = urlsplit(url)
+        origin = (parts.scheme, parts.hostname, parts.port)
+        client = cls.CLIENTS.get(origin)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                http2=cls.HTTP2,
+                limits=httpx.Limits(
+                    max_connections=HTTP_MAX_CONNECTIONS_PER_HOST,
+                    max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS_PER_HOST,
+                    keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+                ),
+            )
+            cls.CLIENTS[origin] = client
+        return client
+
     @classmethod
     async def get(
         cls, url: str, headers: dict = None, timeout: float = 10.0, retries=2
     ):
         try:
-            async with httpx.AsyncClient(
-                timeout=timeout, transport=httpx.AsyncHTTPTransport(retries=retries)
-            ) as client:
-                r = await client.get(url, headers=headers)
-                r.raise_for_status
-                return r
+            r = await cls._request(
+                "GET", url, headers=headers, timeout=timeout, retries=retries
+            )
+            r.raise_for_status
+            return r
         except Exception as e:
             inspect(e)
 
     @classmethod
     async def head(cls, url: str, timeout: float = 10.0, retries=2):
         try:
-            async with httpx.AsyncClient(
-                timeout=timeout, transport=httpx.AsyncHTTPTransport(retries=retries)
-            ) as client:
-                r = await client.head(url)
-                r.raise_for_status
-                return r
+            r = await cls._request("HEAD", url, timeout=timeout, retries=retries)
+            r.raise_for_status
+            return r
         except Exception as e:
             inspect(e)
 
     @classmethod
-    async def post(cls, url: str, json: dict, timeout: float = 10.0, retries=2):
+    async def post(
+        cls,
+        url: str,
+        json: dict,
+        headers: dict = None,
+        timeout: float = 10.0,
+        retries=2,
+    ):
         try:
-            async with httpx.AsyncClient(
-                timeout=timeout, transport=httpx.AsyncHTTPTransport(retries=retries)
-            ) as client:
-                r = await client.post(url, json=json)
-                r.raise_for_status
-                return r
+            r = await cls._request(
+                "POST",
+                url,
+                json=json,
+                headers=headers,
+                timeout=timeout,
+                retries=retries,
+            )
+            r.raise_for_status
+            return r
         except Exception as e:
             inspect(e)
+
+    @classmethod
+    async def _request(
+        cls, method: str, url: str, timeout: float = 10.0, retries: int = 2, **kwargs
+    ) -> httpx.Response:
+        client = cls.get_client(url)
+        i = 0
+        while True:
+            try:
+                return await client.request(method, url, timeout=timeout, **kwargs)
+            # Retry connection failures only, like httpx.AsyncHTTPTransport(retries=...).
+            except (httpx.ConnectError, httpx.ConnectTimeout):
+                if i >= retries:
+                    raise
+                i += 1
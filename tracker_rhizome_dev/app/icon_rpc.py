@@ -0,0 +1,221 @@
+import asyncio
+from itertools import count
+from typing import Union
+
+import httpx
+
+from tracker_rhizome_dev import (
+    ENV,
+    ICX_RPC_BACKOFF,
+    ICX_RPC_BATCH_CONCURRENCY,
+    ICX_RPC_BATCH_SIZE,
+    ICX_RPC_RETRIES,
+    ICX_RPC_TIMEOUT,
+)
+from tracker_rhizome_dev.app.http_request import HttpReq
+from tracker_rhizome_dev.app.utils import gather_with_concurrency
+
+
+class JsonRpcError(Exception):
+    """
+    Raised when an ICON node answers a JSON-RPC request with an error object.
+    """
+
+    def __init__(self, code: int, message: str, data=None) -> None:
+        super().__init__(f"{code}: {message}")
+        self.code = code
+        self.message = message
+        self.data = data
+
+
+class IconRpc:
+    """
+    Asyncio-native client for the ICON JSON-RPC v3 API.
+
+    Requests go through the pooled HttpReq client for the API endpoint,
+    and connection failures are retried with exponential backoff
+    without blocking the event loop.
+    """
+
+    ICON_API_ENDPOINT = ENV["ICON_API_ENDPOINT"]
+    ICON_RPC_URL = f"{ICON_API_ENDPOINT}/api/v3"
+
+    _ids = count(1)
+
+    def __init__(self) -> None:
+        pass
+
+    ##############
+    # Primitives #
+    ##############
+
+    @classmethod
+    async def request(cls, method: str, params: dict = None):
+        """
+        Sends a single JSON-RPC request and returns its result.
+
+        Args:
+            method (str): The JSON-RPC method (e.g. "icx_call").
+            params (dict): The JSON-RPC params.
+
+        Returns:
+            The "result" member of the JSON-RPC response.
+        """
+        payload = {"jsonrpc": "2.0", "id": next(cls._ids), "method": method}
+        if params is not None:
+            payload["params"] = params
+        data = await cls._post(payload)
+        if "error" in data:
+            error = data["error"]
+            raise JsonRpcError(error["code"], error.get("message"), error.get("data"))
+        return data["result"]
+
+    @classmethod
+    async def batch(cls, requests: list, batch_size: int = ICX_RPC_BATCH_SIZE) -> list:
+        """
+        Sends many JSON-RPC requests as JSON-RPC 2.0 batch arrays.
+
+        Requests are split into chunks of 'batch_size', and responses are
+        mapped back to their request by id. An error for one request does
+        not affect the others in the same batch.
+
+        Args:
+            requests (list): A list of (method, params) tuples.
+            batch_size (int): The maximum number of requests per batch.
+
+        Returns:
+            A list of results in the same order as 'requests'. Failed requests
+            hold a JsonRpcError instead of a result.
+        """
+        payloads = []
+        for method, params in requests:
+            payload = {"jsonrpc": "2.0", "id": next(cls._ids), "method": method}
+            if params is not None:
+                payload["params"] = params
+            payloads.append(payload)
+
+        chunks = [
+            payloads[i : i + batch_size] for i in range(0, len(payloads), batch_size)
+        ]
+        responses = await gather_with_concurrency(
+            ICX_RPC_BATCH_CONCURRENCY, *[cls._post(chunk) for chunk in chunks]
+        )
+
+        results = {}
+        for chunk, response in zip(chunks, responses):
+            # A single error object means the node rejected the whole batch.
+            if isinstance(response, dict):
+                error = response.get("error", {})
+                exception = JsonRpcError(
+                    error.get("code"), error.get("message"), error.get("data")
+                )
+                for payload in chunk:
+                    results[payload["id"]] = exception
+                continue
+            for item in response:
+                if "error" in item:
+                    error = item["error"]
+                    results[item["id"]] = JsonRpcError(
+                        error["code"], error.get("message"), error.get("data")
+                    )
+                else:
+                    results[item["id"]] = item["result"]
+
+        return [
+            results.get(
+                payload["id"], JsonRpcError(-32603, "Missing response in batch")
+            )
+            for payload in payloads
+        ]
+
+    ###########
+    # Methods #
+    ###########
+
+    @classmethod
+    async def call(cls, to: str, method: str, params: dict = None, height: int = None):
+        return await cls.request(
+            "icx_call", cls._call_params(to, method, params, height)
+        )
+
+    @classmethod
+    async def call_many(cls, calls: list, batch_size: int = ICX_RPC_BATCH_SIZE) -> list:
+        """
+        Makes many "icx_call" requests in JSON-RPC batches.
+
+        Args:
+            calls (list): A list of (to, method, params, height) tuples.
+            batch_size (int): The maximum number of calls per batch.
+
+        Returns:
+            A list of results in the same order as 'calls'. Failed calls
+            hold a JsonRpcError instead of a result.
+        """
+        requests = [
+            ("icx_call", cls._call_params(to, method, params, height))
+            for to, method, params, height in calls
+        ]
+        return await cls.batch(requests, batch_size)
+
+    @classmethod
+    async def get_block_by_height(cls, height: int) -> dict:
+        return await cls.request("icx_getBlockByHeight", {"height": hex(height)})
+
+    @classmethod
+    async def get_last_block(cls) -> dict:
+        return await cls.request("icx_getLastBlock")
+
+    @classmethod
+    async def get_score_api(cls, address: str, height: int = None) -> list:
+        params = {"address": address}
+        if height is not None:
+            params["height"] = hex(height)
+        return await cls.request("icx_getScoreApi", params)
+
+    @classmethod
+    async def get_transaction_by_hash(cls, tx_hash: str) -> dict:
+        return await cls.request("icx_getTransactionByHash", {"txHash": tx_hash})
+
+    @classmethod
+    async def get_transaction_result(cls, tx_hash: str) -> dict:
+        return await cls.request("icx_getTransactionResult", {"txHash": tx_hash})
+
+    ###########
+    # Helpers #
+    ###########
+
+    @classmethod
+    async def _post(cls, payload: Union[dict, list]):
+        client = HttpReq.get_client(cls.ICON_RPC_URL)
+        i = 0
+        while True:
+            try:
+                r = await client.post(
+                    cls.ICON_RPC_URL, json=payload, timeout=ICX_RPC_TIMEOUT
+                )
+                # ICON nodes return JSON-RPC errors with 4xx/5xx statuses, so only
+                # responses without a JSON body (e.g. a gateway error) are retried.
+                return r.json()
+            except (httpx.TransportError, ValueError):
+                if i >= ICX_RPC_RETRIES:
+                    raise
+                await asyncio.sleep(ICX_RPC_BACKOFF * 2**i)
+                i += 1
+
+    @classmethod
+    def _call_params(cls, to: str, method: str, params: dict, height: int) -> dict:
+        data = {"method": method}
+        if params:
+            data["params"] = cls._encode_params(params)
+        rpc_params = {"to": to, "dataType": "call", "data": data}
+        if height is not None:
+            rpc_params["height"] = hex(height)
+        return rpc_params
+
+    @staticmethod
+    def _encode_params(params: dict) -> dict:
+        # SCORE parameters are passed as strings; integers are hex-encoded.
+        return {
+            k: hex(v) if isinstance(v, int) and not isinstance(v, bool) else v
+            for k, v in params.items()
+        }
@@ -1,92 +1,238 @@
-from time import sleep
+import hashlib
+import json
 from typing import Union
 
-from cachetools import TTLCache, cached
-from iconsdk.builder.call_builder import CallBuilder
-from iconsdk.icon_service import IconService
-from iconsdk.providers.http_provider import HTTPProvider
-from requests.exceptions import ConnectionError
+import httpx
+from cachetools import LRUCache, TTLCache
+from pymongo.errors import BulkWriteError
 
-from tracker_rhizome_dev import ENV
+from tracker_rhizome_dev import (
+    CACHE_30S,
+    ENV,
+    ICX_CALL_CACHE_LATEST_SIZE,
+    ICX_CALL_CACHE_LATEST_TTL,
+    ICX_CALL_CACHE_PINNED_SIZE,
+    ICX_RPC_BATCH_SIZE,
+)
+from tracker_rhizome_dev.app.cache import shared_cached
+from tracker_rhizome_dev.app.chain_head import ChainHead
+from tracker_rhizome_dev.app.icon_rpc import IconRpc, JsonRpcError
+from tracker_rhizome_dev.app.models.icx import Db_IcxCallResult
 from tracker_rhizome_dev.app.utils import to_int
 
 
 class Icx:
 
-    # Configure IconService object
-    ICON_API_ENDPOINT = ENV["ICON_API_ENDPOINT"]
-    ICON_SERVICE = IconService(HTTPProvider(ICON_API_ENDPOINT, 3))
-
     # Core Contracts
     CHAIN_CONTRACT = "cx0000000000000000000000000000000000000000"
     GOVERNANCE_CONTRACT = "cx0000000000000000000000000000000000000001"
 
+    # Contract call result caches. Results are stored JSON-encoded so callers
+    # can mutate what they get back without corrupting the cache.
+    PINNED_CALL_CACHE = LRUCache(maxsize=ICX_CALL_CACHE_PINNED_SIZE)
+    LATEST_CALL_CACHE = TTLCache(
+        maxsize=ICX_CALL_CACHE_LATEST_SIZE, ttl=ICX_CALL_CACHE_LATEST_TTL
+    )
+
+    # Persist results of height-pinned calls to MongoDB as a second cache tier.
+    PERSIST_PINNED_CALLS = str(ENV["ICX_CALL_CACHE_PERSIST"]).casefold() == "true"
+
     def __init__(self) -> None:
-        self.last_block = self.get_block("latest")["height"]
+        self.last_block = None
+
+    async def get_last_block(self) -> int:
+        """
+        Returns the latest block height, pinned once per instance.
+        """
+        if self.last_block is None:
+            self.last_block = await ChainHead.get_height()
+        return self.last_block
 
     ##############
     # Primitives #
     ##############
 
     @classmethod
-    def call(cls, to: str, method: str, params={}, height=None):
-        i = 0
-        while True:
+    async def call(cls, to: str, method: str, params={}, height=None):
+        # Resolve "latest" to the pinned chain head so the result is cacheable.
+        # Only heights pinned by the caller are kept in the long-lived tiers.
+        pinned_keys = set()
+        if height is None:
+            height = ChainHead.get_pinned_height()
+            key = cls._call_cache_key(to, method, params, height)
+        else:
+            key = cls._call_cache_key(to, method, params, height)
+            pinned_keys.add(key)
+        cached_results = await cls._get_cached_call_results([key], pinned_keys)
+        if key in cached_results:
+            return cached_results[key]
+        try:
+            result = await IconRpc.call(to, method, params, height)
+        except httpx.TransportError:
+            return
+        await cls._set_cached_call_results({key: result}, pinned_keys)
+        return result
+
+    @classmethod
+    async def call_many(cls, calls: list, batch_size: int = ICX_RPC_BATCH_SIZE) -> list:
+        """
+        Makes many contract calls using JSON-RPC batch requests.
+
+        Args:
+            calls (list): A list of (to, method, params, height) tuples.
+            batch_size (int): The maximum number of calls per batch request.
+
+        Returns:
+            A list of results in the same order as 'calls'. Calls that failed
+            (e.g. -30006 for a pool that didn't exist yet) hold a JsonRpcError,
+            and calls that couldn't reach the node are 'None'.
+        """
+        # Resolve "latest" to the pinned chain head so results are cacheable.
+        # Only heights pinned by the caller are kept in the long-lived tiers.
+        head_height = ChainHead.get_pinned_height()
+        pinned_keys = {
+            cls._call_cache_key(*call) for call in calls if call[3] is not None
+        }
+        calls = [
+            (to, method, params, head_height if height is None else height)
+            for to, method, params, height in calls
+        ]
+        keys = [cls._call_cache_key(*call) for call in calls]
+        cached_results = await cls._get_cached_call_results(keys, pinned_keys)
+
+        # Only request calls that aren't cached.
+        missing = [i for i, key in enumerate(keys) if key not in cached_results]
+        try:
+            fetched_results = await IconRpc.call_many(
+                [calls[i] for i in missing], batch_size
+            )
+        except httpx.TransportError:
+            fetched_results = [None] * len(missing)
+        await cls._set_cached_call_results(
+            {
+                keys[i]: result
+                for i, result in zip(missing, fetched_results)
+                if not isinstance(result, JsonRpcError)
+            },
+            pinned_keys,
+        )
+
+        results = [cached_results.get(key) for key in keys]
+        for i, result in zip(missing, fetched_results):
+            results[i] = result
+        return results
+
+    @classmethod
+    def _call_cache_key(
+        cls, to: str, method: str, params: dict = None, height: int = None
+    ) -> tuple:
+        return (to, method, json.dumps(params or {}, sort_keys=True), height)
+
+    @classmethod
+    async def _get_cached_call_results(cls, keys: list, pinned_keys: set) -> dict:
+        """
+        Returns a dictionary that maps cached call keys to their decoded results.
 
-            if i > 5:
-                return
+        Calls at a height pinned by the caller ('pinned_keys') are looked up in
+        the in-memory LRU first, then in MongoDB (if enabled). Calls at the
+        chain head use the short TTL cache.
+        """
+        cached_results = {}
+        db_keys = {}
+        for key in keys:
+            pinned = key in pinned_keys
+            cache = cls.PINNED_CALL_CACHE if pinned else cls.LATEST_CALL_CACHE
+            value = cache.get(key)
+            if value is not None:
+                cached_results[key] = json.loads(value)
+            elif pinned and cls.PERSIST_PINNED_CALLS:
+                db_keys[cls._call_cache_id(key)] = key
 
+        if len(db_keys) > 0:
+            cursor = Db_IcxCallResult.get_motor_collection().find(
+                {"_id": {"$in": list(db_keys)}}
+            )
+            async for document in cursor:
+                key = db_keys[document["_id"]]
+                cls.PINNED_CALL_CACHE[key] = document["result"]
+                cached_results[key] = json.loads(document["result"])
+
+        return cached_results
+
+    @classmethod
+    async def _set_cached_call_results(cls, results: dict, pinned_keys: set):
+        documents = []
+        for key, result in results.items():
+            if result is None:
+                continue
+            value = json.dumps(result)
+            if key not in pinned_keys:
+                cls.LATEST_CALL_CACHE[key] = value
+            else:
+                cls.PINNED_CALL_CACHE[key] = value
+                if cls.PERSIST_PINNED_CALLS:
+                    documents.append(
+                        {
+                            "_id": cls._call_cache_id(key),
+                            "to": key[0],
+                            "method": key[1],
+                            "height": key[3],
+                            "result": value,
+                        }
+                    )
+
+        if len(documents) > 0:
             try:
-                call = (
-                    CallBuilder()
-                    .to(to)
-                    .method(method)
-                    .params(params)
-                    .height(height)
-                    .build()
+                await Db_IcxCallResult.get_motor_collection().insert_many(
+                    documents, ordered=False
                 )
-                result = cls.ICON_SERVICE.call(call)
-                return result
-            except ConnectionError as e:
-                sleep(2)
-                i += 1
-                continue
-            except KeyboardInterrupt:
-                exit()
+            except BulkWriteError:  # Another worker already stored some of these.
+                pass
+
+    @staticmethod
+    def _call_cache_id(key: tuple) -> str:
+        return hashlib.sha1(json.dumps(key).encode()).hexdigest()
 
     #################
     # Stock Methods #
     #################
 
     @classmethod
-    def get_block(
+    async def get_block(
         cls, height: Union[int, str] = "latest", height_only: bool = False
     ) -> dict:
-        result = cls.ICON_SERVICE.get_block(height)
+        if height == "latest" and height_only is True:
+            return await ChainHead.get_height()
+        if height == "latest":
+            result = await IconRpc.get_last_block()
+        else:
+            result = await IconRpc.get_block_by_height(height)
+        if isinstance(result["height"], str):
+            result["height"] = to_int(result["height"])
         if height_only is True:
             return result["height"]
         else:
             return result
 
     @classmethod
-    def get_score_api(cls, contract: str, height: int = None) -> dict:
-        result = cls.ICON_SERVICE.get_score_api(contract, height)
+    async def get_score_api(cls, contract: str, height: int = None) -> dict:
+        result = await IconRpc.get_score_api(contract, height)
         return result
 
     @classmethod
-    def get_transaction(cls, tx_hash: str) -> dict:
-        result = cls.ICON_SERVICE.get_transaction(tx_hash)
+    async def get_transaction(cls, tx_hash: str) -> dict:
+        result = await IconRpc.get_transaction_by_hash(tx_hash)
         return result
 
     @classmethod
-    def get_transaction_result(cls, tx_hash: str) -> dict:
-        result = cls.ICON_SERVICE.get_transaction_result(tx_hash)
+    async def get_transaction_result(cls, tx_hash: str) -> dict:
+        result = await IconRpc.get_transaction_result(tx_hash)
         return result
 
     @classmethod
-    @cached(cache=TTLCache(maxsize=1, ttl=30))
-    def get_icx_usd_price(cls, height: int = None) -> float:
-        result = cls.call(
+    @shared_cached("icx-usd-price", ttl=CACHE_30S)
+    async def get_icx_usd_price(cls, height: int = None) -> float:
+        result = await cls.call(
             "cx087b4164a87fdfb7b714f3bafe9dfb050fd6b132",
             "get_ref_data",
             {"_symbol": "ICX"},
@@ -96,23 +242,25 @@ class Icx:
         return icx_usd_price
 
     @classmethod
-    def get_network_info(cls):
-        result = cls.call(cls.CHAIN_CONTRACT, "getNetworkInfo")
-        for k, v in result.items():
-            if isinstance(v, str):
-                result[k] = to_int(v)
-        for k, v in result["rewardFund"].items():
-            if isinstance(v, str):
-                result["rewardFund"][k] = to_int(v)
-        return result
+    async def get_network_info(cls, height: int = None):
+        result = await cls.call(cls.CHAIN_CONTRACT, "getNetworkInfo", height=height)
+        # Parse into a new dictionary so the call result is never modified.
+        network_info = {
+            k: to_int(v) if isinstance(v, str) else v for k, v in result.items()
+        }
+        network_info["rewardFund"] = {
+            k: to_int(v) if isinstance(v, str) else v
+            for k, v in result["rewardFund"].items()
+        }
+        return network_info
 
     #########
     # CALLS #
     #########
 
     @classmethod
-    def get_irc2_token_balance(cls, token_contract: str, address: str):
-        result = cls.call(token_contract, "balanceOf", params={"_owner": address})
+    async def get_irc2_token_balance(cls, token_contract: str, address: str):
+        result = await cls.call(token_contract, "balanceOf", params={"_owner": address})
         return result
 
     ########
@@ -120,8 +268,8 @@ class Icx:
     ########
 
     @classmethod
-    def get_icx_staking_apy(cls):
-        network_info = cls.get_network_info()
+    async def get_icx_staking_apy(cls):
+        network_info = await cls.get_network_info()
         reward_fund = network_info["rewardFund"]
         voter_allocation = reward_fund["Iglobal"] * (reward_fund["Ivoter"] / 100) * 12
         total_delegated = network_info["totalDelegated"]
@@ -129,8 +277,8 @@ class Icx:
         return icx_staking_apy
 
     @classmethod
-    def get_staked_delegated_supply(cls):
-        network_info = cls.get_network_info()
+    async def get_staked_delegated_supply(cls):
+        network_info = await cls.get_network_info()
         staked_supply = network_info["totalStake"] / 10**18
         delegated_supply = network_info["totalDelegated"] / 10**18
         return {"delegated_supply": delegated_supply, "staked_supply": staked_supply}
@@ -0,0 +1,218 @@
+import math
+from datetime import datetime, timedelta
+
+from bson.decimal128 import Decimal128
+from pymongo import UpdateOne
+
+from tracker_rhizome_dev.app.models.icx import (
+    Db_IcxSicxBnusdQuote,
+    Db_IcxSicxBnusdQuoteDaily,
+    Db_IcxSicxBnusdQuoteHourly,
+)
+
+
+class IcxQuotes:
+    """
+    Serves ICX/USD, sICX/bnUSD and sICX/ICX price series for charts.
+
+    Raw quotes are stored once per minute. Hourly and daily OHLC rollups are
+    maintained as quotes are inserted, and series are downsampled in MongoDB
+    to at most 'max_points' buckets, read from the coarsest source that fits.
+    """
+
+    PAIRS = ["icx_usd", "sicx_bnusd", "sicx_icx"]
+
+    # Bucket sizes (seconds) a series can be downsampled to.
+    BUCKET_SIZES = [
+        60,
+        300,
+        900,
+        1800,
+        3600,
+        7200,
+        14400,
+        21600,
+        43200,
+        86400,
+        172800,
+        604800,
+    ]
+
+    # Rollup documents and the bucket size (seconds) each one holds.
+    ROLLUPS = [(Db_IcxSicxBnusdQuoteDaily, 86400), (Db_IcxSicxBnusdQuoteHourly, 3600)]
+
+    def __init__(self) -> None:
+        pass
+
+    @classmethod
+    async def insert(cls, quote: Db_IcxSicxBnusdQuote):
+        """
+        Inserts a quote and folds it into the hourly and daily rollups.
+        Quotes must be inserted in time order.
+        """
+        await quote.insert()
+        prices = {pair: Decimal128(str(getattr(quote, pair))) for pair in cls.PAIRS}
+        for rollup, bucket_size in cls.ROLLUPS:
+            await rollup.get_motor_collection().bulk_write(
+                [
+                    UpdateOne(
+                        {"_id": cls._truncate(quote.id, bucket_size)},
+                        {
+                            "$setOnInsert": {
+                                f"{pair}.open": price for pair, price in prices.items()
+                            },
+                            "$max": {
+                                f"{pair}.high": price for pair, price in prices.items()
+                            },
+                            "$min": {
+                                f"{pair}.low": price for pair, price in prices.items()
+                            },
+                            "$set": {
+                                f"{pair}.close": price for pair, price in prices.items()
+                            },
+                            "$inc": {"quote_count": 1},
+                        },
+                        upsert=True,
+                    )
+                ]
+            )
+
+    @classmethod
+    async def rebuild_rollups(cls):
+        """
+        Rebuilds the hourly and daily rollups from the raw quotes.
+        """
+        for rollup, bucket_size in cls.ROLLUPS:
+            await Db_IcxSicxBnusdQuote.get_motor_collection().aggregate(
+                [
+                    {"$sort": {"_id": 1}},
+                    *cls._get_ohlc_stages(bucket_size, rollup=False),
+                    {"$merge": {"into": rollup.get_settings().name}},
+                ]
+            ).to_list(None)
+
+    @classmethod
+    async def get_series(
+        cls, start: datetime, end: datetime, max_points: int = 500
+    ) -> list:
+        """
+        Returns OHLC quotes between 'start' and 'end', downsampled to at most
+        'max_points' buckets.
+
+        Args:
+            start (datetime): The start of the range.
+            end (datetime): The end of the range (inclusive).
+            max_points (int): The maximum number of buckets to return.
+
+        Returns:
+            A list of buckets, oldest first, with the closing prices of each pair
+            and their OHLC under 'ohlc'.
+        """
+        bucket_size = cls._get_bucket_size(end - start, max_points)
+
+        # Read from the coarsest rollup that the bucket size is a multiple of.
+        collection = Db_IcxSicxBnusdQuote.get_motor_collection()
+        is_rollup = False
+        for rollup, rollup_bucket_size in cls.ROLLUPS:
+            if bucket_size % rollup_bucket_size == 0:
+                collection = rollup.get_motor_collection()
+                start = cls._truncate(start, rollup_bucket_size)
+                is_rollup = True
+                break
+
+        buckets = await collection.aggregate(
+            [
+                {"$match": {"_id": {"$gte": start, "$lte": end}}},
+                {"$sort": {"_id": 1}},
+                *cls._get_ohlc_stages(bucket_size, rollup=is_rollup),
+                {"$sort": {"_id": 1}},
+            ]
+        ).to_list(None)
+
+        series = []
+        for bucket in buckets:
+            ohlc = {
+                pair: {key: value.to_decimal() for key, value in bucket[pair].items()}
+                for pair in cls.PAIRS
+            }
+            series.append(
+                {
+                    "id": bucket["_id"],
+                    **{pair: ohlc[pair]["close"] for pair in cls.PAIRS},
+                    "ohlc": ohlc,
+                }
+            )
+
+        # With max_points=1, a range can still straddle two bins.
+        while len(series) > max_points:
+            series[:2] = [cls._merge_points(series[0], series[1])]
+        return series
+
+    ###########
+    # Helpers #
+    ###########
+
+    @classmethod
+    def _get_bucket_size(cls, duration: timedelta, max_points: int) -> int:
+        # Bins are aligned by $dateTrunc, so a range can touch one bin more
+        # than its duration spans.
+        max_bins = max(max_points - 1, 1)
+        for bucket_size in cls.BUCKET_SIZES:
+            if duration.total_seconds() / bucket_size <= max_bins:
+                return bucket_size
+        # Ranges too long for weekly buckets use buckets of whole days.
+        return 86400 * math.ceil(duration.total_seconds() / max_bins / 86400)
+
+    @classmethod
+    def _merge_points(cls, first: dict, second: dict) -> dict:
+        ohlc = {
+            pair: {
+                "open": first["ohlc"][pair]["open"],
+                "high": max(first["ohlc"][pair]["high"], second["ohlc"][pair]["high"]),
+                "low": min(first["ohlc"][pair]["low"], second["ohlc"][pair]["low"]),
+                "close": second["ohlc"][pair]["close"],
+            }
+            for pair in cls.PAIRS
+        }
+        return {
+            "id": first["id"],
+            **{pair: ohlc[pair]["close"] for pair in cls.PAIRS},
+            "ohlc": ohlc,
+        }
+
+    @classmethod
+    def _get_ohlc_stages(cls, bucket_size: int, rollup: bool) -> list:
+        # Raw quotes hold one price per pair, rollups hold OHLC per pair.
+        # Input documents must be sorted by time for '$first' and '$last'.
+        group = {
+            "_id": cls._get_bucket_expression("$_id", bucket_size),
+            "quote_count": {"$sum": "$quote_count" if rollup is True else 1},
+        }
+        project = {"quote_count": 1}
+        for pair in cls.PAIRS:
+            for key, accumulator in [
+                ("open", "$first"),
+                ("high", "$max"),
+                ("low", "$min"),
+                ("close", "$last"),
+            ]:
+                source = f"${pair}.{key}" if rollup is True else f"${pair}"
+                group[f"{pair}_{key}"] = {accumulator: source}
+                project[f"{pair}.{key}"] = f"${pair}_{key}"
+        return [{"$group": group}, {"$project": project}]
+
+    @staticmethod
+    def _get_bucket_expression(field: str, bucket_size: int) -> dict:
+        if bucket_size % 86400 == 0:
+            unit, bin_size = "day", bucket_size // 86400
+        elif bucket_size % 3600 == 0:
+            unit, bin_size = "hour", bucket_size // 3600
+        else:
+            unit, bin_size = "minute", bucket_size // 60
+        return {"$dateTrunc": {"date": field, "unit": unit, "binSize": bin_size}}
+
+    @staticmethod
+    def _truncate(dt: datetime, bucket_size: int) -> datetime:
+        epoch = datetime(1970, 1, 1)
+        seconds = int((dt - epoch).total_seconds())
+        return epoch + timedelta(seconds=seconds - seconds % bucket_size)
@@ -0,0 +1,125 @@
+import asyncio
+
+import numpy
+
+from tracker_rhizome_dev import EXA, IISS_STATS_UPDATE_INTERVAL
+from tracker_rhizome_dev.app.chain_head import ChainHead
+from tracker_rhizome_dev.app.gov import Gov
+from tracker_rhizome_dev.app.icx import Icx
+from tracker_rhizome_dev.app.utils import to_int
+
+
+class IissStats:
+    """
+    Network-wide IISS statistics: network info plus the distributions of
+    validator bond, delegation and commission rate.
+
+    Statistics are computed once every IISS_STATS_UPDATE_INTERVAL blocks from
+    calls pinned to the same height, with validator values held in NumPy arrays
+    so every aggregate is one vectorized pass. Concurrent requests for the same
+    interval share a single computation.
+    """
+
+    PERCENTILES = [10, 25, 50, 75, 90]
+
+    VERSION: int = None  # Block height // IISS_STATS_UPDATE_INTERVAL
+    STATS: dict = None
+
+    _lock = asyncio.Lock()
+
+    def __init__(self) -> None:
+        pass
+
+    @classmethod
+    async def get(cls) -> dict:
+        """
+        Returns the statistics for the current interval, computing them if needed.
+        """
+        height = await ChainHead.get_height()
+        version = height // IISS_STATS_UPDATE_INTERVAL
+        if cls.VERSION == version:
+            return cls.STATS
+        async with cls._lock:
+            if cls.VERSION != version:
+                cls.STATS = await cls.compute(height)
+                cls.VERSION = version
+        return cls.STATS
+
+    @classmethod
+    async def compute(cls, height: int) -> dict:
+        """
+        Computes the statistics at the provided block height.
+
+        Returns:
+            A dictionary with network totals, validator counts, the reward fund,
+            and the distributions of validator bonds, delegations and commission
+            rates. ICX amounts are in ICX, and rates are percentages.
+        """
+        network_info, validators = await asyncio.gather(
+            Icx.get_network_info(height=height), Gov.get_validators(height=height)
+        )
+        preps = validators["preps"]
+
+        bonded = numpy.array(
+            [to_int(prep["bonded"]) for prep in preps], dtype=numpy.float64
+        )
+        delegated = numpy.array(
+            [to_int(prep["delegated"]) for prep in preps], dtype=numpy.float64
+        )
+        # Commission rates (in basis points) only exist from IISS 4.
+        commission_rates = numpy.array(
+            [
+                to_int(prep["commissionRate"])
+                for prep in preps
+                if prep.get("commissionRate") is not None
+            ],
+            dtype=numpy.float64,
+        )
+
+        main_validator_count = (
+            network_info["mainPRepCount"] + network_info["extraMainPRepCount"]
+        )
+        reward_fund = network_info["rewardFund"]
+        return {
+            "block_height": height,
+            "validator_count": network_info["preps"],
+            "main_validator_count": main_validator_count,
+            "sub_validator_count": network_info["preps"] - main_validator_count,
+            "bond_requirement": network_info["bondRequirement"] / 100,
+            "total_bonded": network_info["totalBonded"] / EXA,
+            "total_delegated": network_info["totalDelegated"] / EXA,
+            "total_staked": network_info["totalStake"] / EXA,
+            "total_power": network_info["totalPower"] / EXA,
+            "reward_fund": {
+                "i_global": reward_fund["Iglobal"] / EXA,
+                "i_cps": reward_fund["Icps"],
+                "i_prep": reward_fund["Iprep"],
+                "i_relay": reward_fund["Irelay"],
+                "i_voter": reward_fund["Ivoter"],
+            },
+            # Only validators that bonded or received delegations are counted.
+            "bond": cls._get_distribution(bonded[bonded > 0] / EXA),
+            "delegation": cls._get_distribution(delegated[delegated > 0] / EXA),
+            "commission_rate": cls._get_distribution(commission_rates / 100),
+        }
+
+    ###########
+    # Helpers #
+    ###########
+
+    @classmethod
+    def _get_distribution(cls, values: numpy.ndarray) -> dict:
+        if values.size == 0:
+            return None
+        percentiles = numpy.percentile(values, cls.PERCENTILES)
+        return {
+            "count": int(values.size),
+            "total": float(values.sum()),
+            "mean": float(values.mean()),
+            "min": float(values.min()),
+            "max": float(values.max()),
+            "percentiles": {
+                f"p{percentile}": float(value)
+                for percentile, value in zip(cls.PERCENTILES, percentiles)
+            },
+        }
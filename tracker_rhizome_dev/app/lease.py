@@ -0,0 +1,59 @@
+import os
+import socket
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from pymongo.errors import DuplicateKeyError
+
+from tracker_rhizome_dev.app.models.lease import Db_Lease
+
+
+class Lease:
+    """
+    A named lease in MongoDB that at most one worker process holds at a time.
+
+    Background jobs that must only run once per deployment (e.g. chain ingestion)
+    call 'acquire' before each unit of work. The holder renews the lease on every
+    call, and another worker takes over once it expires.
+    """
+
+    def __init__(self, name: str, ttl: int) -> None:
+        self.name = name
+        self.ttl = ttl
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+        self.is_held = False
+
+    async def acquire(self) -> bool:
+        """
+        Acquires or renews the lease.
+
+        Returns:
+            'True' if this process holds the lease.
+        """
+        now = datetime.utcnow()
+        try:
+            await Db_Lease.get_motor_collection().find_one_and_update(
+                {
+                    "_id": self.name,
+                    "$or": [{"holder": self.holder}, {"expires_at": {"$lt": now}}],
+                },
+                {
+                    "$set": {
+                        "holder": self.holder,
+                        "expires_at": now + timedelta(seconds=self.ttl),
+                    }
+                },
+                upsert=True,
+            )
+            self.is_held = True
+        # The upsert collides with the existing document when another process holds the lease.
+        except DuplicateKeyError:
+            self.is_held = False
+        return self.is_held
+
+    async def release(self):
+        if self.is_held is True:
+            await Db_Lease.get_motor_collection().delete_one(
+                {"_id": self.name, "holder": self.holder}
+            )
+            self.is_held = False
@@ -0,0 +1,81 @@
+import asyncio
+
+from rich import inspect
+
+from tracker_rhizome_dev import LIVE_UPDATES_SLOW_INTERVAL
+from tracker_rhizome_dev.app.broadcast import Broadcaster
+from tracker_rhizome_dev.app.chain_head import ChainHead
+from tracker_rhizome_dev.app.routers.components import home as comp_home
+from tracker_rhizome_dev.app.routers.components import icx as comp_icx
+
+
+class LiveUpdates:
+    """
+    Renders live home page fragments once per block and pushes them to every
+    open page over Server-Sent Events.
+
+    Each worker process runs one producer. It only renders while at least one
+    page is subscribed, so upstream requests scale with the block rate instead
+    of the number of open tabs.
+    """
+
+    BROADCASTER = Broadcaster()
+
+    # Event name, component route that renders it, and how often (in blocks) to render it.
+    EVENTS = [
+        ("block-stream", lambda: comp_home.get_block_stream(None, limit=50), 1),
+        ("total-transactions", lambda: comp_icx.get_total_transactions(None), 1),
+        ("total-token-transfers", lambda: comp_icx.get_total_token_transfers(None), 1),
+        (
+            "icx-usd-price",
+            lambda: comp_icx.get_icx_usd_price(None),
+            LIVE_UPDATES_SLOW_INTERVAL,
+        ),
+        (
+            "average-block-time",
+            lambda: comp_icx.get_average_block_time(None),
+            LIVE_UPDATES_SLOW_INTERVAL,
+        ),
+    ]
+
+    _task: asyncio.Task = None
+
+    def __init__(self) -> None:
+        pass
+
+    @classmethod
+    async def start(cls):
+        if cls._task is not None and not cls._task.done():
+            return
+        cls._task = asyncio.create_task(cls._produce())
+
+    @classmethod
+    async def stop(cls):
+        if cls._task is None:
+            return
+        cls._task.cancel()
+        try:
+            await cls._task
+        except asyncio.CancelledError:
+            pass
+        cls._task = None
+
+    @classmethod
+    async def _produce(cls):
+        while True:
+            height = await ChainHead.wait_for_new_block()
+            if cls.BROADCASTER.subscriber_count == 0:
+                continue
+            events = [
+                (event, render)
+                for event, render, interval in cls.EVENTS
+                if height % interval == 0 or event not in cls.BROADCASTER.last_events
+            ]
+            responses = await asyncio.gather(
+                *[render() for _, render in events], return_exceptions=True
+            )
+            for (event, _), response in zip(events, responses):
+                if isinstance(response, Exception):
+                    inspect(response)
+                    continue
+                cls.BROADCASTER.publish(event, response.body.decode())
@@ -10,12 +10,19 @@ from motor.motor_asyncio import AsyncIOMotorClient
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
 from tracker_rhizome_dev import ENV, TEMPLATES
+from tracker_rhizome_dev.app.cache import SharedCache
+from tracker_rhizome_dev.app.chain_follower import ChainFollower
+from tracker_rhizome_dev.app.chain_head import ChainHead
 from tracker_rhizome_dev.app.dependencies import is_htmx_request
 from tracker_rhizome_dev.app.http_request import HttpReq
 from tracker_rhizome_dev.app.icx import Icx
+from tracker_rhizome_dev.app.live_updates import LiveUpdates
 from tracker_rhizome_dev.app.models.balanced import (
+    Db_BalancedLiquidation,
     Db_BalancedLoan,
-    Db_BalancedPoolDynamicDataSnapshot,
+    Db_BalancedLoanPosition,
+    Db_BalancedLoanStats,
+    Db_BalancedPoolHistory,
     Db_BalancedPoolStaticData,
 )
 from tracker_rhizome_dev.app.models.github import (
@@ -25,16 +32,30 @@ from tracker_rhizome_dev.app.models.github import (
 )
 from tracker_rhizome_dev.app.models.icx import (
     Db_IcxBlock,
+    Db_IcxCallResult,
     Db_IcxSicxBnusdQuote,
+    Db_IcxSicxBnusdQuoteDaily,
+    Db_IcxSicxBnusdQuoteHourly,
     Db_RecentBlock,
     Db_RecentTransaction,
+    Db_ValidatorMetrics,
     Db_ValidatorNodeStatus,
+    Db_ValidatorNodeUptime,
+    Db_ValidatorTableSnapshot,
 )
+from tracker_rhizome_dev.app.models.lease import Db_Lease
+from tracker_rhizome_dev.app.models.sync import Db_SyncCursor
 from tracker_rhizome_dev.app.regex import ICX_ADDRESS_REGEX, ICX_TX_HASH_REGEX
 
 # Import API routes
+from tracker_rhizome_dev.app.routers.api.v1 import balanced as api_balanced
 from tracker_rhizome_dev.app.routers.api.v1 import database as api_database
+from tracker_rhizome_dev.app.routers.api.v1 import events as api_events
+from tracker_rhizome_dev.app.routers.api.v1 import governance as api_governance
 from tracker_rhizome_dev.app.routers.api.v1 import icx as api_icx
+from tracker_rhizome_dev.app.routers.api.v1.tools import (
+    block_timestamp_converter as api_block_timestamp_converter,
+)
 
 # Import app routes
 from tracker_rhizome_dev.app.routers.app import dapps as app_dapps
@@ -51,6 +72,7 @@ from tracker_rhizome_dev.app.routers.components import transaction as comp_trans
 from tracker_rhizome_dev.app.routers.components import transactions as comp_transactions
 from tracker_rhizome_dev.app.tracker import Tracker
 from tracker_rhizome_dev.app.utils import format_number
+from tracker_rhizome_dev.app.validator_table import ValidatorTable
 
 app = FastAPI()
 
@@ -62,8 +84,14 @@ app.mount(
 )
 
 # API Routes
+app.include_router(api_balanced.router, prefix="/api/v1", tags=["api"])
 app.include_router(api_database.router, prefix="/api/v1", tags=["api"])
+app.include_router(api_events.router, prefix="/api/v1", tags=["api"])
+app.include_router(api_governance.router, prefix="/api/v1", tags=["api"])
 app.include_router(api_icx.router, prefix="/api/v1", tags=["api"])
+app.include_router(
+    api_block_timestamp_converter.router, prefix="/api/v1", tags=["api"]
+)
 
 # App Routes
 app.include_router(app_dapps.router, tags=["app"])
@@ -387,7 +415,7 @@ async def search(search: str = Form()):
             redirect_url = f"/transaction/{search}/"
         elif (
             int(search) > 0
-            and int(search) <= (await Icx().get_latest_block())["height"]
+            and int(search) <= await Icx.get_block("latest", height_only=True)
         ):
             redirect_url = f"/block/{search}/"
         else:
@@ -444,15 +472,41 @@ async def app_init():
         db_client[ENV["DB_NAME"]],
         document_models=[
             Db_BalancedLoan,
+            Db_BalancedLiquidation,
+            Db_BalancedLoanPosition,
+            Db_BalancedLoanStats,
             Db_IcxBlock,
+            Db_IcxCallResult,
             Db_RecentBlock,
             Db_GithubCommit,
             Db_GithubReleases,
             Db_GithubRepo,
             Db_IcxSicxBnusdQuote,
-            Db_BalancedPoolDynamicDataSnapshot,
+            Db_IcxSicxBnusdQuoteDaily,
+            Db_IcxSicxBnusdQuoteHourly,
+            Db_Lease,
+            Db_SyncCursor,
+            Db_BalancedPoolHistory,
             Db_BalancedPoolStaticData,
+            Db_ValidatorMetrics,
             Db_ValidatorNodeStatus,
+            Db_ValidatorNodeUptime,
+            Db_ValidatorTableSnapshot,
             Db_RecentTransaction,
         ],
     )
+    await HttpReq.open()
+    await ChainHead.start()
+    await ChainFollower.start()
+    await LiveUpdates.start()
+    await ValidatorTable.start()
+
+
+@app.on_event("shutdown")
+async def app_shutdown():
+    await ValidatorTable.stop()
+    await LiveUpdates.stop()
+    await ChainFollower.stop()
+    await ChainHead.stop()
+    await HttpReq.close()
+    await SharedCache.close()
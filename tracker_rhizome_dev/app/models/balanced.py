@@ -1,10 +1,10 @@
 import json
 from datetime import datetime, timedelta
 from decimal import Decimal
-from typing import List, Union
+from typing import Dict, List, Union
 
 import pymongo
-from beanie import Document, Indexed
+from beanie import Document, Granularity, Indexed, TimeSeriesConfig
 from pydantic import BaseModel, root_validator, validator
 
 from tracker_rhizome_dev import EXA
@@ -29,12 +29,27 @@ class Db_BalancedPoolDynamicData(BaseModel):
     total_supply: Decimal
 
 
-class Db_BalancedPoolDynamicDataSnapshot(Document):
-    id: datetime
-    data: List[Db_BalancedPoolDynamicData]
+# balancedPoolHistory
+
+
+class Db_BalancedPoolHistory(Document):
+    timestamp: datetime
+    pool_id: int
+    block_height: int
+    base: Decimal
+    price: Decimal
+    quote: Decimal
+    total_supply: Decimal
 
     class Settings:
-        name = "balancedPoolDynamicData"
+        name = "balancedPoolHistory"
+        # One measurement per pool per snapshot, bucketed by pool.
+        timeseries = TimeSeriesConfig(
+            time_field="timestamp",
+            meta_field="pool_id",
+            granularity=Granularity.minutes,
+        )
+        indexes = [[("pool_id", pymongo.ASCENDING), ("timestamp", pymongo.ASCENDING)]]
 
 
 # balancedPoolStaticData
@@ -152,15 +167,24 @@ class BalancedLoan(BaseModel):
 
 
 class Db_BalancedLiquidation(Document):
-    id: str
+    id: str  # Transaction hash and log index
     tx_hash: str
-    date: datetime
-    block_height: int
+    date: Indexed(datetime, index_type=pymongo.DESCENDING)
+    block_height: Indexed(int)
     amount: Decimal
-    liquidator: str
+    owner: Indexed(str)
+    liquidator: Indexed(str)
 
     class Settings:
-        name = "balancedLoans"
+        name = "balancedLiquidations"
+
+
+class Db_BalancedLoanPosition(Document):
+    id: int  # Loan index
+    address: str
+
+    class Settings:
+        name = "balancedLoanPositions"
 
 
 class Db_BalancedLoan(Document):
@@ -179,17 +203,47 @@ class Db_BalancedLoan(Document):
         use_cache = True
         cache_expiration_time = timedelta(seconds=30)
         cache_capacity = 5
+        # Indexes for each sort option of the loans table.
+        indexes = [
+            [("ratio", pymongo.ASCENDING), ("_id", pymongo.ASCENDING)],
+            [("collateral", pymongo.ASCENDING), ("_id", pymongo.ASCENDING)],
+            [("total_debt", pymongo.ASCENDING), ("_id", pymongo.ASCENDING)],
+            [("created", pymongo.ASCENDING), ("_id", pymongo.ASCENDING)],
+            [
+                ("standings.sICX.standing", pymongo.ASCENDING),
+                ("_id", pymongo.ASCENDING),
+            ],
+        ]
+
+
+class Db_BalancedLoanTableView(BaseModel):
+    id: int
+    address: str
+    collateral: Decimal
+    created: datetime
+    ratio: Decimal
+    standing: str
+    total_debt: Decimal
+
+    class Settings:
+        projection = {
+            "id": "$_id",
+            "address": 1,
+            "collateral": 1,
+            "created": 1,
+            "ratio": 1,
+            "standing": "$standings.sICX.standing",
+            "total_debt": 1,
+        }
 
 
 class App_BalancedLoan(BaseModel):
     id: int
     address: str
-    assets: BalancedLoanAssets
     collateral: Decimal
     created: datetime
-    holdings: BalancedLoanHoldings
     ratio: Decimal
-    standings: BalancedLoanStandings
+    standing: str
     total_debt: Decimal
 
     @validator("collateral")
@@ -221,29 +275,40 @@ class App_BalancedLoan(BaseModel):
         }
 
 
+class BalancedLoanRatioBucket(BaseModel):
+    min_ratio: Decimal
+    max_ratio: Union[Decimal, None]  # 'None' for the last, open-ended bucket
+    count: int
+
+
+class Db_BalancedLoanStats(Document):
+    id: str  # Always "latest"
+    block_height: int
+    updated_at: datetime
+    loan_count: int
+    active_loan_count: int  # Positions with debt
+    total_collateral: Decimal  # sICX held by the loans contract
+    total_debt: Decimal
+    mean_ratio: Decimal
+    max_ratio: Decimal
+    ratio_percentiles: Dict[str, Decimal]  # e.g. {"p50": ...} over positions with debt
+    ratio_histogram: List[BalancedLoanRatioBucket]
+
+    class Settings:
+        name = "balancedLoanStats"
+
+
 class Db_BalancedLoanShortView(BaseModel):
     ratio: Decimal
     total_debt: Decimal
 
 
 class App_BalancedLiquidation(BaseModel):
-    address: str
-    block_number: int
-    block_timestamp: int
-    amount: float
-    log_index: int
-    method: str
-    transaction_hash: str
-
-    @root_validator(pre=True)
-    def root_validator(cls, values):
-        values["address"] = values["indexed"][1]
-        values["amount"] = to_int(values["indexed"][2]) / EXA
-        return values
-
-    @validator("block_timestamp")
-    def validate_timestamp(cls, v):
-        return {"raw": v, "formatted": datetime.utcfromtimestamp(int(v / 1000000))}
+    tx_hash: str
+    date: datetime
+    amount: Decimal
+    owner: str
+    liquidator: str
 
     @validator("amount")
     def validate_amount(cls, v):
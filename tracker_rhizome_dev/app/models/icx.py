@@ -1,18 +1,16 @@
 import json
 from datetime import datetime, timedelta
 from decimal import Decimal
-from typing import List, Union
+from typing import Dict, List, Optional, Union
 
 import pymongo
 import timeago
-from beanie import Document
+from beanie import Document, Granularity, Indexed, TimeSeriesConfig
 from pydantic import BaseModel, root_validator, validator
 
 from tracker_rhizome_dev import EXA
-from tracker_rhizome_dev.app.cps import Cps
 from tracker_rhizome_dev.app.data.addresses import Addresses
 from tracker_rhizome_dev.app.data.country_codes import CountryCodes
-from tracker_rhizome_dev.app.icx import Icx
 from tracker_rhizome_dev.app.utils import (
     format_number,
     format_percentage,
@@ -143,7 +141,10 @@ class TokenTransfer(BaseModel):
 
 class Db_RecentTransaction(Document):
     id: str  # transaction hash
+    block_number: Indexed(int) = None
     block_timestamp: int
+    from_address: Union[str, None]
+    to_address: Union[str, None]
     value: str
     method: str
 
@@ -293,8 +294,10 @@ class TransactionDetail(BaseModel):
             except AttributeError:
                 pass
 
-        current_block_height = Icx.get_block("latest")["height"]
-        values["confirmations"] = current_block_height - values["block_number"]
+        # Current block height is passed in by the caller (e.g. Tracker.get_transaction_details).
+        current_block_height = values.get("current_block_height")
+        if current_block_height is not None:
+            values["confirmations"] = current_block_height - values["block_number"]
 
         for k in ["method", "nonce", "from_address", "signature", "to_address"]:
             if values[k] == "":
@@ -468,10 +471,10 @@ class Validator(BaseModel):
     @root_validator(pre=True)
     def root_validator(cls, values):
 
-        cps_validators = Cps.get_cps_validators()
         # cps_sponsors_record = Cps.get_sponsors_record()
 
         # Set non-model variables.
+        cps_validators = values.get("cps_validators", [])
         icx_usd_price = Decimal(values["icx_usd_price"])
         network_info = values["network_info"]
         total_power = Decimal(network_info["totalPower"]) / EXA
@@ -583,6 +586,49 @@ class Db_IcxSicxBnusdQuote(Document):
         name = "icxSicxBnusdQuotes"
 
 
+class Ohlc(BaseModel):
+    open: Decimal
+    high: Decimal
+    low: Decimal
+    close: Decimal
+
+
+class Db_IcxSicxBnusdQuoteHourly(Document):
+    id: datetime  # Start of the hour
+    icx_usd: Ohlc
+    sicx_bnusd: Ohlc
+    sicx_icx: Ohlc
+    quote_count: int  # Number of quotes in the bucket
+
+    class Settings:
+        name = "icxSicxBnusdQuotesHourly"
+
+
+class Db_IcxSicxBnusdQuoteDaily(Document):
+    id: datetime  # Start of the day
+    icx_usd: Ohlc
+    sicx_bnusd: Ohlc
+    sicx_icx: Ohlc
+    quote_count: int  # Number of quotes in the bucket
+
+    class Settings:
+        name = "icxSicxBnusdQuotesDaily"
+
+
+# icxCallResults
+
+
+class Db_IcxCallResult(Document):
+    id: str  # SHA-1 hash of (to, method, params, height)
+    to: str
+    method: str
+    height: int
+    result: str  # JSON-encoded call result
+
+    class Settings:
+        name = "icxCallResults"
+
+
 # icxBlocks
 
 
@@ -607,3 +653,63 @@ class Db_ValidatorNodeStatus(Document):
         name = "validatorNodeStatuses"
         use_cache = True
         cache_expiration_time = timedelta(seconds=600)
+
+
+class Db_ValidatorNodeUptime(Document):
+    timestamp: datetime
+    address: str  # Validator address (not nodeAddress)
+    status: bool
+    height: Optional[int]  # Node height, if the node responded
+    latency: Optional[float]  # Response time in seconds, if the node responded
+
+    class Settings:
+        name = "validatorNodeUptime"
+        timeseries = TimeSeriesConfig(
+            time_field="timestamp",
+            meta_field="address",
+            granularity=Granularity.minutes,
+        )
+        indexes = [[("address", pymongo.ASCENDING), ("timestamp", pymongo.ASCENDING)]]
+
+
+# validatorMetrics
+
+
+class Db_ValidatorMetrics(Document):
+    timestamp: datetime  # Start of the term
+    address: str
+    term: int  # Term sequence number
+    block_height: int  # Term start height the metrics were read at
+    rank: int
+    grade: int
+    bonded: Decimal
+    delegated: Decimal
+    power: Decimal
+    productivity: Decimal
+    validated_blocks: int
+    total_blocks: int
+
+    class Settings:
+        name = "validatorMetrics"
+        timeseries = TimeSeriesConfig(
+            time_field="timestamp",
+            meta_field="address",
+            granularity=Granularity.hours,
+        )
+        indexes = [
+            [("address", pymongo.ASCENDING), ("timestamp", pymongo.ASCENDING)],
+            [("term", pymongo.DESCENDING)],
+        ]
+
+
+# validatorTableSnapshots
+
+
+class Db_ValidatorTableSnapshot(Document):
+    id: int  # Block height the table was computed at (the snapshot version)
+    created_at: datetime
+    validators: List[dict]  # JSON-encoded Validator rows, in getPReps order
+    orders: Dict[str, List[int]]  # Ascending row order for each sort key
+
+    class Settings:
+        name = "validatorTableSnapshots"
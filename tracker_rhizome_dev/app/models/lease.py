@@ -0,0 +1,12 @@
+from datetime import datetime
+
+from beanie import Document
+
+
+class Db_Lease(Document):
+    id: str  # Lease name
+    holder: str
+    expires_at: datetime
+
+    class Settings:
+        name = "leases"
@@ -0,0 +1,12 @@
+from datetime import datetime
+
+from beanie import Document
+
+
+class Db_SyncCursor(Document):
+    id: str  # Name of the sync job
+    block_height: int  # Last block height processed by the job
+    updated_at: datetime
+
+    class Settings:
+        name = "syncCursors"
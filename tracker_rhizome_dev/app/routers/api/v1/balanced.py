@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+
+from fastapi import APIRouter, Query, Request, status
+
+from tracker_rhizome_dev.app.balanced_risk import BalancedRisk
+from tracker_rhizome_dev.app.models.balanced import Db_BalancedPoolHistory
+
+router = APIRouter(prefix="/balanced")
+
+
+@router.get("/pools/{pool_id}/ohlc/", status_code=status.HTTP_200_OK)
+async def get_pool_ohlc(
+    request: Request,
+    pool_id: int,
+    start: datetime = None,
+    end: datetime = None,
+    interval: str = Query(default="hour", regex=r"^minute$|^hour$|^day$|^week$"),
+):
+    """
+    Returns OHLC prices and closing liquidity for a Balanced pool.
+
+    Args:
+        pool_id (int): The ID number of a pool on Balanced.
+        start (datetime): The start of the range (30 days before 'end' by default).
+        end (datetime): The end of the range (now by default).
+        interval (str): The candle size ("minute", "hour", "day", or "week").
+    """
+    if end is None:
+        end = datetime.utcnow()
+    if start is None:
+        start = end - timedelta(days=30)
+
+    # The match on the meta field only reads this pool's buckets.
+    candles = (
+        await Db_BalancedPoolHistory.get_motor_collection()
+        .aggregate(
+            [
+                {
+                    "$match": {
+                        "pool_id": pool_id,
+                        "timestamp": {"$gte": start, "$lt": end},
+                    }
+                },
+                {"$sort": {"timestamp": 1}},
+                {
+                    "$group": {
+                        "_id": {"$dateTrunc": {"date": "$timestamp", "unit": interval}},
+                        "open": {"$first": "$price"},
+                        "high": {"$max": "$price"},
+                        "low": {"$min": "$price"},
+                        "close": {"$last": "$price"},
+                        "base": {"$last": "$base"},
+                        "quote": {"$last": "$quote"},
+                        "total_supply": {"$last": "$total_supply"},
+                    }
+                },
+                {"$sort": {"_id": 1}},
+            ]
+        )
+        .to_list(None)
+    )
+
+    fields = ["open", "high", "low", "close", "base", "quote", "total_supply"]
+    data = [
+        {
+            "timestamp": candle["_id"],
+            **{field: candle[field].to_decimal() for field in fields},
+        }
+        for candle in candles
+    ]
+    return {"count": len(data), "data": data}
+
+
+@router.get("/positions-at-risk/", status_code=status.HTTP_200_OK)
+async def get_positions_at_risk(
+    request: Request,
+    max_ratio: float = Query(default=BalancedRisk.LOCKING_RATIO, gt=0),
+    limit: int = Query(default=50, ge=1, le=1000),
+):
+    positions_at_risk = await BalancedRisk.get_positions_at_risk(max_ratio, limit)
+    return {"data": positions_at_risk}
@@ -1,27 +1,34 @@
 import hashlib
 import json
-from concurrent.futures import ThreadPoolExecutor
 from dataclasses import replace
 from datetime import datetime, timedelta
 from decimal import Decimal
 
+from beanie.odm.utils.dump import get_dict
 from fastapi import APIRouter, BackgroundTasks, HTTPException, Query, Request, status
-from pymongo.errors import BulkWriteError, DuplicateKeyError
+from pymongo import ReplaceOne
+from pymongo.errors import BulkWriteError
 from rich import inspect
 
 from tracker_rhizome_dev import (
+    BLOCK_INDEX_SYNC_BATCH,
     GENESIS_TIMESTAMP_S,
     GITHUB_IGNORED_REPO_IDS,
     GITHUB_USERNAMES,
     MAX_WORKERS,
 )
 from tracker_rhizome_dev.app.balanced import Balanced
+from tracker_rhizome_dev.app.balanced_loan_stats import BalancedLoanStats
+from tracker_rhizome_dev.app.balanced_pool_history import BalancedPoolHistory
+from tracker_rhizome_dev.app.block_index import BlockIndex
+from tracker_rhizome_dev.app.chain_follower import ChainFollower
 from tracker_rhizome_dev.app.github import Github
-from tracker_rhizome_dev.app.gov import Gov
 from tracker_rhizome_dev.app.icx import Icx
+from tracker_rhizome_dev.app.icx_quotes import IcxQuotes
 from tracker_rhizome_dev.app.models.balanced import (
+    Db_BalancedLiquidation,
     Db_BalancedLoan,
-    Db_BalancedPoolDynamicDataSnapshot,
+    Db_BalancedPoolHistory,
     Db_BalancedPoolStaticData,
 )
 from tracker_rhizome_dev.app.models.github import (
@@ -32,75 +39,144 @@ from tracker_rhizome_dev.app.models.github import (
 from tracker_rhizome_dev.app.models.icx import (
     Db_IcxBlock,
     Db_IcxSicxBnusdQuote,
-    Db_RecentBlock,
-    Db_RecentTransaction,
-    Db_ValidatorNodeStatus,
 )
+from tracker_rhizome_dev.app.models.sync import Db_SyncCursor
 from tracker_rhizome_dev.app.tracker import Tracker
 from tracker_rhizome_dev.app.utils import (
     get_datetime_in_utc,
     send_discord_notification,
     to_int,
 )
+from tracker_rhizome_dev.app.validator_metrics import ValidatorMetrics
+from tracker_rhizome_dev.app.validator_nodes import ValidatorNodes
 
 router = APIRouter(prefix="/database")
 
 
 @router.post("/balanced/loans/", status_code=status.HTTP_201_CREATED)
-async def post_balanced_loans():
-    balanced = Balanced()
-
-    loans = balanced.get_loans(dump=False)
-    loans = [Db_BalancedLoan(id=loan.pos_id, **dict(loan)) for loan in loans]
-
-    existing_loans = await Db_BalancedLoan.find_all().to_list()
-    existing_loan_ids = [loan.id for loan in existing_loans]
+async def post_balanced_loans(full: bool = False):
+    """
+    Refreshes Balanced loans in the database.
 
-    loans_to_write = [loan for loan in loans if loan.id not in existing_loan_ids]
-    loans_to_replace = [loan for loan in loans if loan.id in existing_loan_ids]
+    By default, only positions whose owners emitted events on the loans contract
+    since the last run are refreshed. A full rescan of every position runs on the
+    first call, or when 'full' is true (e.g. as a periodic reconciliation job).
+    """
+    balanced = Balanced()
+    block_height = await balanced.get_last_block()
+    cursor = await Db_SyncCursor.get("balancedLoans")
+
+    # The cursor follows the tracker's event index, which lags the chain head.
+    # Events between the cursor and the head are picked up by the next run.
+    if full is True or cursor is None:
+        event_height = await balanced.get_last_loans_event_height()
+        loans = await balanced.get_loans()
+    else:
+        addresses, event_height = await balanced.get_changed_loan_addresses(
+            cursor.block_height
+        )
+        loans = await balanced.get_loans_by_address(addresses)
+
+    print(f"Writing {len(loans)} Balanced loans to the database...")
+    if len(loans) > 0:
+        await Db_BalancedLoan.get_motor_collection().bulk_write(
+            [
+                ReplaceOne(
+                    {"_id": loan.pos_id},
+                    get_dict(Db_BalancedLoan(id=loan.pos_id, **dict(loan)), to_db=True),
+                    upsert=True,
+                )
+                for loan in loans
+            ],
+            ordered=False,
+        )
 
-    if len(loans_to_write) > 0:
-        await Db_BalancedLoan.insert_many(loans_to_write)
+    await BalancedLoanStats.update(block_height)
+    await Db_SyncCursor(
+        id="balancedLoans", block_height=event_height, updated_at=datetime.utcnow()
+    ).save()
+    return {"loan_count": len(loans)}
 
-    if len(loans_to_replace) > 0:
-        await Db_BalancedLoan.replace_many(loans_to_replace)
 
-    return
+@router.post("/balanced/liquidations/", status_code=status.HTTP_201_CREATED)
+async def post_balanced_liquidations():
+    """
+    Writes Balanced liquidations emitted since the last run to the database.
+    The first call ingests the full liquidation history.
+    """
+    cursor = await Db_SyncCursor.get("balancedLiquidations")
+    start_height = cursor.block_height if cursor is not None else 0
+
+    liquidations = await Balanced.get_liquidations(start_height)
+
+    print(f"Writing {len(liquidations)} Balanced liquidations to the database...")
+    if len(liquidations) > 0:
+        await Db_BalancedLiquidation.get_motor_collection().bulk_write(
+            [
+                ReplaceOne(
+                    {"_id": f"{liquidation['tx_hash']}:{liquidation['log_index']}"},
+                    get_dict(
+                        Db_BalancedLiquidation(
+                            id=f"{liquidation['tx_hash']}:{liquidation['log_index']}",
+                            tx_hash=liquidation["tx_hash"],
+                            date=datetime.utcfromtimestamp(
+                                liquidation["block_timestamp"] / 1000000
+                            ),
+                            block_height=liquidation["block_height"],
+                            amount=liquidation["amount"],
+                            owner=liquidation["owner"],
+                            liquidator=liquidation["liquidator"],
+                        ),
+                        to_db=True,
+                    ),
+                    upsert=True,
+                )
+                for liquidation in liquidations
+            ],
+            ordered=False,
+        )
+        # Resume from the last liquidation written: the tracker's event index
+        # lags the chain head, so later liquidations may not be indexed yet.
+        await Db_SyncCursor(
+            id="balancedLiquidations",
+            block_height=max(
+                liquidation["block_height"] for liquidation in liquidations
+            ),
+            updated_at=datetime.utcnow(),
+        ).save()
+    return {"liquidation_count": len(liquidations)}
 
 
 @router.post("/recent-blocks/", status_code=status.HTTP_201_CREATED)
-async def post_recent_blocks(limit: int = 50):
-    # Fetch recent blocks from Tracker API.
-    blocks = await Tracker.get_blocks(limit=limit, format=False)
-    recent_blocks = [Db_RecentBlock(id=block["number"], **block) for block in blocks]
-
-    # Get blocks that are currently in the database.
-    existing_blocks = await Db_RecentBlock.find_all().to_list()
-    print(f"There are {len(existing_blocks)} in the database.")
-
-    # Create a list of block heights. Set to None if there are no blocks in the database.
-    if len(existing_blocks) >= 0:
-        existing_block_heights = [block.id for block in existing_blocks]
-        blocks_to_write = [
-            block for block in recent_blocks if block.id not in existing_block_heights
-        ]
-    else:
-        existing_block_heights = None
-        blocks_to_write = recent_blocks
+@router.post("/recent-transactions/", status_code=status.HTTP_201_CREATED)
+async def post_recent_blocks():
+    """
+    Runs one ingestion pass of the chain follower, writing new blocks and their
+    transactions to the database. The follower normally does this in the background;
+    this endpoint is kept for deployments that disable it with CHAIN_FOLLOWER=false.
+    """
+    block_count = await ChainFollower.sync()
+    return {"block_count": block_count}
 
-    print(f"Writing {len(blocks_to_write)} blocks to the database...")
-    db_write = await Db_RecentBlock.insert_many(blocks_to_write)
 
-    return
+@router.get("/recent-blocks/status/", status_code=status.HTTP_200_OK)
+async def get_recent_blocks_status():
+    return await ChainFollower.get_status()
 
 
-@router.post("/recent-transactions/", status_code=status.HTTP_201_CREATED)
-async def post_recent_transactions(limit: int = 50):
-    transactions = await Tracker.get_transactions(limit=limit, format=False)
-    recent_transactions = [
-        Db_RecentTransaction(id=tx["hash"], **tx) for tx in transactions
-    ]
-    return recent_transactions
+@router.post("/icx/block-index/", status_code=status.HTTP_201_CREATED)
+async def post_icx_block_index():
+    """
+    Samples new blocks into the block index used to convert between block
+    heights and timestamps. The first call builds the index from genesis.
+    """
+    block_count = 0
+    while True:
+        sampled = await BlockIndex.sync()
+        block_count += sampled
+        if sampled < BLOCK_INDEX_SYNC_BATCH:
+            break
+    return {"block_count": block_count}
 
 
 @router.post(
@@ -109,13 +185,10 @@ async def post_recent_transactions(limit: int = 50):
 async def insert_balanced_pool_static_data_snapshot():
     balanced = Balanced()
     # Get current static data from the blockchain.
-    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-        futures = [
-            executor.submit(balanced.get_pool_static_metadata, pool_id=id)
-            for id in range(1, balanced.get_pool_count())
-        ]
-        static_data = [future.result() for future in futures]
-        static_data.sort(key=lambda k: k.id)
+    pool_count = await balanced.get_pool_count()
+    pools = await balanced.get_pools_by_id(list(range(1, pool_count)))
+    static_data = [Db_BalancedPoolStaticData(**pool) for pool in pools if pool]
+    static_data.sort(key=lambda k: k.id)
 
     # Write static data to database.
     for record in static_data:
@@ -132,101 +205,88 @@ async def insert_balanced_pool_dynamic_data_snapshot(
     timestamp: int = Query(default=None, ge=GENESIS_TIMESTAMP_S)
 ):
     """
-    Inserts Balanced pool dynamic data into a MongoDB collection.
+    Inserts Balanced pool dynamic data into the 'balancedPoolHistory' time series
+    collection, as one measurement per pool.
 
     Args:
         timestamp (int): Unix timestamp in seconds (must be greater than 1516819217)
 
     Returns:
-        A dictionary of the inserted document.
+        A dictionary with the number of inserted measurements.
     """
-    balanced = Balanced()
+    snapshot_time = datetime.fromisoformat(get_datetime_in_utc(timestamp))
+
+    # Time series collections can't enforce unique keys, so skip snapshots that exist.
+    if await Db_BalancedPoolHistory.find_one(
+        Db_BalancedPoolHistory.timestamp == snapshot_time
+    ):
+        return {"pool_count": 0}
 
     # Set block height for the given timestamp. Set to latest block height if timestamp is 'None'.
     if timestamp is not None:
-        block_height = await Tracker.get_block_from_timestamp(timestamp)
+        try:
+            block_height = await BlockIndex.get_height(timestamp * 1000000)
+        except LookupError:
+            block_height = await Tracker.get_block_from_timestamp(timestamp)
     else:
-        block_height = Icx.get_block()["height"]
+        block_height = await Icx.get_block("latest", height_only=True)
 
     print(f"Fetching Balanced pool dynamic data at block {block_height}...")
-
-    pool_count = balanced.get_pool_count(height=block_height)
-
-    print(f"There were {pool_count} pools at block {block_height}...")
-
-    # Get dynamic data from the blockchain.
-    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-        futures = [
-            executor.submit(
-                balanced.get_pool_dynamic_metadata, pool_id=id, height=block_height
-            )
-            for id in range(1, pool_count + 1)
-        ]
-        dynamic_data = [
-            future.result() for future in futures if future.result() is not None
-        ]
-        dynamic_data.sort(key=lambda k: k.id)
-    print(get_datetime_in_utc(timestamp))
-    # Write dynamic data to database.
-    db_write = Db_BalancedPoolDynamicDataSnapshot(
-        id=get_datetime_in_utc(timestamp), data=dynamic_data
-    )
-    try:
-        await db_write.insert()
-    except DuplicateKeyError:
-        await db_write.replace()
-    return
+    pool_count = await BalancedPoolHistory.take_snapshot(snapshot_time, block_height)
+    return {"pool_count": pool_count}
 
 
 @router.post("/insert/icx-sicx-bnusd-quotes/", status_code=status.HTTP_201_CREATED)
 async def insert_icx_sicx_bnusd_quotes():
     balanced = Balanced()
-    icx_usd_price = Decimal(balanced.get_icx_usd_price())
+    icx_usd_price = Decimal(await balanced.get_icx_usd_price())
     sicx_bnusd_price = Decimal(
-        to_int(balanced.get_price_by_name("sICX/bnUSD"))
+        to_int(await balanced.get_price_by_name("sICX/bnUSD"))
+    ) / Decimal(10**18)
+    sicx_icx_price = Decimal(
+        to_int(await balanced.get_price_by_name("sICX/ICX"))
     ) / Decimal(10**18)
-    sicx_icx_price = Decimal(to_int(balanced.get_price_by_name("sICX/ICX"))) / Decimal(
-        10**18
-    )
     db_write = Db_IcxSicxBnusdQuote(
         id=get_datetime_in_utc(),
         icx_usd=icx_usd_price,
         sicx_bnusd=sicx_bnusd_price,
         sicx_icx=sicx_icx_price,
     )
-    await db_write.insert()
+    await IcxQuotes.insert(db_write)
     return
 
 
-@router.post("/insert/validators-node-status/", status_code=status.HTTP_201_CREATED)
-async def insert_validators_node_status():
-    validators_node_status = Gov.get_validators_node_status()
-    timestamp = get_datetime_in_utc()
-    for address, status in validators_node_status.items():
-        db_write = Db_ValidatorNodeStatus(
-            id=address, timestamp=timestamp, status=status
-        )
-        await db_write.save()
+@router.post("/icx-sicx-bnusd-quotes/rollups/", status_code=status.HTTP_201_CREATED)
+async def post_icx_sicx_bnusd_quote_rollups():
+    """
+    Rebuilds the hourly and daily quote rollups from the raw quotes.
+    """
+    await IcxQuotes.rebuild_rollups()
     return
 
 
-@router.post("/github/commits2/")
-async def insert_github_commits(
-    request: Request,
-    background_tasks: BackgroundTasks,
-    start_timestamp: int = None,
-    end_timestamp: int = None,
-    owner_name: str = None,
-):
+@router.post("/insert/validators-node-status/", status_code=status.HTTP_201_CREATED)
+async def insert_validators_node_status():
     """
-    Fetches GitHub commits for tracked repositories and inserts them into a MongoDB database.
+    Probes every validator node and records its status and uptime.
     """
+    validator_count = await ValidatorNodes.update()
+    return {"validator_count": validator_count}
 
-    dt_now = datetime.utcnow().replace(microsecond=0, second=0)
-
-    repos = await Db_GithubRepo.find_all().to_list()
 
-    return
+@router.post("/governance/validator-metrics/", status_code=status.HTTP_201_CREATED)
+async def post_validator_metrics(term_count: int = Query(default=1, ge=1, le=1000)):
+    """
+    Writes per-term validator metrics for the last 'term_count' terms. Terms that
+    were already written are skipped, so this can run on every block.
+    """
+    result = await ValidatorMetrics.backfill(term_count)
+    if result is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A validator metrics backfill is already running.",
+        )
+    return result
 
 
 @router.post("/github/commits/")
@@ -239,6 +299,9 @@ async def insert_github_commits(
 ):
     """
     Fetches GitHub commits for tracked repositories and inserts them into a MongoDB database.
+
+    By default, each repository is refreshed from its most recent commit in the
+    database. Commit history is fetched with batched GraphQL queries.
     """
 
     dt_now = datetime.utcnow().replace(microsecond=0, second=0)
@@ -251,9 +314,6 @@ async def insert_github_commits(
         start_timestamp: int = None,
         end_timestamp: int = None,
     ):
-
-        github = Github()
-
         # Get all repos from the database
         repos = await Db_GithubRepo.find_all().to_list()
 
@@ -263,143 +323,47 @@ async def insert_github_commits(
         if owner_name is not None:
             repos = [repo for repo in repos if repo.owner_name == owner_name]
 
-        # Loop through repos
-        print(f"Processing {len(repos)} GitHub repos...")
-
-        for repo in repos:
-
-            if start_timestamp is None:
-                most_recent_document = (
-                    await Db_GithubCommit.find(Db_GithubCommit.repo_name == repo.name)
-                    .sort(-Db_GithubCommit.date)
-                    .limit(1)
-                    .first_or_none()
-                )
-
-                print(most_recent_document)
-
-                start_timestamp = int(most_recent_document.date.timestamp())
-
-                print(f"{start_timestamp}!!!")
-
-            print(f"{start_timestamp}???")
+        repo_ids = {(repo.owner_name, repo.name): repo.id for repo in repos}
 
-            print(
-                f"Processing {repo.name} repo from {datetime.utcfromtimestamp(start_timestamp)} to {datetime.utcfromtimestamp(end_timestamp)}..."
+        if start_timestamp is None:
+            # Resume each repo from its most recent commit in the database.
+            results = (
+                await Db_GithubCommit.get_motor_collection()
+                .aggregate([{"$group": {"_id": "$repo_id", "date": {"$max": "$date"}}}])
+                .to_list(None)
             )
+            latest_dates = {result["_id"]: result["date"] for result in results}
+            since = {
+                repo: latest_dates.get(repo_id) for repo, repo_id in repo_ids.items()
+            }
+        else:
+            since = {
+                repo: datetime.utcfromtimestamp(start_timestamp) for repo in repo_ids
+            }
 
-            # Query the database for existing commits in this repo
-            commits_in_db = await Db_GithubCommit.find(
-                Db_GithubCommit.owner_name == repo.owner_name,
-                Db_GithubCommit.repo_name == repo.name,
-                Db_GithubCommit.date >= datetime.utcfromtimestamp(start_timestamp),
-                Db_GithubCommit.date <= datetime.utcfromtimestamp(end_timestamp),
-            ).to_list()
-
-            if commits_in_db is None:
-                commits_in_db_count = 0
-            else:
-                commits_in_db_count = len(commits_in_db)
-
-            print(
-                f"There are {commits_in_db_count} commits for {repo.name} in the database."
-            )
-
-            commits_on_github_count = await github.get_commits_count(
-                repo.owner_name, repo.name, start_timestamp, end_timestamp
-            )
-
-            print(
-                f"There are {commits_on_github_count} commits for {repo.name} on GitHub."
-            )
+        print(f"Processing {len(repos)} GitHub repos...")
+        commits = await Github().get_commit_history(
+            list(repo_ids), since, datetime.utcfromtimestamp(end_timestamp)
+        )
 
-            # Process commits if the number of commits on GitHub
-            # is not equal to the number of commits in the database
-            if commits_in_db_count != commits_on_github_count:
-                # Initialize array to hold commits
-                commits = []
-                page = 1
-                # Loop through pages and append commits to 'commits' array
-                while True:
-                    print(f"Processing {repo.owner_name}-{repo.name}: Page {page}")
-                    result = await github.get_commits(
-                        owner_name=repo.owner_name,
-                        repo_name=repo.name,
-                        start_timestamp=start_timestamp,
-                        end_timestamp=end_timestamp,
-                        page=page,
+        print(f"Writing {len(commits)} GitHub commits to the database...")
+        if len(commits) > 0:
+            await Db_GithubCommit.get_motor_collection().bulk_write(
+                [
+                    ReplaceOne(
+                        {"_id": commit["oid"]},
+                        get_dict(
+                            _to_github_commit(
+                                repo_owner_name, repo_name, repo_ids, commit
+                            ),
+                            to_db=True,
+                        ),
+                        upsert=True,
                     )
-                    if result is None:
-                        break
-                    else:
-                        for commit in result:
-
-                            try:
-                                commit_details = await github.get_commit_details(
-                                    repo.owner_name, repo.name, commit["sha"]
-                                )
-
-                                if commit_details["author"] is None:
-                                    author_username = None
-                                    author_id = 0
-                                else:
-                                    author_username = commit_details["author"]["login"]
-                                    author_id = commit_details["author"]["id"]
-
-                                if commit_details["committer"] is None:
-                                    committer_username = None
-                                    committer_id = 0
-                                else:
-                                    committer_username = commit_details["committer"][
-                                        "login"
-                                    ]
-                                    committer_id = commit_details["author"]["id"]
-                            except:
-                                print(commit)
-
-                            commits.append(
-                                Db_GithubCommit(
-                                    id=commit_details["sha"],
-                                    date=commit_details["commit"]["committer"]["date"],
-                                    owner_name=repo.owner_name,
-                                    repo_id=repo.id,
-                                    repo_name=repo.name,
-                                    author_email=commit_details["commit"]["author"][
-                                        "email"
-                                    ],
-                                    author_id=author_id,
-                                    author_name=commit_details["commit"]["author"][
-                                        "name"
-                                    ],
-                                    author_username=author_username,
-                                    committer_email=commit_details["commit"][
-                                        "committer"
-                                    ]["email"],
-                                    committer_id=committer_id,
-                                    committer_name=commit_details["commit"][
-                                        "committer"
-                                    ]["name"],
-                                    committer_username=committer_username,
-                                    message=commit_details["commit"]["message"],
-                                    changes_additions=commit_details["stats"][
-                                        "additions"
-                                    ],
-                                    changes_deletions=commit_details["stats"][
-                                        "deletions"
-                                    ],
-                                    changes_total=commit_details["stats"]["total"],
-                                )
-                            )
-
-                    print(f"Writing {len(commits)} to database...")
-                    for commit in commits:
-                        db_write = await commit.save()
-                        print(db_write)
-
-                    page += 1
-            else:
-                print("Commits on GitHub and database are equal. Skipping this repo...")
-                continue
+                    for repo_owner_name, repo_name, commit in commits
+                ],
+                ordered=False,
+            )
 
         return
 
@@ -412,6 +376,36 @@ async def insert_github_commits(
     return
 
 
+def _to_github_commit(
+    owner_name: str, repo_name: str, repo_ids: dict, commit: dict
+) -> Db_GithubCommit:
+    """
+    Maps a GraphQL Commit node to a GitHub commit document.
+    """
+    # Authors without a GitHub account have no user.
+    author_user = commit["author"]["user"] or {}
+    committer_user = commit["committer"]["user"] or {}
+    return Db_GithubCommit(
+        id=commit["oid"],
+        date=commit["committedDate"],
+        owner_name=owner_name,
+        repo_id=repo_ids[(owner_name, repo_name)],
+        repo_name=repo_name,
+        author_email=commit["author"]["email"],
+        author_id=author_user.get("databaseId") or 0,
+        author_name=commit["author"]["name"],
+        author_username=author_user.get("login"),
+        committer_email=commit["committer"]["email"],
+        committer_id=committer_user.get("databaseId") or 0,
+        committer_name=commit["committer"]["name"],
+        committer_username=committer_user.get("login"),
+        message=commit["message"],
+        changes_additions=commit["additions"],
+        changes_deletions=commit["deletions"],
+        changes_total=commit["additions"] + commit["deletions"],
+    )
+
+
 @router.post("/github/repos/", status_code=status.HTTP_201_CREATED)
 async def post_github_repos(
     request: Request,
@@ -490,15 +484,3 @@ async def post_github_repos(
         await send_discord_notification(f"FAIL: {request.url}")
 
     return
-
-
-@router.post("/recent-transactions/", status_code=status.HTTP_201_CREATED)
-async def post_recent_transactions(request: Request):
-    recent_transactions = await Tracker.get_transactions(limit=50)
-    recent_transactions = [
-        Db_RecentTransaction(id=transaction["hash"], **transaction)
-        for transaction in recent_transactions
-    ]
-    for transaction in recent_transactions:
-        db_write = await transaction.save()
-    return
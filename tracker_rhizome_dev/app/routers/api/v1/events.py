@@ -0,0 +1,40 @@
+import asyncio
+
+from fastapi import APIRouter, Request, status
+from fastapi.responses import StreamingResponse
+
+from tracker_rhizome_dev import SSE_KEEPALIVE_INTERVAL
+from tracker_rhizome_dev.app.live_updates import LiveUpdates
+
+router = APIRouter(prefix="/events")
+
+
+@router.get("/stream/", status_code=status.HTTP_200_OK)
+async def get_event_stream(request: Request):
+    """
+    Streams rendered home page fragments as Server-Sent Events.
+    Each event name matches an 'sse-swap' attribute in the templates.
+    """
+
+    async def _stream():
+        queue = LiveUpdates.BROADCASTER.subscribe()
+        try:
+            while not await request.is_disconnected():
+                try:
+                    event, data = await asyncio.wait_for(
+                        queue.get(), timeout=SSE_KEEPALIVE_INTERVAL
+                    )
+                except asyncio.TimeoutError:
+                    # Comment lines keep proxies from closing idle connections.
+                    yield ": keepalive\n\n"
+                    continue
+                lines = "".join(f"data: {line}\n" for line in data.splitlines())
+                yield f"event: {event}\n{lines}\n"
+        finally:
+            LiveUpdates.BROADCASTER.unsubscribe(queue)
+
+    return StreamingResponse(
+        _stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
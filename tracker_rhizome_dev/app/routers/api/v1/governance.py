@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta
+
+from fastapi import APIRouter, Query, Request, status
+
+from tracker_rhizome_dev.app.iiss_stats import IissStats
+from tracker_rhizome_dev.app.validator_metrics import ValidatorMetrics
+from tracker_rhizome_dev.app.validator_nodes import ValidatorNodes
+
+router = APIRouter(prefix="/governance")
+
+
+@router.get("/iiss/", status_code=status.HTTP_200_OK)
+async def get_iiss_stats(request: Request):
+    """
+    Returns network-wide IISS statistics, and the distributions of validator
+    bonds, delegations and commission rates.
+    """
+    stats = await IissStats.get()
+    return {"data": stats}
+
+
+@router.get("/validators/uptime/", status_code=status.HTTP_200_OK)
+async def get_validators_uptime(
+    request: Request, hours: int = Query(default=24, ge=1, le=24 * 90)
+):
+    """
+    Returns the node uptime of every validator over the last 'hours' hours.
+    """
+    uptime = await ValidatorNodes.get_uptime(timedelta(hours=hours))
+    return {"data": uptime}
+
+
+@router.get("/validators/{address}/uptime/", status_code=status.HTTP_200_OK)
+async def get_validator_uptime(
+    request: Request, address: str, hours: int = Query(default=24, ge=1, le=24 * 90)
+):
+    """
+    Returns the node uptime of a validator over the last 'hours' hours.
+    """
+    uptime = await ValidatorNodes.get_uptime(timedelta(hours=hours), address)
+    return {"data": uptime.get(address)}
+
+
+@router.get("/validators/{address}/metrics/", status_code=status.HTTP_200_OK)
+async def get_validator_metrics(
+    request: Request, address: str, start: datetime = None, end: datetime = None
+):
+    """
+    Returns the per-term metrics (bond, delegation, power, productivity and rank)
+    of a validator between 'start' and 'end'.
+    """
+    metrics = await ValidatorMetrics.get_validator_series(address, start, end)
+    return {"count": len(metrics), "data": metrics}
+
+
+@router.get("/metrics/", status_code=status.HTTP_200_OK)
+async def get_network_metrics(
+    request: Request, start: datetime = None, end: datetime = None
+):
+    """
+    Returns network-wide validator aggregates for each term between 'start' and 'end'.
+    """
+    metrics = await ValidatorMetrics.get_network_series(start, end)
+    return {"count": len(metrics), "data": metrics}
@@ -1,8 +1,9 @@
 from datetime import timedelta
 
-from fastapi import APIRouter, Request, status
+from fastapi import APIRouter, Query, Request, status
 from fastapi.exceptions import HTTPException
 from tracker_rhizome_dev.app.icx import Icx
+from tracker_rhizome_dev.app.icx_quotes import IcxQuotes
 from tracker_rhizome_dev.app.models.icx import Db_IcxSicxBnusdQuote
 
 router = APIRouter(prefix="/icx")
@@ -10,8 +11,16 @@ router = APIRouter(prefix="/icx")
 
 @router.get("/icx-sicx-bnusd-quotes/")
 async def get_icx_sicx_bnusd_quotes(
-    request: Request, time_value: int, time_precision: str
+    request: Request,
+    time_value: int,
+    time_precision: str,
+    max_points: int = Query(500, ge=1, le=5000),
 ):
+    """
+    Returns quotes for the last 'time_value' minutes, hours or days, downsampled
+    to at most 'max_points' OHLC buckets. Each bucket carries the closing prices
+    of each pair, and their OHLC under 'ohlc'.
+    """
     if time_precision not in ["minute", "hour", "day"]:
         raise HTTPException(
             status_code=status.HTTP_202_ACCEPTED,
@@ -20,6 +29,8 @@ async def get_icx_sicx_bnusd_quotes(
     latest_quote = (
         await Db_IcxSicxBnusdQuote.find().sort(-Db_IcxSicxBnusdQuote.id).first_or_none()
     )
+    if latest_quote is None:
+        return {"count": 0, "data": []}
     precision_in_seconds = {"minute": 60, "hour": 3600, "day": 86400}
 
     end_time = latest_quote.id
@@ -27,16 +38,14 @@ async def get_icx_sicx_bnusd_quotes(
         seconds=time_value * precision_in_seconds[time_precision]
     )
 
-    quotes = await Db_IcxSicxBnusdQuote.find(
-        Db_IcxSicxBnusdQuote.id >= start_time, Db_IcxSicxBnusdQuote.id < end_time
-    ).to_list()
+    quotes = await IcxQuotes.get_series(start_time, end_time, max_points)
 
     return {"count": len(quotes), "data": quotes}
 
 
 @router.get("/latest-block/", status_code=status.HTTP_200_OK)
 async def get_latest_block(request: Request, height_only: bool = False):
-    block = Icx.get_block("latest")
+    block = await Icx.get_block("latest")
     if height_only is True:
         return {"data": block["height"]}
     else:
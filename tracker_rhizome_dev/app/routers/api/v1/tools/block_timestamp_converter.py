@@ -1,9 +1,57 @@
-from fastapi import APIRouter, Request, Response, status
+from datetime import datetime
+
+from fastapi import APIRouter, Query, Request, status
 from fastapi.exceptions import HTTPException
 
+from tracker_rhizome_dev import GENESIS_TIMESTAMP_S
+from tracker_rhizome_dev.app.block_index import BlockIndex
+from tracker_rhizome_dev.app.chain_head import ChainHead
+from tracker_rhizome_dev.app.icon_rpc import JsonRpcError
+
 router = APIRouter(prefix="/block-timestamp-converter")
 
 
-@router.get("/")
-async def get_block_timestamp_converter():
-    return
+@router.get("/", status_code=status.HTTP_200_OK)
+async def get_block_timestamp_converter(
+    request: Request,
+    timestamp: int = Query(default=None, ge=GENESIS_TIMESTAMP_S),
+    height: int = Query(default=None, ge=0),
+    exact: bool = True,
+):
+    """
+    Converts a Unix timestamp (in seconds) to the last block at or before it,
+    or a block height to its timestamp. Provide exactly one of 'timestamp' or
+    'height'. With 'exact' set to false, the interpolated estimate is returned
+    without probing any blocks.
+    """
+    if (timestamp is None) == (height is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail='Provide exactly one of "timestamp" or "height".',
+        )
+    if height is not None and height > await ChainHead.get_height():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Block {height} hasn't been produced yet.",
+        )
+    try:
+        if timestamp is not None:
+            height = await BlockIndex.get_height(timestamp * 1000000, exact=exact)
+        block_timestamp = await BlockIndex.get_timestamp(height, exact=exact)
+    except LookupError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="The block index hasn't been built yet.",
+        )
+    except JsonRpcError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Block {height} was not found.",
+        )
+    return {
+        "data": {
+            "height": height,
+            "timestamp": block_timestamp,
+            "datetime": datetime.utcfromtimestamp(block_timestamp / 1000000),
+        }
+    }
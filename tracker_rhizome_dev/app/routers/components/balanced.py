@@ -1,16 +1,23 @@
-from statistics import mean
+import asyncio
+from datetime import datetime, timedelta
 
+import pymongo
 from fastapi import APIRouter, Query, Request, status
 from fastapi.responses import HTMLResponse
 
 from tracker_rhizome_dev import ENV, TEMPLATES
 from tracker_rhizome_dev.app.balanced import Balanced
 from tracker_rhizome_dev.app.balanced_api import BalancedApi
+from tracker_rhizome_dev.app.balanced_loan_stats import BalancedLoanStats
+from tracker_rhizome_dev.app.balanced_risk import BalancedRisk
+from tracker_rhizome_dev.app.cache import block_version, fragment_cache
 from tracker_rhizome_dev.app.http_request import HttpReq
 from tracker_rhizome_dev.app.models.balanced import (
     App_BalancedLiquidation,
     App_BalancedLoan,
+    Db_BalancedLiquidation,
     Db_BalancedLoan,
+    Db_BalancedLoanTableView,
 )
 from tracker_rhizome_dev.app.utils import format_number, format_percentage
 
@@ -22,10 +29,14 @@ router = APIRouter(prefix="/balanced")
     response_class=HTMLResponse,
     status_code=status.HTTP_200_OK,
 )
+@fragment_cache(ttl=600)
 async def get_dao_fund_balance_sheet(request: Request):
-    assets = await BalancedApi.get_daofund_balanced_sheet()
-    for asset in assets:
-        asset["amount"] = format_number(asset["amount"])
+    # Copy the assets instead of formatting them in place, because
+    # the balance sheet is shared with concurrent requests.
+    assets = [
+        {**asset, "amount": format_number(asset["amount"])}
+        for asset in await BalancedApi.get_daofund_balanced_sheet()
+    ]
     assets.sort(key=lambda k: k["symbol"].casefold())
     return TEMPLATES.TemplateResponse(
         "balanced/components/dao_fund_balanced_sheet.html",
@@ -38,50 +49,128 @@ async def get_dao_fund_balance_sheet(request: Request):
     response_class=HTMLResponse,
     status_code=status.HTTP_200_OK,
 )
-async def get_liquidations(request: Request, page: int = 1):
-    liquidations = await Balanced.get_liquidations(page=page)
+@fragment_cache(ttl=60)
+async def get_liquidations(
+    request: Request,
+    page: int = Query(default=1, ge=1),
+    limit: int = Query(default=25, ge=1, le=100),
+):
+    collection = Db_BalancedLiquidation.get_motor_collection()
+    since = datetime.utcnow() - timedelta(days=30)
+    liquidations, liquidation_count, daily_volumes, top_liquidators = (
+        await asyncio.gather(
+            # Served by the 'date' index.
+            Db_BalancedLiquidation.find()
+            .sort(-Db_BalancedLiquidation.date)
+            .skip((page - 1) * limit)
+            .limit(limit)
+            .to_list(),
+            collection.count_documents({}),
+            collection.aggregate(
+                [
+                    {"$match": {"date": {"$gte": since}}},
+                    {
+                        "$group": {
+                            "_id": {
+                                "$dateToString": {"format": "%Y-%m-%d", "date": "$date"}
+                            },
+                            "amount": {"$sum": "$amount"},
+                            "count": {"$sum": 1},
+                        }
+                    },
+                    {"$sort": {"_id": -1}},
+                ]
+            ).to_list(None),
+            collection.aggregate(
+                [
+                    {
+                        "$group": {
+                            "_id": "$liquidator",
+                            "amount": {"$sum": "$amount"},
+                            "count": {"$sum": 1},
+                        }
+                    },
+                    {"$sort": {"amount": -1}},
+                    {"$limit": 5},
+                ]
+            ).to_list(None),
+        )
+    )
+
     liquidations = [
         App_BalancedLiquidation(**dict(liquidation)) for liquidation in liquidations
     ]
+    daily_volumes = [
+        {
+            "date": volume["_id"],
+            "amount": format_number(volume["amount"].to_decimal()),
+            "count": volume["count"],
+        }
+        for volume in daily_volumes
+    ]
+    top_liquidators = [
+        {
+            "address": liquidator["_id"],
+            "amount": format_number(liquidator["amount"].to_decimal()),
+            "count": liquidator["count"],
+        }
+        for liquidator in top_liquidators
+    ]
     return TEMPLATES.TemplateResponse(
         "balanced/components/liquidations.html",
-        {"request": request, "liquidations": liquidations, "page": page},
+        {
+            "request": request,
+            "liquidations": liquidations,
+            "liquidation_count": format_number(liquidation_count),
+            "daily_volumes": daily_volumes,
+            "top_liquidators": top_liquidators,
+            "page": page,
+            "has_next_page": page * limit < liquidation_count,
+        },
     )
 
 
 @router.get("/loans/", response_class=HTMLResponse, status_code=status.HTTP_200_OK)
+@fragment_cache(ttl=60)
 async def get_loans(
     request: Request,
     sort_by: str = Query(
         default="id",
         regex=r"^id$|^ratio$|^collateral$|^debt$|^date$|^status$",
     ),
-    sort_dir: str = "asc",
+    sort_dir: str = Query(default="asc", regex=r"^asc$|^desc$"),
     show_liquidated: bool = False,
+    page: int = Query(default=1, ge=1),
+    limit: int = Query(default=50, ge=1, le=100),
 ):
     if show_liquidated is True:
-        loans = await Db_BalancedLoan.find().to_list()
+        query = Db_BalancedLoan.find()
     else:
-        loans = await Db_BalancedLoan.find(Db_BalancedLoan.ratio > 0).to_list()
+        query = Db_BalancedLoan.find(Db_BalancedLoan.ratio > 0)
 
-    if sort_dir == "desc":
-        reverse = True
-    else:
-        reverse = False
-
-    if sort_by == "id":
-        loans.sort(key=lambda x: x.id, reverse=reverse)
-    elif sort_by == "collateral":
-        loans.sort(key=lambda x: x.collateral, reverse=reverse)
-    elif sort_by == "debt":
-        loans.sort(key=lambda x: x.total_debt, reverse=reverse)
-    elif sort_by == "ratio":
-        loans.sort(key=lambda x: x.ratio, reverse=reverse)
-    elif sort_by == "date":
-        loans.sort(key=lambda x: x.created, reverse=reverse)
-    elif sort_by == "status":
-        loans.sort(key=lambda x: x.standing, reverse=reverse)
+    # Sort in the database on an indexed field, with the loan ID as a tiebreaker
+    # so pages are stable.
+    sort_field = {
+        "id": "_id",
+        "collateral": "collateral",
+        "debt": "total_debt",
+        "ratio": "ratio",
+        "date": "created",
+        "status": "standings.sICX.standing",
+    }[sort_by]
+    direction = pymongo.DESCENDING if sort_dir == "desc" else pymongo.ASCENDING
+    sort = [(sort_field, direction)]
+    if sort_field != "_id":
+        sort.append(("_id", direction))
 
+    loans, loan_count = await asyncio.gather(
+        query.sort(sort)
+        .skip((page - 1) * limit)
+        .limit(limit)
+        .project(Db_BalancedLoanTableView)
+        .to_list(),
+        query.count(),
+    )
     loans = [App_BalancedLoan(**dict(loan)) for loan in loans]
 
     return TEMPLATES.TemplateResponse(
@@ -89,36 +178,84 @@ async def get_loans(
         {
             "request": request,
             "loans": loans,
-            "loan_count": format_number(len(loans) - 1),
+            "loan_count": format_number(loan_count),
             "sort_by": sort_by,
             "sort_dir": sort_dir,
             "show_liquidated": show_liquidated,
+            "page": page,
+            "has_next_page": page * limit < loan_count,
         },
     )
 
 
 @router.get(
-    "/loans/overview/",
+    "/loans/at-risk/",
     response_class=HTMLResponse,
     status_code=status.HTTP_200_OK,
 )
-async def get_loans_overview(request: Request):
+@fragment_cache(ttl=30, version=block_version())
+async def get_loans_at_risk(
+    request: Request, limit: int = Query(default=25, ge=1, le=100)
+):
+    positions_at_risk = await BalancedRisk.get_positions_at_risk(limit=limit)
+    positions = [
+        {
+            **position,
+            "collateral": format_number(position["collateral"]),
+            "debt": format_number(position["debt"]),
+            "ratio": (position["ratio"], format_percentage(position["ratio"])),
+            "liquidation_price": format_number(position["liquidation_price"]),
+            "distance_to_liquidation": format_percentage(
+                position["distance_to_liquidation"]
+            ),
+        }
+        for position in positions_at_risk["positions"]
+    ]
+    return TEMPLATES.TemplateResponse(
+        "balanced/components/loans_at_risk.html",
+        {
+            "request": request,
+            "positions": positions,
+            "count": format_number(positions_at_risk["count"]),
+            "total_debt": format_number(positions_at_risk["total_debt"], precision=0),
+            "price": format_number(positions_at_risk["price"]),
+        },
+    )
 
-    loans = await Db_BalancedLoan.find_all().to_list()
-    loan_count = len(loans)
-    mean_ratio = mean([loan.ratio for loan in loans])
-    max_ratio = max([loan.ratio for loan in loans])
 
-    loan_collateral = Balanced.get_loan_collateral()
+@router.get(
+    "/loans/overview/",
+    response_class=HTMLResponse,
+    status_code=status.HTTP_200_OK,
+)
+@fragment_cache(ttl=60)
+async def get_loans_overview(request: Request):
+    stats = await BalancedLoanStats.get()
+    largest_bucket = max([bucket.count for bucket in stats.ratio_histogram] or [0])
+    ratio_histogram = [
+        {
+            "label": (
+                f"{format_percentage(bucket.min_ratio, precision=0)}"
+                f"-{format_percentage(bucket.max_ratio, precision=0)}"
+                if bucket.max_ratio is not None
+                else f"{format_percentage(bucket.min_ratio, precision=0)}+"
+            ),
+            "count": format_number(bucket.count),
+            "width": bucket.count / largest_bucket if largest_bucket > 0 else 0,
+        }
+        for bucket in stats.ratio_histogram
+    ]
 
     return TEMPLATES.TemplateResponse(
         "balanced/components/loans_overview.html",
         {
             "request": request,
-            "loan_count": format_number(loan_count),
-            "total_collateral": format_number(loan_collateral, precision=0),
-            "mean_ratio": format_percentage(mean_ratio / 100),
-            "max_ratio": format_percentage(max_ratio / 100),
+            "loan_count": format_number(stats.loan_count),
+            "total_collateral": format_number(stats.total_collateral, precision=0),
+            "mean_ratio": format_percentage(stats.mean_ratio),
+            "median_ratio": format_percentage(stats.ratio_percentiles["p50"]),
+            "max_ratio": format_percentage(stats.max_ratio),
+            "ratio_histogram": ratio_histogram,
         },
     )
 
@@ -128,8 +265,9 @@ async def get_loans_overview(request: Request):
     response_class=HTMLResponse,
     status_code=status.HTTP_200_OK,
 )
+@fragment_cache(ttl=600)
 async def get_stability_fund(request: Request):
-    stability_fund = Balanced.get_stability_fund()
+    stability_fund = await Balanced.get_stability_fund()
     stability_fund = [(asset[0], format_number(asset[1])) for asset in stability_fund]
     return TEMPLATES.TemplateResponse(
         "balanced/components/stability_fund.html",
@@ -138,9 +276,10 @@ async def get_stability_fund(request: Request):
 
 
 @router.get("/pools/", response_class=HTMLResponse, status_code=status.HTTP_200_OK)
+@fragment_cache(ttl=30, version=block_version(15))
 async def get_pools(request: Request):
     balanced = Balanced()
-    pools = balanced.get_pools()
+    pools = await balanced.get_pools()
     for pool in pools:
         pool["base"] = (pool["base"], format_number(pool["base"]))
         pool["quote"] = (pool["quote"], format_number(pool["quote"]))
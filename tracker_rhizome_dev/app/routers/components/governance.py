@@ -1,11 +1,11 @@
 from fastapi import APIRouter, Query, Request, status
 from fastapi.responses import HTMLResponse
 
-from tracker_rhizome_dev import ENV, EXA, TEMPLATES
-from tracker_rhizome_dev.app.gov import Gov
-from tracker_rhizome_dev.app.icx import Icx
-from tracker_rhizome_dev.app.models.icx import Db_ValidatorNodeStatus, Validator
-from tracker_rhizome_dev.app.utils import format_number, format_percentage, to_int
+from tracker_rhizome_dev import TEMPLATES
+from tracker_rhizome_dev.app.cache import block_version, fragment_cache
+from tracker_rhizome_dev.app.iiss_stats import IissStats
+from tracker_rhizome_dev.app.utils import format_number, format_percentage
+from tracker_rhizome_dev.app.validator_table import ValidatorTable
 
 router = APIRouter(prefix="/governance")
 
@@ -13,116 +13,91 @@ router = APIRouter(prefix="/governance")
 @router.get(
     "/iiss-overview/", response_class=HTMLResponse, status_code=status.HTTP_200_OK
 )
+@fragment_cache(ttl=60, version=block_version(30))
 async def get_iiss_overview(request: Request):
-    network_info = Icx.get_network_info()
+    stats = await IissStats.get()
+    reward_fund = stats["reward_fund"]
 
-    # Get validator count.
-    validator_count = network_info["preps"]
-    main_validator_count = (
-        network_info["mainPRepCount"] + network_info["extraMainPRepCount"]
+    return TEMPLATES.TemplateResponse(
+        "governance/components/iiss_overview.html",
+        {
+            "request": request,
+            "bond_requirement": format_percentage(stats["bond_requirement"]),
+            "total_bonded_icx": format_number(stats["total_bonded"], 0),
+            "total_delegated_icx": format_number(stats["total_delegated"], 0),
+            "total_staked_icx": format_number(stats["total_staked"], 0),
+            "total_power": format_number(stats["total_power"], 0),
+            "i_global": format_number(reward_fund["i_global"], 0),
+            "i_cps": reward_fund["i_cps"],
+            "i_prep": reward_fund["i_prep"],
+            "i_relay": reward_fund["i_relay"],
+            "i_voter": reward_fund["i_voter"],
+            "validator_count": stats["validator_count"],
+            "main_validator_count": stats["main_validator_count"],
+            "sub_validator_count": stats["sub_validator_count"],
+            "average_bond": (
+                format_number(stats["bond"]["mean"], 0) if stats["bond"] else "-"
+            ),
+        },
     )
-    sub_validator_count = validator_count - main_validator_count
 
-    # Get bond requirement.
-    bond_requirement = network_info["bondRequirement"] / 100
 
-    # Get reward fund breakdown.
-    reward_fund = network_info["rewardFund"]
-    i_cps = reward_fund["Icps"]
-    i_global = reward_fund["Iglobal"] / EXA
-    i_prep = reward_fund["Iprep"]
-    i_relay = reward_fund["Irelay"]
-    i_voter = reward_fund["Ivoter"]
-
-    # Get ICX delegation details.
-    total_bonded_icx = network_info["totalBonded"] / EXA
-    total_delegated_icx = network_info["totalDelegated"] / EXA
-    total_staked_icx = network_info["totalStake"] / EXA
-    total_power = network_info["totalPower"] / EXA
+@router.get(
+    "/iiss-distributions/", response_class=HTMLResponse, status_code=status.HTTP_200_OK
+)
+@fragment_cache(ttl=60, version=block_version(30))
+async def get_iiss_distributions(request: Request):
+    stats = await IissStats.get()
 
-    validators = Gov.get_validators()
-    validator_bonds = [
-        to_int(validator["bonded"]) / EXA for validator in validators["preps"]
-    ]
-    nonzero_validator_bonds = [bond for bond in validator_bonds if bond > 0]
-    average_bond = sum(nonzero_validator_bonds) / len(nonzero_validator_bonds)
+    distributions = []
+    for key, title, suffix, decimals in [
+        ("bond", "Bond", " ICX", 0),
+        ("delegation", "Delegation", " ICX", 0),
+        ("commission_rate", "Commission", "%", 2),
+    ]:
+        distribution = stats[key]
+        if distribution is None:
+            continue
+        values = {
+            "mean": distribution["mean"],
+            "min": distribution["min"],
+            **distribution["percentiles"],
+            "max": distribution["max"],
+        }
+        distributions.append(
+            {
+                "title": title,
+                "count": distribution["count"],
+                "values": {
+                    k: f"{format_number(v, decimals)}{suffix}"
+                    for k, v in values.items()
+                },
+            }
+        )
 
     return TEMPLATES.TemplateResponse(
-        "governance/components/iiss_overview.html",
-        {
-            "request": request,
-            "bond_requirement": format_percentage(bond_requirement),
-            "total_bonded_icx": format_number(total_bonded_icx, 0),
-            "total_delegated_icx": format_number(total_delegated_icx, 0),
-            "total_staked_icx": format_number(total_staked_icx, 0),
-            "total_power": format_number(total_power, 0),
-            "i_global": format_number(i_global, 0),
-            "i_cps": i_cps,
-            "i_prep": i_prep,
-            "i_relay": i_relay,
-            "i_voter": i_voter,
-            "validator_count": validator_count,
-            "main_validator_count": main_validator_count,
-            "sub_validator_count": sub_validator_count,
-            "average_bond": format_number(average_bond, 0),
-        },
+        "governance/components/iiss_distributions.html",
+        {"request": request, "distributions": distributions},
     )
 
 
 @router.get("/validators/", response_class=HTMLResponse, status_code=status.HTTP_200_OK)
+@fragment_cache(ttl=60, version=block_version(30))
 async def get_validators(
     request: Request,
     sort_by: str = Query(
-        default="id",
+        default="rank",
         regex=r"^rank$|^name$|^cps$|^delegation$|^power$|^bond$|^productivity$|^rewards$",
     ),
     sort_dir: str = "asc",
 ):
-    validators = Gov.get_validators()
-    network_info = Icx.get_network_info()
-    icx_usd_price = Icx.get_icx_usd_price()
-    formatted_validators = [
-        Validator(
-            irep_update_block_height=validator["irepUpdateBlockHeight"],
-            last_height=validator["lastHeight"],
-            node_address=validator["nodeAddress"],
-            p2p_endpoint=validator["p2pEndpoint"],
-            total_blocks=validator["totalBlocks"],
-            validated_blocks=validator["validatedBlocks"],
-            **validator,
-            icx_usd_price=icx_usd_price,
-            network_info=network_info,
-        )
-        for validator in validators["preps"]
-    ]
-
-    if sort_by == "bond":
-        formatted_validators = sorted(
-            formatted_validators, key=lambda x: x.bonded_ratio["default"]
-        )
-    #    elif sort_by == "cps":
-    #        formatted_validators = sorted(
-    #            formatted_validators, key=lambda x: x.cps_sponsored_projects
-    #        )
-    elif sort_by == "delegation":
-        formatted_validators = sorted(
-            formatted_validators, key=lambda x: x.delegated["default"]
-        )
-    elif sort_by == "name":
-        formatted_validators = sorted(formatted_validators, key=lambda x: x.name)
-    elif sort_by == "productivity":
-        formatted_validators = sorted(
-            formatted_validators, key=lambda x: x.productivity["default"]
-        )
-
-    if sort_dir == "desc":
-        formatted_validators.reverse()
+    validators = await ValidatorTable.get_view(sort_by, sort_dir)
 
     return TEMPLATES.TemplateResponse(
         "governance/components/validators.html",
         {
             "request": request,
-            "validators": formatted_validators,
+            "validators": validators,
             "sort_by": sort_by,
             "sort_dir": sort_dir,
         },
@@ -37,7 +37,7 @@ async def get_average_block_time(request: Request):
     status_code=status.HTTP_200_OK,
 )
 async def get_icx_usd_price(request: Request):
-    icx_usd_price = Icx.get_icx_usd_price()
+    icx_usd_price = await Icx.get_icx_usd_price()
     return TEMPLATES.TemplateResponse(
         "partials/module.html",
         {
@@ -20,7 +20,7 @@ async def get_confirmations(
     request: Request,
     tx_block_height: int,
 ):
-    current_block_height = Icx.get_block("latest", height_only=True)
+    current_block_height = await Icx.get_block("latest", height_only=True)
     confirmations = current_block_height - tx_block_height
     confirmations = format_number(confirmations)
     return TEMPLATES.TemplateResponse(
@@ -1,7 +1,9 @@
 from json.decoder import JSONDecodeError
 
 from tracker_rhizome_dev import ENV
+from tracker_rhizome_dev.app.cache import single_flight
 from tracker_rhizome_dev.app.http_request import HttpReq
+from tracker_rhizome_dev.app.icx import Icx
 from tracker_rhizome_dev.app.models.icx import (
     Block,
     Contract,
@@ -63,6 +65,7 @@ class Tracker:
         return data["number"]
 
     @classmethod
+    @single_flight()
     async def get_blocks(
         cls,
         limit: int = 100,
@@ -110,11 +113,17 @@ class Tracker:
     async def get_logs(
         cls,
         address: str,
-        method: str,
+        method: str = None,
         limit: int = 100,
         skip: int = 0,
     ) -> list:
-        url = f"{cls.ICON_TRACKER_ENDPOINT}/logs/?limit={limit}&skip={skip}&address={address}&method={method}"
+        # Build query string for method.
+        if method is None:
+            method_str = ""
+        else:
+            method_str = f"&method={method}"
+
+        url = f"{cls.ICON_TRACKER_ENDPOINT}/logs/?limit={limit}&skip={skip}&address={address}{method_str}"
         r = await HttpReq.get(url)
         data = r.json()
         logs = [Log(**log) for log in data]
@@ -129,6 +138,7 @@ class Tracker:
         return market_cap
 
     @classmethod
+    @single_flight()
     async def get_token_transfers(
         cls,
         limit: int = 25,
@@ -142,6 +152,7 @@ class Tracker:
         return int(token_transfers)
 
     @classmethod
+    @single_flight()
     async def get_total_token_transfers(cls) -> int:
         url = f"{cls.ICON_TRACKER_ENDPOINT}/transactions/token-transfers"
         r = await HttpReq.head(url)
@@ -149,6 +160,7 @@ class Tracker:
         return int(token_transfers)
 
     @classmethod
+    @single_flight()
     async def get_total_transactions(cls) -> int:
         url = f"{cls.ICON_TRACKER_ENDPOINT}/transactions"
         r = await HttpReq.head(url)
@@ -160,7 +172,10 @@ class Tracker:
         url = f"{cls.ICON_TRACKER_ENDPOINT}/transactions/details/{tx_hash}"
         r = await HttpReq.get(url)
         data = r.json()
-        transaction = TransactionDetail(**data)
+        current_block_height = await Icx.get_block("latest", height_only=True)
+        transaction = TransactionDetail(
+            **data, current_block_height=current_block_height
+        )
         return transaction
 
     @classmethod
@@ -175,6 +190,7 @@ class Tracker:
             return None
 
     @classmethod
+    @single_flight()
     async def get_transactions(
         cls,
         from_address: str = None,
@@ -1,3 +1,4 @@
+import asyncio
 import re
 from datetime import datetime
 
@@ -29,6 +30,26 @@ def calculate_skip(page, limit):
     return skip
 
 
+async def gather_with_concurrency(limit: int, *aws) -> list:
+    """
+    Runs the provided awaitables concurrently, with at most 'limit' in flight at once.
+
+    Args:
+        limit (int): The maximum number of awaitables running at the same time.
+        *aws: The awaitables to run.
+
+    Returns:
+        A list of results in the same order as the provided awaitables.
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def _run(aw):
+        async with semaphore:
+            return await aw
+
+    return await asyncio.gather(*(_run(aw) for aw in aws))
+
+
 def convert_country_code_to_hex(country_code: str) -> str:
     COUNTRY_CODE_TO_HEX = {
         "ARE": "&#127462;&#127466;",
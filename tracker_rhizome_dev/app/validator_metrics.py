@@ -0,0 +1,268 @@
+import asyncio
+from datetime import datetime
+from decimal import Decimal
+
+from rich import inspect
+
+from tracker_rhizome_dev import (
+    EXA,
+    VALIDATOR_METRICS_BACKFILL_CONCURRENCY,
+    VALIDATOR_METRICS_LEASE_TTL,
+)
+from tracker_rhizome_dev.app.block_index import BlockIndex
+from tracker_rhizome_dev.app.gov import Gov
+from tracker_rhizome_dev.app.icon_rpc import JsonRpcError
+from tracker_rhizome_dev.app.lease import Lease
+from tracker_rhizome_dev.app.models.icx import Db_ValidatorMetrics
+from tracker_rhizome_dev.app.utils import to_int
+
+
+class ValidatorMetrics:
+    """
+    Per-term validator metrics (bond, delegation, power, productivity and rank),
+    stored in the 'validatorMetrics' time series collection.
+
+    Every term is read with calls pinned to its start height, so past terms can
+    be backfilled. Pinned call results are cached, and terms already in the
+    collection are skipped, so re-running a backfill is cheap.
+
+    Time series collections can't enforce unique keys, so each backfill holds
+    its own 'validator-metrics' lease, and queries keep one measurement per term
+    and validator.
+    """
+
+    LEASE_NAME = "validator-metrics"
+
+    def __init__(self) -> None:
+        pass
+
+    @classmethod
+    async def backfill(
+        cls, term_count: int, concurrency: int = VALIDATOR_METRICS_BACKFILL_CONCURRENCY
+    ) -> dict:
+        """
+        Writes the metrics of the last 'term_count' terms, skipping terms that
+        were already written.
+
+        Args:
+            term_count (int): The number of terms to walk back from the current term.
+            concurrency (int): The maximum number of terms written at once.
+
+        Returns:
+            A dictionary with the number of written, skipped and failed terms,
+            or 'None' if another backfill is running.
+        """
+        # A lease per run, so runs in the same process don't share a holder.
+        lease = Lease(cls.LEASE_NAME, ttl=VALIDATOR_METRICS_LEASE_TTL)
+        if await lease.acquire() is False:
+            return None
+        try:
+            return await cls._backfill(term_count, concurrency, lease)
+        finally:
+            await lease.release()
+
+    @classmethod
+    async def get_terms(cls) -> set:
+        """
+        Returns the sequence numbers of the terms in the collection.
+        """
+        return set(await Db_ValidatorMetrics.get_motor_collection().distinct("term"))
+
+    @classmethod
+    async def get_validator_series(
+        cls, address: str, start: datetime = None, end: datetime = None
+    ) -> list:
+        """
+        Returns the per-term metrics of a validator, oldest first.
+        """
+        query = {"address": address}
+        if start is not None or end is not None:
+            query["timestamp"] = cls._get_range(start, end)
+        metrics = (
+            await Db_ValidatorMetrics.find(query)
+            .sort(+Db_ValidatorMetrics.timestamp)
+            .to_list()
+        )
+        # Keep one measurement per term, in case overlapping runs wrote a term twice.
+        terms = set()
+        series = []
+        for metric in metrics:
+            if metric.term not in terms:
+                terms.add(metric.term)
+                series.append(metric)
+        return series
+
+    @classmethod
+    async def get_network_series(
+        cls, start: datetime = None, end: datetime = None
+    ) -> list:
+        """
+        Returns network-wide aggregates for each term, oldest first.
+        """
+        pipeline = []
+        if start is not None or end is not None:
+            pipeline.append({"$match": {"timestamp": cls._get_range(start, end)}})
+        pipeline += [
+            # Keep one measurement per term and validator, in case overlapping
+            # runs wrote a term twice.
+            {
+                "$group": {
+                    "_id": {"term": "$term", "address": "$address"},
+                    "metrics": {"$first": "$$ROOT"},
+                }
+            },
+            {"$replaceRoot": {"newRoot": "$metrics"}},
+            {
+                "$group": {
+                    "_id": "$term",
+                    "timestamp": {"$first": "$timestamp"},
+                    "block_height": {"$first": "$block_height"},
+                    "validator_count": {"$sum": 1},
+                    "main_validator_count": {
+                        "$sum": {"$cond": [{"$eq": ["$grade", 0]}, 1, 0]}
+                    },
+                    "total_bonded": {"$sum": "$bonded"},
+                    "total_delegated": {"$sum": "$delegated"},
+                    "total_power": {"$sum": "$power"},
+                    # Validators that never produced a block have no productivity.
+                    "mean_productivity": {
+                        "$avg": {
+                            "$cond": [
+                                {"$gt": ["$total_blocks", 0]},
+                                "$productivity",
+                                None,
+                            ]
+                        }
+                    },
+                }
+            },
+            {"$sort": {"_id": 1}},
+        ]
+        results = (
+            await Db_ValidatorMetrics.get_motor_collection()
+            .aggregate(pipeline)
+            .to_list(None)
+        )
+        series = []
+        for result in results:
+            term = result.pop("_id")
+            series.append(
+                {
+                    "term": term,
+                    **{
+                        k: v.to_decimal() if hasattr(v, "to_decimal") else v
+                        for k, v in result.items()
+                    },
+                }
+            )
+        return series
+
+    ###########
+    # Helpers #
+    ###########
+
+    @classmethod
+    async def _backfill(cls, term_count: int, concurrency: int, lease: Lease) -> dict:
+        # Walk back one term at a time: the block before a term's start height
+        # belongs to the previous term.
+        terms = []
+        height = None
+        while len(terms) < term_count:
+            term = await cls._get_term(height)
+            if term is None:
+                break
+            terms.append(term)
+            # Renew the lease as the run progresses, so it only expires if
+            # this run stalls.
+            await lease.acquire()
+            if term["start_height"] <= 1:
+                break
+            height = term["start_height"] - 1
+
+        existing_terms = await cls.get_terms()
+        pending_terms = [
+            term for term in terms if term["sequence"] not in existing_terms
+        ]
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def write_term(term: dict) -> int:
+            async with semaphore:
+                written_count = await cls._write_term(term)
+                await lease.acquire()
+                return written_count
+
+        results = await asyncio.gather(
+            *[write_term(term) for term in pending_terms], return_exceptions=True
+        )
+        failed_count = 0
+        for result in results:
+            if isinstance(result, Exception):
+                inspect(result)
+                failed_count += 1
+
+        return {
+            "written_count": len(pending_terms) - failed_count,
+            "skipped_count": len(terms) - len(pending_terms),
+            "failed_count": failed_count,
+        }
+
+    @classmethod
+    async def _get_term(cls, height: int = None) -> dict:
+        """
+        Returns the sequence number and start height of the term at the provided
+        block height, or 'None' if there is no term (e.g. before IISS 3).
+        """
+        try:
+            term = await Gov.get_term(height=height)
+        except JsonRpcError:
+            return None
+        if term is None:
+            return None
+        return {
+            "sequence": to_int(term["sequence"]),
+            "start_height": to_int(term["startBlockHeight"]),
+        }
+
+    @classmethod
+    async def _write_term(cls, term: dict) -> int:
+        height = term["start_height"]
+        validators, timestamp = await asyncio.gather(
+            Gov.get_validators(height=height), BlockIndex.get_timestamp(height)
+        )
+        metrics = []
+        for rank, validator in enumerate(validators["preps"], 1):
+            total_blocks = to_int(validator["totalBlocks"])
+            validated_blocks = to_int(validator["validatedBlocks"])
+            metrics.append(
+                Db_ValidatorMetrics(
+                    timestamp=datetime.utcfromtimestamp(timestamp / 1000000),
+                    address=validator["address"],
+                    term=term["sequence"],
+                    block_height=height,
+                    rank=rank,
+                    grade=to_int(validator["grade"]),
+                    bonded=Decimal(to_int(validator["bonded"])) / EXA,
+                    delegated=Decimal(to_int(validator["delegated"])) / EXA,
+                    power=Decimal(to_int(validator["power"])) / EXA,
+                    productivity=(
+                        Decimal(validated_blocks) / total_blocks
+                        if total_blocks > 0
+                        else Decimal(0)
+                    ),
+                    validated_blocks=validated_blocks,
+                    total_blocks=total_blocks,
+                )
+            )
+        if len(metrics) > 0:
+            await Db_ValidatorMetrics.insert_many(metrics)
+        return len(metrics)
+
+    @staticmethod
+    def _get_range(start: datetime = None, end: datetime = None) -> dict:
+        time_range = {}
+        if start is not None:
+            time_range["$gte"] = start
+        if end is not None:
+            time_range["$lte"] = end
+        return time_range
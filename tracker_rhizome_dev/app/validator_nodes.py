@@ -0,0 +1,197 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+from pymongo import InsertOne, ReplaceOne
+
+from tracker_rhizome_dev import (
+    VALIDATOR_NODE_PROBE_CONCURRENCY,
+    VALIDATOR_NODE_PROBE_TIMEOUT,
+)
+from tracker_rhizome_dev.app.chain_head import ChainHead
+from tracker_rhizome_dev.app.gov import Gov
+from tracker_rhizome_dev.app.http_request import HttpReq
+from tracker_rhizome_dev.app.models.icx import (
+    Db_ValidatorNodeStatus,
+    Db_ValidatorNodeUptime,
+)
+
+
+class ValidatorNodes:
+    """
+    Probes validator nodes for liveness and records their uptime.
+
+    Every node is asked for its chain height concurrently, with a timeout per
+    probe, so a probe round takes about one timeout however many nodes are slow.
+    Each round appends one measurement per validator to the 'validatorNodeUptime'
+    time series collection, and replaces the latest status in 'validatorNodeStatuses'.
+    """
+
+    NODE_ENDPOINTS_URL = (
+        "https://icon2.mon.solidwallet.io/api/v1/items/influxdb/default?init=5"
+    )
+
+    def __init__(self) -> None:
+        pass
+
+    @classmethod
+    async def probe(
+        cls,
+        timeout: float = VALIDATOR_NODE_PROBE_TIMEOUT,
+        concurrency: int = VALIDATOR_NODE_PROBE_CONCURRENCY,
+    ) -> list:
+        """
+        Probes every validator node once.
+
+        Args:
+            timeout (float): The maximum time to wait for each node (seconds).
+            concurrency (int): The maximum number of probes in flight.
+
+        Returns:
+            A list of dictionaries with the validator address, status, node height
+            and latency of each probe.
+        """
+        node_endpoints, validators, last_block = await asyncio.gather(
+            cls._get_node_endpoints(),
+            Gov.get_validators(),
+            ChainHead.get_height(),
+        )
+
+        # Map node addresses to validator addresses.
+        validator_addresses = {
+            validator["nodeAddress"]: validator["address"]
+            for validator in validators["preps"]
+        }
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def probe_node(node_address: str, endpoint: str) -> dict:
+            async with semaphore:
+                height, latency = await cls._probe_node(endpoint, timeout)
+            return {
+                "address": validator_addresses[node_address],
+                "status": height is not None and height >= last_block,
+                "height": height,
+                "latency": latency,
+            }
+
+        return await asyncio.gather(
+            *[
+                probe_node(node_address, endpoint)
+                for node_address, endpoint in node_endpoints.items()
+                if node_address in validator_addresses
+            ]
+        )
+
+    @classmethod
+    async def update(cls) -> int:
+        """
+        Probes every validator node and writes the results.
+
+        Returns:
+            The number of validators probed.
+        """
+        results = await cls.probe()
+        if len(results) == 0:
+            return 0
+
+        timestamp = datetime.utcnow().replace(microsecond=0)
+        await Db_ValidatorNodeUptime.get_motor_collection().bulk_write(
+            [InsertOne({"timestamp": timestamp, **result}) for result in results],
+            ordered=False,
+        )
+        await Db_ValidatorNodeStatus.get_motor_collection().bulk_write(
+            [
+                ReplaceOne(
+                    {"_id": result["address"]},
+                    {"timestamp": timestamp, "status": result["status"]},
+                    upsert=True,
+                )
+                for result in results
+            ],
+            ordered=False,
+        )
+        return len(results)
+
+    @classmethod
+    async def get_uptime(cls, window: timedelta, address: str = None) -> dict:
+        """
+        Returns the share of probes each validator node passed in a rolling window.
+
+        Args:
+            window (timedelta): How far back to look from now.
+            address (str): Only return the uptime of this validator.
+
+        Returns:
+            A dictionary that maps validator addresses to a dictionary with the
+            uptime percentage, probe count, and time of the last probe.
+        """
+        match = {"timestamp": {"$gte": datetime.utcnow() - window}}
+        if address is not None:
+            match["address"] = address
+
+        results = (
+            await Db_ValidatorNodeUptime.get_motor_collection()
+            .aggregate(
+                [
+                    {"$match": match},
+                    {
+                        "$group": {
+                            "_id": "$address",
+                            "up_count": {"$sum": {"$cond": ["$status", 1, 0]}},
+                            "probe_count": {"$sum": 1},
+                            "last_probed_at": {"$max": "$timestamp"},
+                        }
+                    },
+                ]
+            )
+            .to_list(None)
+        )
+        return {
+            result["_id"]: {
+                "uptime": round(result["up_count"] / result["probe_count"] * 100, 2),
+                "probe_count": result["probe_count"],
+                "last_probed_at": result["last_probed_at"],
+            }
+            for result in results
+        }
+
+    ###########
+    # Helpers #
+    ###########
+
+    @classmethod
+    async def _get_node_endpoints(cls) -> dict:
+        """
+        Returns a dictionary that maps node addresses to their public endpoint.
+        """
+        r = await HttpReq.get(cls.NODE_ENDPOINTS_URL)
+        if r is None:
+            return {}
+        node_endpoints = {}
+        for node in r.json()["data"]:
+            if str(node["items"]["address"]).startswith("hx"):
+                node_endpoints[node["items"]["address"]] = (
+                    f'http://{node["tags"]["public_ip"]}:9000'
+                )
+        return node_endpoints
+
+    @classmethod
+    async def _probe_node(cls, endpoint: str, timeout: float) -> tuple:
+        """
+        Returns the height reported by a node and its response time, or 'None'
+        for both if the node did not respond in time.
+        """
+        url = f"{endpoint}/admin/chain/0x1"
+        # Reuse the pooled client for the node, so keep-alive connections
+        # survive between probe rounds.
+        client = HttpReq.get_client(url)
+        start = time.monotonic()
+        try:
+            r = await asyncio.wait_for(client.get(url, timeout=timeout), timeout)
+            r.raise_for_status()
+            height = int(r.json()["height"])
+        except Exception as e:
+            print(f"{type(e).__name__}: {endpoint}")
+            return None, None
+        return height, round(time.monotonic() - start, 3)
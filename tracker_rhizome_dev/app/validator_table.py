@@ -0,0 +1,218 @@
+import asyncio
+import time
+from datetime import datetime
+
+from fastapi.encoders import jsonable_encoder
+from rich import inspect
+
+from tracker_rhizome_dev import (
+    CHAIN_HEAD_POLL_INTERVAL,
+    VALIDATOR_TABLE_LEASE_TTL,
+    VALIDATOR_TABLE_RELOAD_INTERVAL,
+    VALIDATOR_TABLE_RETENTION,
+    VALIDATOR_TABLE_UPDATE_INTERVAL,
+)
+from tracker_rhizome_dev.app.chain_head import ChainHead
+from tracker_rhizome_dev.app.cps import Cps
+from tracker_rhizome_dev.app.gov import Gov
+from tracker_rhizome_dev.app.icx import Icx
+from tracker_rhizome_dev.app.lease import Lease
+from tracker_rhizome_dev.app.models.icx import (
+    Db_ValidatorNodeStatus,
+    Db_ValidatorTableSnapshot,
+    Validator,
+)
+
+
+class ValidatorTable:
+    """
+    Precomputed validator table, stored as versioned snapshots in the
+    'validatorTableSnapshots' collection.
+
+    A background worker holding the 'validator-table' lease builds a snapshot
+    every VALIDATOR_TABLE_UPDATE_INTERVAL blocks. Each snapshot holds the
+    formatted rows plus the row order for every sort key, so serving a sorted
+    view is a lookup. Every worker keeps the latest snapshot in memory.
+    """
+
+    LEASE = Lease("validator-table", ttl=VALIDATOR_TABLE_LEASE_TTL)
+
+    # Sort keys of the validators component and the row value each one sorts by.
+    SORT_KEYS = {
+        "bond": lambda row: row["bonded_ratio"]["default"],
+        "cps": lambda row: (row["cps"], row["cps_sponsored_projects"]),
+        "delegation": lambda row: row["delegated"]["default"],
+        "name": lambda row: row["name"].casefold(),
+        "power": lambda row: row["power"]["default"],
+        "productivity": lambda row: row["productivity"]["default"],
+        "rewards": lambda row: row["monthly_reward"]["default"],
+    }
+
+    SNAPSHOT: Db_ValidatorTableSnapshot = None
+    LOADED_AT: float = None
+
+    _lock = asyncio.Lock()
+    _build_lock = asyncio.Lock()
+    _task: asyncio.Task = None
+
+    def __init__(self) -> None:
+        pass
+
+    @classmethod
+    async def start(cls):
+        if cls._task is not None and not cls._task.done():
+            return
+        cls._task = asyncio.create_task(cls._run())
+
+    @classmethod
+    async def stop(cls):
+        if cls._task is None:
+            return
+        cls._task.cancel()
+        try:
+            await cls._task
+        except asyncio.CancelledError:
+            pass
+        cls._task = None
+        await cls.LEASE.release()
+
+    @classmethod
+    async def build(cls, height: int) -> Db_ValidatorTableSnapshot:
+        """
+        Computes the validator table at the provided block height and saves it
+        as a new snapshot version.
+        """
+        validators, network_info, icx_usd_price, cps_validators = await asyncio.gather(
+            Gov.get_validators(height=height),
+            Icx.get_network_info(height=height),
+            Icx.get_icx_usd_price(height=height),
+            Cps.get_cps_validators(),
+        )
+        node_statuses = {
+            status["_id"]: status["status"]
+            for status in await Db_ValidatorNodeStatus.get_motor_collection()
+            .find({}, projection={"status": 1})
+            .to_list(None)
+        }
+
+        rows = [
+            jsonable_encoder(
+                Validator(
+                    irep_update_block_height=validator["irepUpdateBlockHeight"],
+                    last_height=validator["lastHeight"],
+                    node_address=validator["nodeAddress"],
+                    node_status=node_statuses.get(validator["address"]),
+                    p2p_endpoint=validator["p2pEndpoint"],
+                    total_blocks=validator["totalBlocks"],
+                    validated_blocks=validator["validatedBlocks"],
+                    **validator,
+                    icx_usd_price=icx_usd_price,
+                    network_info=network_info,
+                    cps_validators=cps_validators,
+                )
+            )
+            for validator in validators["preps"]
+        ]
+
+        # getPReps returns validators by rank.
+        orders = {"rank": list(range(len(rows)))}
+        for sort_by, key in cls.SORT_KEYS.items():
+            orders[sort_by] = sorted(range(len(rows)), key=lambda i: key(rows[i]))
+
+        snapshot = Db_ValidatorTableSnapshot(
+            id=height, created_at=datetime.utcnow(), validators=rows, orders=orders
+        )
+        await snapshot.save()
+
+        # Keep only the latest VALIDATOR_TABLE_RETENTION versions.
+        collection = Db_ValidatorTableSnapshot.get_motor_collection()
+        oldest_kept = await collection.find(
+            {},
+            projection={"_id": 1},
+            sort=[("_id", -1)],
+            skip=VALIDATOR_TABLE_RETENTION - 1,
+            limit=1,
+        ).to_list(None)
+        if len(oldest_kept) > 0:
+            await collection.delete_many({"_id": {"$lt": oldest_kept[0]["_id"]}})
+        async with cls._lock:
+            cls.SNAPSHOT = snapshot
+            cls.LOADED_AT = time.monotonic()
+        return snapshot
+
+    @classmethod
+    async def get(cls) -> Db_ValidatorTableSnapshot:
+        """
+        Returns the latest snapshot, building one if none exist yet.
+        Concurrent requests share a single build.
+        """
+        await cls._load()
+        if cls.SNAPSHOT is None:
+            async with cls._build_lock:
+                # Another request may have built it while this one waited.
+                if cls.SNAPSHOT is None:
+                    await cls.build(await ChainHead.get_height())
+        return cls.SNAPSHOT
+
+    @classmethod
+    async def get_view(cls, sort_by: str = "rank", sort_dir: str = "asc") -> list:
+        """
+        Returns the rows of the latest snapshot in the requested order.
+
+        Args:
+            sort_by (str): A key of 'SORT_KEYS', or "rank". Unknown keys sort by rank.
+            sort_dir (str): "asc" or "desc".
+
+        Returns:
+            A list of validator rows.
+        """
+        snapshot = await cls.get()
+        order = snapshot.orders.get(sort_by, snapshot.orders["rank"])
+        if sort_dir == "desc":
+            order = reversed(order)
+        return [snapshot.validators[i] for i in order]
+
+    ###########
+    # Helpers #
+    ###########
+
+    @classmethod
+    async def _load(cls):
+        """
+        Loads the latest snapshot from the database if another worker saved a
+        newer version.
+        """
+        async with cls._lock:
+            if (
+                cls.LOADED_AT is not None
+                and time.monotonic() - cls.LOADED_AT < VALIDATOR_TABLE_RELOAD_INTERVAL
+            ):
+                return
+            latest = await Db_ValidatorTableSnapshot.get_motor_collection().find_one(
+                {}, projection={"_id": 1}, sort=[("_id", -1)]
+            )
+            if latest is not None and (
+                cls.SNAPSHOT is None or latest["_id"] > cls.SNAPSHOT.id
+            ):
+                cls.SNAPSHOT = await Db_ValidatorTableSnapshot.get(latest["_id"])
+            cls.LOADED_AT = time.monotonic()
+
+    @classmethod
+    async def _run(cls):
+        while True:
+            try:
+                if await cls.LEASE.acquire() is True:
+                    height = await ChainHead.get_height()
+                    await cls._load()
+                    async with cls._build_lock:
+                        if (
+                            cls.SNAPSHOT is None
+                            or height - cls.SNAPSHOT.id
+                            >= VALIDATOR_TABLE_UPDATE_INTERVAL
+                        ):
+                            await cls.build(height)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                inspect(e)
+            await asyncio.sleep(CHAIN_HEAD_POLL_INTERVAL)